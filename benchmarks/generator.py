@@ -0,0 +1,232 @@
+"""Seeded generator of realistic schedu scripts for benchmarks.
+
+Scripts have single tasks, batch-day blocks, "after" chains, midnight-spanning tasks, updates and renames.
+Generator keeps its own minute grid of the week, so every script runs without any conflict:
+when the week is full, tasks are moved (updated) or renamed instead of added.
+
+    python benchmarks/generator.py 10000 --seed 1 > script.schedu
+"""
+
+import argparse
+import random
+import sys
+
+DAYS = ("saturday", "sunday", "monday", "tuesday", "wednesday", "thursday", "friday")
+DAY_MINUTES = 1440
+# how many times a random time is tried before giving up on adding a task
+TRIES = 8
+
+
+def format_minute(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+class Week:
+    """busy minutes of each day as int bitmask (bit i is minute i), same model as interpreter reserved times:
+    midnight-spanning task reserve end of its day and start of next day"""
+
+    def __init__(self):
+        self.masks = [0] * 7
+
+    def parts(self, days: list[int], start: int, end: int):
+        for d in days:
+            if end > start:
+                yield d, start, end
+            else:
+                yield d, start, DAY_MINUTES
+                if end > 0:
+                    yield (d + 1) % 7, 0, end
+
+    def is_free(self, days: list[int], start: int, end: int) -> bool:
+        return all(not (self.masks[d] >> s) & ((1 << (e - s)) - 1) for d, s, e in self.parts(days, start, end))
+
+    def fill(self, days: list[int], start: int, end: int):
+        for d, s, e in self.parts(days, start, end):
+            self.masks[d] |= ((1 << (e - s)) - 1) << s
+
+    def clear(self, days: list[int], start: int, end: int):
+        for d, s, e in self.parts(days, start, end):
+            self.masks[d] &= ~(((1 << (e - s)) - 1) << s)
+
+
+class Pool:
+    """list of names which random one can be taken from it, and names can be replaced or removed in O(1)"""
+
+    def __init__(self):
+        self.names = []
+        self.indexes = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name: str):
+        return name in self.indexes
+
+    def add(self, name: str):
+        self.indexes[name] = len(self.names)
+        self.names.append(name)
+
+    def choice(self, rng: random.Random) -> str:
+        return self.names[rng.randrange(len(self.names))]
+
+    def pop(self, rng: random.Random) -> str:
+        name = self.choice(rng)
+        last = self.names.pop()
+        i = self.indexes.pop(name)
+        if last != name:
+            self.names[i] = last
+            self.indexes[last] = i
+        return name
+
+    def replace(self, old: str, new: str):
+        i = self.indexes.pop(old)
+        self.names[i] = new
+        self.indexes[new] = i
+
+
+class Generator:
+    """generate statements one by one, each one is a line (or a block) of DSL code"""
+
+    def __init__(self, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.week = Week()
+        # Key: task name, Value: (days, start, end)
+        self.tasks = {}
+        self.names = Pool()
+        # tasks which can be updated or be start of a chain (not after any task and no task after them)
+        self.free_tasks = Pool()
+        self.next_id = 0
+
+    def new_name(self) -> str:
+        self.next_id += 1
+        return f"task {self.next_id}"
+
+    def random_time(self, overnight: bool = False) -> tuple[int, int]:
+        duration = self.rng.choice((5, 10, 15, 30, 45, 60, 90, 120))
+        if overnight:
+            start = DAY_MINUTES - self.rng.randrange(1, duration)
+        else:
+            start = self.rng.randrange(0, DAY_MINUTES - duration)
+        return start, (start + duration) % DAY_MINUTES
+
+    def find_time(self, days: list[int], overnight: bool = False):
+        for _ in range(TRIES):
+            start, end = self.random_time(overnight)
+            if self.week.is_free(days, start, end):
+                return start, end
+        return None
+
+    def add(self, name: str, days: list[int], start: int, end: int):
+        self.week.fill(days, start, end)
+        if name not in self.tasks:
+            self.names.add(name)
+        self.tasks[name] = (days, start, end)
+
+    def task(self):
+        days = sorted(self.rng.sample(range(7), self.rng.choice((1, 1, 1, 2, 3))))
+        overnight = self.rng.random() < 0.05
+        time = self.find_time(days, overnight)
+        if time is None:
+            return None
+        name = self.new_name()
+        self.add(name, days, *time)
+        self.free_tasks.add(name)
+        day_list = " and ".join(DAYS[d] for d in days)
+        return f'task "{name}" from {format_minute(time[0])} to {format_minute(time[1])} in {day_list}'
+
+    def block(self):
+        """block of tasks for same days"""
+        days = sorted(self.rng.sample(range(7), self.rng.choice((2, 3, 5))))
+        lines = []
+        for _ in range(self.rng.randint(2, 6)):
+            time = self.find_time(days)
+            if time is None:
+                break
+            name = self.new_name()
+            self.add(name, days, *time)
+            self.free_tasks.add(name)
+            lines.append(f'    task "{name}" from {format_minute(time[0])} to {format_minute(time[1])}')
+        if not lines:
+            return None
+        return " and ".join(DAYS[d] for d in days) + " {\n" + "\n".join(lines) + "\n}"
+
+    def chain(self):
+        """some tasks, each one after previous one"""
+        if not self.free_tasks:
+            return None
+        parent = self.free_tasks.pop(self.rng)
+        lines = []
+        for _ in range(self.rng.randint(1, 4)):
+            days, start, end = self.tasks[parent]
+            if end < start:
+                # task after a midnight-spanning task is on next days
+                days = sorted((d + 1) % 7 for d in days)
+            duration = self.rng.choice((10, 15, 30))
+            if end + duration >= DAY_MINUTES or not self.week.is_free(days, end, end + duration):
+                break
+            name = self.new_name()
+            self.add(name, days, end, end + duration)
+            lines.append(f'task "{name}" duration {format_minute(duration)} after "{parent}"')
+            parent = name
+        if not lines:
+            # nothing is after it, so it can still be moved
+            self.free_tasks.add(parent)
+            return None
+        return "\n".join(lines)
+
+    def update(self):
+        if not self.free_tasks:
+            return None
+        name = self.free_tasks.choice(self.rng)
+        days, start, end = self.tasks[name]
+        self.week.clear(days, start, end)
+        time = self.find_time(days)
+        if time is None:
+            self.week.fill(days, start, end)
+            return None
+        self.add(name, days, *time)
+        return f'update task "{name}" from {format_minute(time[0])} to {format_minute(time[1])}'
+
+    def rename(self):
+        if not self.names:
+            return None
+        old = self.names.choice(self.rng)
+        new = self.new_name()
+        self.tasks[new] = self.tasks.pop(old)
+        self.names.replace(old, new)
+        if old in self.free_tasks:
+            self.free_tasks.replace(old, new)
+        return f'rename task "{old}" to "{new}"'
+
+    def statements(self, count: int):
+        """yield count statements (a block is one statement for each task of it)"""
+        made = 0
+        kinds = (self.task, self.block, self.chain, self.update, self.rename)
+        weights = (50, 10, 10, 25, 5)
+        while made < count:
+            code = self.rng.choices(kinds, weights)[0]()
+            if code is None:
+                # week is too full for new tasks, move or rename old ones
+                code = self.update() or self.rename() or self.task()
+            if code is None:
+                continue
+            made += code.count("\n") + 1 - 2 * code.count("{")
+            yield code
+
+
+def generate(count: int, seed: int = 1) -> str:
+    """return a script which have about count statements"""
+    return "\n".join(Generator(seed).statements(count)) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("count", type=int, help="Number of statements")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    for code in Generator(args.seed).statements(args.count):
+        sys.stdout.write(code + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Read throughput of one interpreter shared by many threads.
+
+Fill an interpreter with tasks, then for each thread count run reader threads (find and print
+statements) together with one writer thread (updates) for some seconds. Report reads per second,
+writes per second, and any inconsistent read (a print that see a task which is not in its range).
+
+    python benchmarks/readers.py [--tasks 5000] [--threads 1 2 4 8] [--seconds 2]
+
+Readers hold read lock together, so how far reads scale with threads depend on the Python build
+(with GIL only one thread run Python code at a time, free-threaded builds run them in parallel).
+"""
+
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from interpreter import Interpreter  # noqa: E402
+from lexer import tokenize  # noqa: E402
+from parser import Parser  # noqa: E402
+
+DAYS = ("saturday", "sunday", "monday", "tuesday", "wednesday", "thursday", "friday")
+
+
+def parse(code: str) -> list:
+    return list(Parser(tokenize(code)).parse_statements())
+
+
+def format_minute(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def task_time(i: int, tasks: int) -> str:
+    """time of i-th task, tasks are one minute long and spread on whole week"""
+    minute = i * 10080 // tasks
+    start = minute % 1440
+    return f"from {format_minute(start)} to {format_minute((start + 1) % 1440)} in {DAYS[minute // 1440]}"
+
+
+def make_interpreter(tasks: int) -> Interpreter:
+    interpreter = Interpreter(io.StringIO())
+    interpreter.run_stream(parse("\n".join(f'task "t{i}" {task_time(i, tasks)}' for i in range(tasks))))
+    return interpreter
+
+
+def reader(interpreter: Interpreter, stop: threading.Event, counts: list, errors: list, index: int):
+    finds = parse("find 00:01 free in monday and friday between 08:00 and 18:00")
+    prints = parse("print tuesday from 10:00 to 11:00")
+    n = 0
+    while not stop.is_set():
+        for st in finds:
+            interpreter.execute(st)
+        with interpreter.lock.read:
+            # same as print statement, checked for consistency
+            for task in interpreter.get_tasks_between(3, 600, 660):
+                if not (task.day_mask >> 3 & 1 and task.start_minute < 660 and task.end_minute > 600):
+                    errors.append(task)
+        for st in prints:
+            interpreter.execute(st)
+        n += 3
+    counts[index] = n
+
+
+def writer(interpreter: Interpreter, stop: threading.Event, counts: list, tasks: int):
+    # tasks are updated to their own time, so updates never conflict but still clear and fill reserved times
+    updates = [
+        parse(f'update task "t{i}" {task_time(i, tasks)}')[0] for i in range(0, tasks, max(1, tasks // 100))
+    ]
+    n = 0
+    while not stop.is_set():
+        for st in updates:
+            interpreter.execute(st)
+            n += 1
+            if stop.is_set():
+                break
+    counts[0] = n
+
+
+def run(interpreter: Interpreter, threads: int, seconds: float, tasks: int) -> tuple:
+    stop = threading.Event()
+    read_counts = [0] * threads
+    write_counts = [0]
+    errors = []
+    workers = [
+        threading.Thread(target=reader, args=(interpreter, stop, read_counts, errors, i)) for i in range(threads)
+    ]
+    workers.append(threading.Thread(target=writer, args=(interpreter, stop, write_counts, tasks)))
+    for w in workers:
+        w.start()
+    time.sleep(seconds)
+    stop.set()
+    for w in workers:
+        w.join()
+    # output of print statements is not needed
+    interpreter.out = io.StringIO()
+    return sum(read_counts) / seconds, write_counts[0] / seconds, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=2)
+    args = parser.parse_args()
+
+    interpreter = make_interpreter(args.tasks)
+    print(f"tasks: {args.tasks}, gil: {getattr(sys, '_is_gil_enabled', lambda: True)()}, cpus: {os.cpu_count()}")
+    for threads in args.threads:
+        reads, writes, errors = run(interpreter, threads, args.seconds, args.tasks)
+        print(f"{threads} readers: {reads:.0f} reads/s, {writes:.0f} writes/s, {errors} inconsistent reads")
+
+
+if __name__ == "__main__":
+    main()
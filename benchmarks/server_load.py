@@ -0,0 +1,114 @@
+"""Load test of schedule server.
+
+Start a server on a temporary unix socket, open many sessions over a pool of connections,
+fill each session with some tasks, then send a mix of queries and updates from all sessions at once
+(pipelined on each connection) and report requests per second and latency percentiles.
+
+    python benchmarks/server_load.py [--sessions 2000] [--connections 100] [--requests 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+INTERPRETER = os.path.join(SRC, "interpreter.py")
+sys.path.insert(0, SRC)
+
+from client import Client  # noqa: E402
+
+DAYS = ("saturday", "sunday", "monday", "tuesday", "wednesday", "thursday", "friday")
+
+
+def setup_code(tasks: int) -> str:
+    """code which define tasks of a session, one task each two hours of week"""
+    lines = []
+    for i in range(tasks):
+        day = DAYS[i // 12 % 7]
+        hour = i % 12 * 2
+        lines.append(f'task "t{i}" from {hour:02d}:00 to {hour:02d}:45 in {day}')
+    return "\n".join(lines)
+
+
+def query_code(rng: random.Random, tasks: int, step: int) -> str:
+    kind = rng.random()
+    day = rng.choice(DAYS)
+    if kind < 0.4:
+        return f"find 00:30 free in {day} between 08:00 and 18:00"
+    if kind < 0.7:
+        return f"print {day} from 09:00 to 13:00"
+    if kind < 0.9:
+        hour = rng.randrange(12) * 2
+        return f'update task "t{rng.randrange(tasks)}" from {hour:02d}:00 to {hour:02d}:30'
+    return f'task "n{step}" duration 00:15 flexible in {day}'
+
+
+async def run_session(client: Client, session: str, requests: int, tasks: int, latencies: list, rng: random.Random):
+    for step in range(requests):
+        code = query_code(rng, tasks, step)
+        start = time.perf_counter()
+        await client.run(session, code)
+        latencies.append(time.perf_counter() - start)
+
+
+async def load(address: str, sessions: int, connections: int, requests: int, tasks: int):
+    clients = [await Client.connect(address) for _ in range(connections)]
+    names = [f"user{i}" for i in range(sessions)]
+    setup = setup_code(tasks)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(clients[i % connections].run(name, setup) for i, name in enumerate(names)))
+    setup_time = time.perf_counter() - start
+
+    latencies = []
+    rng = random.Random(1)
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_session(clients[i % connections], name, requests, tasks, latencies, random.Random(rng.random()))
+            for i, name in enumerate(names)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"sessions: {sessions}, connections: {connections}, tasks per session: {tasks}")
+    print(f"setup: {setup_time:.2f}s")
+    print(f"requests: {len(latencies)} in {elapsed:.2f}s, {len(latencies) / elapsed:.0f} requests/s")
+    print(f"latency: p50 {percentile(0.5):.1f}ms, p99 {percentile(0.99):.1f}ms, max {latencies[-1] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=20, help="Requests of each session")
+    parser.add_argument("--tasks", type=int, default=50, help="Tasks of each session")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = "unix:" + os.path.join(tmp, "schedu.sock")
+        server = subprocess.Popen([sys.executable, INTERPRETER, "--serve", address], stdout=subprocess.PIPE)
+        try:
+            # server print a line when it's listening
+            server.stdout.readline()
+            asyncio.run(load(address, args.sessions, args.connections, args.requests, args.tasks))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Check startup budget of the interpreter.
+
+Run a one-line script (without draw) through src/interpreter.py several times and fail
+if the best wall time is over the budget, or if importing the interpreter imports plot module (matplotlib).
+
+    python benchmarks/startup.py [--budget 100] [--runs 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+INTERPRETER = os.path.join(SRC, "interpreter.py")
+# Startup budget of CLI in milliseconds (see README)
+BUDGET_MS = 100
+
+
+def imports_matplotlib() -> bool:
+    # plot module is checked too, otherwise it always pass when matplotlib is not installed
+    code = f"import sys; sys.path.insert(0, {SRC!r}); import interpreter; print('plot' in sys.modules or 'matplotlib' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return out.stdout.strip() == "True"
+
+
+def measure_startup(script: str, runs: int) -> float:
+    """return best wall time (ms) of running script"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, INTERPRETER, "--no-cache", script], check=True, capture_output=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="Budget in milliseconds")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "startup.schedu")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write("print today\n")
+        startup = measure_startup(script, args.runs)
+
+    failed = False
+    if imports_matplotlib():
+        print("FAIL: importing interpreter imports plot (matplotlib)")
+        failed = True
+    status = "OK" if startup <= args.budget else "FAIL"
+    print(f"{status}: startup {startup:.1f}ms (budget {args.budget:.0f}ms)")
+    if status == "FAIL" or failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
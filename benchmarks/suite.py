@@ -0,0 +1,185 @@
+"""Benchmark suite of interpreter stages.
+
+For each size, generate a script with benchmarks/generator.py (same seed give same script), then time
+each stage separately and record its peak memory (tracemalloc, in a separate run so timing is not slowed):
+
+    tokenize        lexer.tokenize over whole script
+    parse           Parser.parse_program over tokens of script
+    check           Interpreter.check of all statements (--check)
+    run             Interpreter.run of program (add, update and rename tasks, conflicts checked on every change)
+    check_conflict  Interpreter.check_conflict of random tasks against final schedule
+    draw            Plot.draw of final schedule to a png file (only when matplotlib is installed, up to --draw-limit)
+
+Results are written as JSON (--output), and compared with a baseline file (--baseline) if it exists:
+a stage that is slower than baseline by more than --threshold is a regression and exit code is 1.
+
+    python benchmarks/suite.py [--sizes 100 1000 10000 100000] [--output results.json] [--save-baseline]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generator import generate  # noqa: E402
+from interpreter import Interpreter  # noqa: E402
+from lexer import tokenize  # noqa: E402
+from models import Task  # noqa: E402
+from parser import Parser  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Number of tasks which are checked in check_conflict stage
+PROBES = 10000
+
+
+def measure(stage, repeat: int, memory: bool) -> dict:
+    """return best time (seconds) of running stage repeat times, and peak memory (bytes) of one more run"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+    result = {"time": round(best, 6)}
+    if memory:
+        tracemalloc.start()
+        stage()
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def get_stages(size: int, seed: int, draw_limit: int, tmp: str) -> dict:
+    """return stages of a size as {name: function}, inputs of each stage are made before"""
+    code = generate(size, seed)
+    tokens = list(tokenize(code))
+    program = Parser(tokens).parse_program()
+    interpreter = Interpreter(io.StringIO())
+    interpreter.run(program)
+    rng = random.Random(seed)
+    probes = []
+    for i in range(PROBES):
+        start = rng.randrange(1440)
+        probes.append(Task(f"probe {i}", start, (start + rng.choice((15, 30, 60))) % 1440, 1 << rng.randrange(7)))
+
+    def run_tokenize():
+        for _ in tokenize(code):
+            pass
+
+    def run_parse():
+        Parser(tokens).parse_program()
+
+    def run_check():
+        Interpreter(io.StringIO()).check(program.statements)
+
+    def run_program():
+        Interpreter(io.StringIO()).run(program)
+
+    def run_check_conflict():
+        for task in probes:
+            interpreter.check_conflict(task)
+
+    stages = {
+        "tokenize": run_tokenize,
+        "parse": run_parse,
+        "check": run_check,
+        "run": run_program,
+        "check_conflict": run_check_conflict,
+    }
+    if size <= draw_limit:
+        try:
+            from plot import Plot
+        except ImportError:
+            # matplotlib is optional
+            return stages
+        path = os.path.join(tmp, "schedule.png")
+
+        def run_draw():
+            Plot(list(interpreter.tasks.values())).draw(path)
+
+        stages["draw"] = run_draw
+    return stages
+
+
+def run_suite(sizes: list[int], seed: int, repeat: int, memory: bool, draw_limit: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            results[str(size)] = {}
+            # big sizes are slow, so they are not repeated
+            times = repeat if size <= 10000 else 1
+            for name, stage in get_stages(size, seed, draw_limit, tmp).items():
+                result = measure(stage, times, memory)
+                results[str(size)][name] = result
+                peak = f", peak {result['peak_memory'] / 1e6:.1f}MB" if "peak_memory" in result else ""
+                print(f"{size:>8} {name:<15} {result['time'] * 1000:10.2f}ms{peak}", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """print time of each stage against baseline, return regressions"""
+    regressions = []
+    for size, stages in results["results"].items():
+        for name, result in stages.items():
+            base = baseline["results"].get(size, {}).get(name)
+            if base is None:
+                continue
+            ratio = result["time"] / base["time"] if base["time"] else 1
+            line = f"{size:>8} {name:<15} {base['time'] * 1000:10.2f}ms -> {result['time'] * 1000:10.2f}ms ({ratio:.2f}x)"
+            if ratio > 1 + threshold:
+                line += " REGRESSION"
+                regressions.append(line)
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each stage (best is taken), sizes over 10000 run once")
+    parser.add_argument("--no-memory", action="store_true", help="Don't measure peak memory")
+    parser.add_argument("--draw-limit", type=int, default=10000, help="Biggest size which is drawn")
+    parser.add_argument("--output", help="Write results to this JSON file (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline JSON file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Slowdown which is a regression (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as new baseline")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.seed, args.repeat, not args.no_memory, args.draw_limit)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from interpreter import Interpreter
+from lexer import tokenize
+from parser import Parser
+
+
+def find_files(pattern: str) -> list[str]:
+    """return sorted schedu files of a directory (recursive), or files which match a glob pattern"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "**", "*.schedu")
+    return sorted(glob.glob(pattern, recursive=True))
+
+
+def check_file(path: str) -> dict:
+    """tokenize, parse and check (see Interpreter.check) one file, return its result.
+    * status is "ok", "syntax_error" (with line and offset), "conflict" (with report of check, conflicts and other errors of statements) or "error" (can't read file or other errors)."""
+    start = time.perf_counter()
+    result = {"file": path, "status": "ok"}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            code = f.read()
+        statements = list(Parser(tokenize(code)).parse_statements())
+        report = Interpreter().check(statements)
+        if report:
+            result["status"] = "conflict"
+            result["report"] = report
+    except SyntaxError as e:
+        result["status"] = "syntax_error"
+        result["error"] = e.msg
+        result["line"] = e.lineno
+        result["offset"] = e.offset
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{e}"
+    result["time"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def run_batch(pattern: str, workers: int = None, out=None) -> bool:
+    """check all files of pattern (see find_files) in a process pool and write result of each file as a JSON line to out
+    (None mean sys.stdout), in order of files as soon as it's ready. return True if all files are ok.
+    * Modules are imported once in each worker (not once for each file), files are sent to workers in chunks."""
+    if out is None:
+        out = sys.stdout
+    paths = find_files(pattern)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    all_ok = True
+    if not paths:
+        return all_ok
+    chunksize = max(1, min(64, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(check_file, paths, chunksize=chunksize):
+            all_ok = all_ok and result["status"] == "ok"
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    return all_ok
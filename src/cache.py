@@ -0,0 +1,104 @@
+import hashlib
+import marshal
+import os
+import zlib
+from dataclasses import fields
+import parser as ast
+from lexer import tokenize
+from parser import Parser, Program, PARSER_VERSION
+
+# Name of cache directory, which is made next to the script (like __pycache__)
+CACHE_DIR_NAME = "__scheducache__"
+# Max total size of cached programs in a cache directory (bytes), oldest used ones are removed after it
+MAX_CACHE_SIZE = 64 * 1024 * 1024
+
+
+def get_cache_dir(script_path: str) -> str:
+    """cache directory is SCHEDU_CACHE_DIR environment variable if it's set, otherwise __scheducache__ next to the script"""
+    return os.environ.get("SCHEDU_CACHE_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(script_path)), CACHE_DIR_NAME
+    )
+
+
+def get_cache_key(code: bytes) -> str:
+    """key of a script is hash of its content and parser version, so changed script or parser never use old cache"""
+    h = hashlib.sha256(code)
+    h.update(f"schedu-parser-{PARSER_VERSION}".encode())
+    return h.hexdigest()
+
+
+def load_program(script_path: str, cache_dir: str = None, max_size: int = MAX_CACHE_SIZE) -> Program:
+    """Return parsed program of a script, from cache if script is not changed after last parse, otherwise parse it and cache it."""
+    with open(script_path, "rb") as f:
+        code = f.read()
+    if cache_dir is None:
+        cache_dir = get_cache_dir(script_path)
+    cache_file = os.path.join(cache_dir, get_cache_key(code) + ".sdc")
+
+    try:
+        with open(cache_file, "rb") as f:
+            program = Program(
+                [decode_node(st) for st in marshal.loads(zlib.decompress(f.read()))]
+            )
+        # update time of file, it's used for remove least recently used files
+        os.utime(cache_file)
+        return program
+    except FileNotFoundError:
+        pass
+    except Exception:
+        # broken cache file, it will be replaced
+        pass
+
+    program = Parser(tokenize(code.decode("utf-8"))).parse_program()
+    try:
+        save_program(program, cache_file)
+        evict(cache_dir, max_size)
+    except OSError:
+        # cache is only an optimization, script should run even if cache can't be written
+        pass
+    return program
+
+
+def save_program(program: Program, cache_file: str):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    data = zlib.compress(marshal.dumps([encode_node(st) for st in program.statements]))
+    # write to temp file and then replace, so other processes never read half written file
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temp_file, "wb") as f:
+        f.write(data)
+    os.replace(temp_file, cache_file)
+
+
+def evict(cache_dir: str, max_size: int = MAX_CACHE_SIZE):
+    """remove least recently used cached programs until total size of cache directory is less than max_size"""
+    files = []
+    total = 0
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".sdc"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    files.sort()
+    for _, size, path in files:
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def encode_node(node):
+    """convert an AST node to tuple of (class name, *fields), nested nodes are converted too.
+    * Tuples are only used for nodes, so they can be decoded without any schema."""
+    return (type(node).__name__,) + tuple(
+        encode_node(v) if hasattr(v, "__dataclass_fields__") else v
+        for v in (getattr(node, f.name) for f in fields(node))
+    )
+
+
+def decode_node(data: tuple):
+    cls = getattr(ast, data[0])
+    return cls(*[decode_node(v) if type(v) is tuple else v for v in data[1:]])
@@ -0,0 +1,76 @@
+from bisect import bisect_left, bisect_right
+from heapq import heappush, heappop
+from models import Task
+from helpers import DAY_INDEXES
+
+WEEK_MINUTES = 7 * 1440
+
+
+def week_intervals(task: Task):
+    """yield [start, end) of each part of task on linear week (saturday 00:00 is minute 0).
+    * Part that pass end of week (midnight-spanning task on friday) wrap to start of week.
+    * Dated tasks don't have any fixed place on week, they have no interval (see recurrence.find_conflict)."""
+    if task.recurrence is not None:
+        return
+    for d in DAY_INDEXES[task.day_mask]:
+        s = d * 1440 + task.start_minute
+        e = d * 1440 + task.end_minute + (1440 if task.overnight else 0)
+        if e > WEEK_MINUTES:
+            yield s, WEEK_MINUTES
+            yield 0, e - WEEK_MINUTES
+        elif e > s:
+            yield s, e
+
+
+def find_conflicts(tasks: list[Task], lifetimes: list[tuple[int, int]] = None, identities: list[int] = None):
+    """Find every overlapped pair of tasks with one sweep on sorted week intervals.
+    return list of (i, j, start, end), i < j are index of tasks and [start, end) is first overlapped time of them on linear week.
+    * lifetimes[i] is (born, died) statement index of tasks[i], tasks which never live together don't conflict.
+    When it's None all tasks live together.
+    * identities[i] is identity of tasks[i] (versions of same task made by update and rename have same identity),
+    they never live together, so active intervals are grouped by identity and sorted by lifetime in each group,
+    then each interval only visit versions which live with it, not all old versions of a task which is updated many times.
+    It's O(n log n + conflicts) when few tasks (not versions) are active at same time of week."""
+    intervals = sorted(
+        (s, e, i) for i, task in enumerate(tasks) for s, e in week_intervals(task)
+    )
+    if lifetimes is None:
+        lifetimes = [(0, 1)] * len(tasks)
+    if identities is None:
+        identities = range(len(tasks))
+    conflicts = []
+    seen = set()
+    # intervals which not ended yet, as (end, start, index)
+    active = []
+    # Key: identity, Value: (lifetimes, [(end, index)]) of its versions which are in active, sorted by lifetime
+    groups = {}
+    for s, e, i in intervals:
+        while active and active[0][0] <= s:
+            _, _, j = heappop(active)
+            spans, ends = groups[identities[j]]
+            k = bisect_left(spans, lifetimes[j])
+            while ends[k][1] != j:
+                k += 1
+            del spans[k], ends[k]
+            if not spans:
+                del groups[identities[j]]
+        born, died = lifetimes[i]
+        for identity, (spans, ends) in groups.items():
+            if identity == identities[i]:
+                continue
+            # lifetimes in a group don't overlap, only last version which born before i can still live
+            k = max(bisect_left(spans, (born, born)) - 1, 0)
+            while k < len(spans) and spans[k][0] < died:
+                if spans[k][1] > born:
+                    ae, j = ends[k]
+                    pair = (j, i) if j < i else (i, j)
+                    if pair not in seen:
+                        seen.add(pair)
+                        conflicts.append((pair[0], pair[1], s, min(e, ae)))
+                k += 1
+        heappush(active, (e, s, i))
+        spans, ends = groups.setdefault(identities[i], ([], []))
+        k = bisect_right(spans, lifetimes[i])
+        spans.insert(k, lifetimes[i])
+        ends.insert(k, (e, i))
+    return conflicts
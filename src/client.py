@@ -0,0 +1,99 @@
+"""Client of schedule server (see server.py).
+
+Send a script (or each line of stdin) to a session of server and print its output:
+
+    python src/client.py unix:/tmp/schedu.sock alice [script.schedu]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import deque
+
+# Max size of one request or response line
+LINE_LIMIT = 16 * 1024 * 1024
+
+
+def parse_address(address: str) -> tuple:
+    """return ("unix", path) or ("tcp", host, port) of an address.
+    * "unix:/path" or a path (have /) is a unix socket, "host:port" or "port" is a TCP address (default host is localhost)."""
+    if address.startswith("unix:"):
+        return "unix", address[5:]
+    if "/" in address:
+        return "unix", address
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise RuntimeError(f"Invalid server address {address}!!!")
+    return "tcp", host or "127.0.0.1", int(port)
+
+
+class Client:
+    """Connection to schedule server.
+    * Requests can be pipelined (sent without waiting for responses of previous ones),
+    server answer requests of a connection in order so each response is matched with oldest waiting request."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        # futures of requests which are waiting for response, in order of sending
+        self.waiting = deque()
+        self.reading = asyncio.create_task(self.read_responses())
+
+    @classmethod
+    async def connect(cls, address: str) -> "Client":
+        kind, *where = parse_address(address)
+        if kind == "unix":
+            reader, writer = await asyncio.open_unix_connection(where[0], limit=LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(*where, limit=LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def run(self, session: str, code: str) -> dict:
+        """run code in session, return response of server ({"ok": .., "output": .., "error": ..})"""
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append(future)
+        self.writer.write(json.dumps({"session": session, "code": code}).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def read_responses(self):
+        try:
+            while line := await self.reader.readline():
+                self.waiting.popleft().set_result(json.loads(line))
+        finally:
+            while self.waiting:
+                self.waiting.popleft().set_exception(ConnectionError("Server closed connection"))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.reading.cancel()
+
+
+async def main(address: str, session: str, path: str = None):
+    client = await Client.connect(address)
+    try:
+        if path is not None:
+            with open(path, "r", encoding="utf-8") as f:
+                codes = [f.read()]
+        else:
+            codes = sys.stdin
+        for code in codes:
+            if not code.strip():
+                continue
+            response = await client.run(session, code)
+            sys.stdout.write(response["output"])
+            if not response["ok"]:
+                print(response["error"])
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schedu server client")
+    parser.add_argument("address", help="Address of server (unix:/path/to/socket or host:port)")
+    parser.add_argument("session", help="Name of session, each session has its own schedule")
+    parser.add_argument("file", nargs="?", help="Script to run, otherwise each line of stdin is run")
+    args = parser.parse_args()
+    asyncio.run(main(args.address, args.session, args.file))
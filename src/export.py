@@ -0,0 +1,135 @@
+import csv
+import hashlib
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from helpers import DAY_INDEXES, mask_to_days
+from recurrence import Recurrence, occurrences, format_date
+
+# iCalendar day of each index of helpers.WEEK_DAYS
+ICAL_DAYS = ("SA", "SU", "MO", "TU", "WE", "TH", "FR")
+# Columns of exported CSV, dated tasks also have from, until, interval and except (empty for weekly tasks)
+CSV_COLUMNS = ("name", "start", "end", "days", "from", "until", "interval", "except")
+# Longest line of iCalendar (octets, without line break), longer lines are folded
+ICAL_LINE_LIMIT = 75
+
+
+def export_tasks(tasks, path: str, start: date = None):
+    """write tasks to an iCalendar (.ics) or CSV (.csv) file, format is chosen by extension of path.
+    * tasks can be any iterable (like Interpreter.tasks.values()), each task is written as soon as it's read,
+    so memory doesn't grow with number of tasks.
+    * start is first date of weekly tasks in calendar (default is today), see write_ics."""
+    ics = path.lower().endswith(".ics")
+    if not ics and not path.lower().endswith(".csv"):
+        raise RuntimeError(f"Export format of {path} is not supported!!! use .ics or .csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if ics:
+            write_ics(tasks, f, start)
+        else:
+            write_csv(tasks, f)
+
+
+def write_csv(tasks, f):
+    """write one row for each task, days are separated by space and end before start mean task end on tomorrow"""
+    writer = csv.writer(f)
+    writer.writerow(CSV_COLUMNS)
+    for task in tasks:
+        row = [task.name, task.start, task.end, " ".join(mask_to_days(task.day_mask))]
+        rule = task.recurrence
+        if rule is None:
+            row += ["", "", "", ""]
+        else:
+            row += [
+                format_date(rule.start),
+                "" if rule.until is None else format_date(rule.until),
+                rule.interval,
+                " ".join(format_date(o) for o in sorted(rule.exceptions)),
+            ]
+        writer.writerow(row)
+
+
+def write_ics(tasks, f, start: date = None):
+    """write a VCALENDAR with one VEVENT for each task, which repeat weekly on days of task (RRULE).
+    * Weekly tasks start from first of their days on or after start (default is today) and never end,
+    dated tasks start from their first occurrence and have their interval, until and exceptions.
+    * Times are local (floating) times, midnight-spanning tasks end on tomorrow of each occurrence.
+    * Weeks start at saturday (WKST=SA), so every other week count same weeks as schedu."""
+    if start is None:
+        start = date.today()
+    anchor = Recurrence(start.toordinal())
+    # first date of weekly tasks only depend on their days
+    firsts = {}
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//schedu//schedule export//EN\r\nCALSCALE:GREGORIAN\r\n")
+    for task in tasks:
+        rule = task.recurrence
+        if rule is None:
+            first = firsts.get(task.day_mask, -1)
+            if first == -1:
+                first = firsts[task.day_mask] = next(occurrences(anchor, task.day_mask), None)
+        else:
+            first = next(occurrences(rule, task.day_mask), None)
+        if first is None:
+            continue
+        # midnight-spanning task end on tomorrow
+        end = format_ical_time(first + 1 if task.overnight else first, task.end_minute)
+        rrule = "RRULE:FREQ=WEEKLY;WKST=SA"
+        if rule is not None and rule.interval != 1:
+            rrule += f";INTERVAL={rule.interval}"
+        rrule += ";BYDAY=" + ",".join(ICAL_DAYS[d] for d in DAY_INDEXES[task.day_mask])
+        if rule is not None and rule.until is not None:
+            # until is inclusive, so last second of that day
+            rrule += f";UNTIL={format_ical_date(rule.until)}T235959"
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{hashlib.sha1(task.name.encode('utf-8')).hexdigest()}@schedu",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{format_ical_time(first, task.start_minute)}",
+            f"DTEND:{end}",
+            fold(rrule),
+        ]
+        if rule is not None and rule.exceptions:
+            lines.append(
+                fold("EXDATE:" + ",".join(format_ical_time(o, task.start_minute) for o in sorted(rule.exceptions)))
+            )
+        if rule is not None:
+            # so importer don't take a dated task which never end as a weekly task
+            lines.append("X-SCHEDU-DATED:TRUE")
+        lines.append(fold(f"SUMMARY:{escape(task.name)}"))
+        lines.append("END:VEVENT\r\n")
+        f.write("\r\n".join(lines))
+    f.write("END:VCALENDAR\r\n")
+
+
+@lru_cache(maxsize=1024)
+def format_ical_date(ordinal: int) -> str:
+    return date.fromordinal(ordinal).strftime("%Y%m%d")
+
+
+def format_ical_time(ordinal: int, minute: int) -> str:
+    """return local date-time of iCalendar, like 20260105T183000"""
+    return f"{format_ical_date(ordinal)}T{minute // 60:02d}{minute % 60:02d}00"
+
+
+def escape(text: str) -> str:
+    """escape TEXT value of iCalendar"""
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def fold(line: str) -> str:
+    """split line to lines of at most 75 octets, next lines start with a space (iCalendar folding)"""
+    data = line.encode("utf-8")
+    if len(data) <= ICAL_LINE_LIMIT:
+        return line
+    parts = []
+    limit = ICAL_LINE_LIMIT
+    while len(data) > limit:
+        cut = limit
+        # don't cut a multi-byte character
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+        # next lines have a space before them
+        limit = ICAL_LINE_LIMIT - 1
+    parts.append(data.decode("utf-8"))
+    return "\r\n ".join(parts)
@@ -26,3 +26,47 @@ def convert_minute_to_time(minute: str):
     h = int(int(minute) / 60)
     m = int(minute) % 60
     return str(h) + ":" + str(m)
+
+
+# Order of week days in reserved table and plots
+WEEK_DAYS = (
+    "saturday",
+    "sunday",
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+)
+
+# Bit of each day in day masks (bit i is WEEK_DAYS[i])
+DAY_BITS = {d: 1 << i for i, d in enumerate(WEEK_DAYS)}
+
+# Index of days in each of 128 possible day masks, so masks never need to be scanned bit by bit
+DAY_INDEXES = tuple(tuple(i for i in range(7) if m >> i & 1) for m in range(128))
+
+
+def format_minute(minute: int) -> str:
+    """convert minute of day to HH:MM"""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def days_to_mask(days: list[str]) -> int:
+    mask = 0
+    for d in days:
+        mask |= DAY_BITS[d.lower()]
+    return mask
+
+
+def mask_to_days(mask: int) -> list[str]:
+    return [WEEK_DAYS[i] for i in DAY_INDEXES[mask]]
+
+
+def next_days_mask(mask: int) -> int:
+    """shift each day of mask to its tomorrow (friday goes to saturday)"""
+    return ((mask << 1) | (mask >> 6)) & 0x7F
+
+
+def next_day_names(names) -> tuple:
+    """shift each day name to its tomorrow, order of names is kept (see next_days_mask)"""
+    return tuple(WEEK_DAYS[(WEEK_DAYS.index(d.lower()) + 1) % 7] for d in names)
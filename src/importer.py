@@ -0,0 +1,235 @@
+import csv
+import re
+from datetime import date
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from helpers import DAY_BITS, WEEK_DAYS, format_minute
+from models import Task
+from recurrence import Recurrence, day_index, occurrences
+
+# Number of rows which are validated and added together in one transaction
+IMPORT_CHUNK_SIZE = 10000
+# Minute of each valid time (HH:MM), so a column of times is validated and converted with one lookup for each time
+TIME_MINUTES = {format_minute(m): m for m in range(1440)}
+# Columns of CSV (same as export.CSV_COLUMNS), name, start, end and days are required
+CSV_COLUMNS = ("name", "start", "end", "days", "from", "until", "interval", "except")
+# iCalendar day names and their index in WEEK_DAYS
+ICAL_DAYS = {"SA": 0, "SU": 1, "MO": 2, "TU": 3, "WE": 4, "TH": 5, "FR": 6}
+DAY_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def read_chunks(path: str, chunk_size: int = IMPORT_CHUNK_SIZE):
+    """yield rows of a CSV (.csv) or iCalendar (.ics) file in chunks, file is read while chunks are used.
+    * Each row is (line, name, start, end, days, from, until, interval, except), all of them are text like CSV columns."""
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        reader = read_csv
+    elif lower.endswith(".ics"):
+        reader = read_ics
+    else:
+        raise RuntimeError(f"Import format of {path} is not supported!!! use .csv or .ics")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = reader(f)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def read_csv(f):
+    """yield rows of a CSV file which has a header (columns can be in any order, unknown columns are ignored)"""
+    reader = csv.reader(f)
+    header = [c.strip().lower() for c in next(reader, [])]
+    missing = [c for c in CSV_COLUMNS[:4] if c not in header]
+    if missing:
+        raise RuntimeError(f"CSV file doesn't have {', '.join(missing)} columns!!!")
+    # rows are padded with empty columns, missing columns are taken from them
+    width = len(header)
+    pad = [""] * width
+    getter = itemgetter(*[header.index(c) if c in header else width for c in CSV_COLUMNS])
+    for row in reader:
+        if row:
+            row += pad
+            yield (reader.line_num,) + getter(row)
+
+
+def read_ics(f):
+    """yield a row for each VEVENT of an iCalendar file (see get_event_row)"""
+    event = None
+    line_number = 0
+    for number, line in unfold(f):
+        name, _, value = line.partition(":")
+        if name == "BEGIN" and value == "VEVENT":
+            event = {}
+            line_number = number
+        elif name == "END" and value == "VEVENT":
+            yield get_event_row(event, line_number)
+            event = None
+        elif event is not None:
+            key, _, params = name.partition(";")
+            if key == "EXDATE":
+                event.setdefault(key, []).extend(value.split(","))
+            else:
+                event[key] = (params, value)
+
+
+def unfold(f):
+    """yield (line number, line) of logical lines of iCalendar, folded lines (next lines which start with space) are joined"""
+    current = None
+    start = 0
+    for number, line in enumerate(f, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current = line
+        start = number
+    if current is not None:
+        yield start, current
+
+
+def get_event_row(event: dict, line: int) -> tuple:
+    """convert properties of a VEVENT to a row.
+    * Event which repeat every week forever (RRULE with FREQ=WEEKLY, no INTERVAL, UNTIL and EXDATE) is a weekly task,
+    other repeating events are dated tasks, and event without RRULE is a dated task on its only date.
+    * Times are used as they are (local time, time zone is ignored), all-day events and COUNT are not supported."""
+    if "DTSTART" not in event:
+        raise RuntimeError(f"line {line}: Event doesn't have DTSTART!!!")
+    start_date, start = parse_ical_time(event["DTSTART"][1], line)
+    if "DTEND" in event:
+        end_date, end = parse_ical_time(event["DTEND"][1], line)
+        length = (end_date - start_date) * 1440 + end - start
+    elif "DURATION" in event:
+        length = parse_ical_duration(event["DURATION"][1], line)
+    else:
+        raise RuntimeError(f"line {line}: Event doesn't have DTEND or DURATION!!!")
+    if not 0 < length < 1440:
+        raise RuntimeError(f"line {line}: Event should be longer than 0 and shorter than a day!!!")
+    name = unescape(event.get("SUMMARY", ("", ""))[1])
+    exceptions = " ".join(
+        date(int(v[:4]), int(v[4:6]), int(v[6:8])).isoformat() for v in event.get("EXDATE", ())
+    )
+    row_start = format_minute(start)
+    row_end = format_minute((start + length) % 1440)
+    first = date.fromordinal(start_date).isoformat()
+
+    if "RRULE" not in event:
+        return (line, name, row_start, row_end, WEEK_DAYS[day_index(start_date)], first, first, "1", exceptions)
+    rule = dict(part.partition("=")[::2] for part in event["RRULE"][1].split(";"))
+    if rule.get("FREQ") != "WEEKLY":
+        raise RuntimeError(f"line {line}: Only weekly repeating events are supported!!!")
+    if "COUNT" in rule:
+        raise RuntimeError(f"line {line}: COUNT of repeating events is not supported!!!")
+    if "BYDAY" in rule:
+        try:
+            days = " ".join(WEEK_DAYS[ICAL_DAYS[d]] for d in rule["BYDAY"].split(","))
+        except KeyError:
+            raise RuntimeError(f"line {line}: BYDAY is invalid!!! got {rule['BYDAY']}")
+    else:
+        days = WEEK_DAYS[day_index(start_date)]
+    interval = rule.get("INTERVAL", "1")
+    # export mark dated tasks, so one which never end is not imported as a weekly task
+    if "UNTIL" not in rule and interval == "1" and not exceptions and "X-SCHEDU-DATED" not in event:
+        return (line, name, row_start, row_end, days, "", "", "", "")
+    until = ""
+    if "UNTIL" in rule:
+        until = date.fromordinal(parse_ical_time(rule["UNTIL"], line)[0]).isoformat()
+    return (line, name, row_start, row_end, days, first, until, interval, exceptions)
+
+
+def parse_ical_time(value: str, line: int) -> tuple[int, int]:
+    """return (date ordinal, minute of day) of iCalendar DATE-TIME like 20260105T183000 (or 20260105T183000Z)"""
+    try:
+        day = date(int(value[:4]), int(value[4:6]), int(value[6:8])).toordinal()
+        if len(value) == 8:
+            raise RuntimeError(f"line {line}: All-day events are not supported!!!")
+        if value[8] != "T":
+            raise ValueError
+        return day, int(value[9:11]) * 60 + int(value[11:13])
+    except (ValueError, IndexError):
+        raise RuntimeError(f"line {line}: Date-time is invalid!!! got {value}")
+
+
+def parse_ical_duration(value: str, line: int) -> int:
+    """return minutes of iCalendar DURATION like PT1H30M"""
+    match = re.fullmatch(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?)?", value)
+    if match is None:
+        raise RuntimeError(f"line {line}: Duration is invalid!!! got {value}")
+    d, h, m = (int(g or 0) for g in match.groups())
+    return d * 1440 + h * 60 + m
+
+
+def unescape(text: str) -> str:
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+@lru_cache(maxsize=256)
+def get_day_mask(days: str) -> int:
+    """return day mask of days like "monday friday" (separated by space, comma or semicolon), -1 if it's invalid"""
+    mask = 0
+    for d in DAY_SEPARATORS.split(days.strip().lower()):
+        if d not in DAY_BITS:
+            return -1
+        mask |= DAY_BITS[d]
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def get_date(text: str) -> int:
+    """return ordinal of date YYYY-MM-DD, -1 if it's invalid"""
+    try:
+        return date.fromisoformat(text).toordinal()
+    except ValueError:
+        return -1
+
+
+def build_tasks(rows: list[tuple]) -> list[Task]:
+    """validate a chunk of rows (see read_chunks) and convert it to tasks, raise error of first invalid row.
+    * Each column is validated and converted at once with lookup tables (map over whole column),
+    rows are only visited one by one for report an error and for dated tasks."""
+    starts = list(map(TIME_MINUTES.get, [r[2] for r in rows]))
+    ends = list(map(TIME_MINUTES.get, [r[3] for r in rows]))
+    masks = list(map(get_day_mask, [r[4] for r in rows]))
+    if None in starts or None in ends or -1 in masks or 0 in masks or any(map(int.__eq__, starts, ends)):
+        for row, s, e, mask in zip(rows, starts, ends, masks):
+            if s is None or e is None:
+                raise RuntimeError(f"line {row[0]}: Time is invalid!!! got {row[2] if s is None else row[3]}")
+            if mask <= 0:
+                raise RuntimeError(f"line {row[0]}: Days are invalid!!! got {row[4]!r}")
+            if s == e:
+                raise RuntimeError(f"line {row[0]}: Task {row[1]} has no time, start and end are same!!!")
+    names = [r[1] for r in rows]
+    if "" in names:
+        raise RuntimeError(f"line {rows[names.index('')][0]}: Task doesn't have name!!!")
+    if '"' in "".join(names):
+        # names are strings of DSL in journal, they can't have quote
+        row = next(r for r in rows if '"' in r[1])
+        raise RuntimeError(f"line {row[0]}: Task name can't have quote!!! got {row[1]}")
+
+    tasks = list(map(Task, names, starts, ends, masks))
+    for i, row in enumerate(rows):
+        if row[5]:
+            tasks[i] = Task(names[i], starts[i], ends[i], masks[i], recurrence=get_recurrence(row, masks[i]))
+    return tasks
+
+
+def get_recurrence(row: tuple, mask: int) -> Recurrence:
+    """return recurrence of a dated row (from, until, interval and except columns)"""
+    line = row[0]
+    start = get_date(row[5])
+    until = get_date(row[6]) if row[6] else None
+    exceptions = [get_date(d) for d in row[8].split()]
+    if start == -1 or until == -1 or -1 in exceptions:
+        raise RuntimeError(f"line {line}: Date is invalid!!!")
+    if until is not None and until < start:
+        raise RuntimeError(f"line {line}: Dates are invalid!!! {row[6]} is before {row[5]}")
+    if row[7] not in ("", "1", "2"):
+        raise RuntimeError(f"line {line}: Interval should be 1 or 2 (every other week)!!! got {row[7]}")
+    recurrence = Recurrence(start, until, int(row[7] or 1), frozenset(exceptions))
+    if next(occurrences(recurrence, mask), None) is None:
+        raise RuntimeError(f"line {line}: Task {row[1]} has no date, none of its days are between its dates!!!")
+    return recurrence
@@ -2,9 +2,19 @@ from parser import *
 from datetime import date
 import argparse
 from models import Task
-from plot import Plot
 from helpers import *
-from copy import deepcopy
+from reserved import DayReserved, DatedIndex, free_times
+from occupancy import Occupancy
+from dataclasses import replace
+from collections import ChainMap, deque
+from itertools import islice
+from check import find_conflicts
+from snapshot import save_snapshot, load_snapshot
+from placement import DayFree, place_tasks
+from locks import RWLock
+from contextlib import nullcontext
+from heapq import merge
+from recurrence import Recurrence, occurrences, find_conflict, day_index, format_day, format_date
 
 # Constant
 WEEK_DAY = [
@@ -16,25 +26,74 @@ WEEK_DAY = [
     "Saturday",
     "Sunday",
 ]
+# Number of changes which can be undone
+HISTORY_SIZE = 100000
+# Statements which only read state, they can run together in many threads
+READ_STATEMENTS = (Print, Find, Save, Export)
 
 
 class Interpreter:
-    def __init__(self):
+    def __init__(self, out=None, stats=None):
         # Key: task name, Value: task model
         self.tasks = {}
 
+        # Stream which print and find write to, None mean sys.stdout
+        self.out = out
+
+        # Profile of phases, statements and hot-path counters (see stats.Stats), None mean no profiling.
+        # Every hot path only test it against None, so it cost nothing when it's disabled.
+        self.stats = stats
+
+        # Statements (execute, run and run_stream) which read state hold read lock and others hold write lock,
+        # so many threads can read together and never see half-changed state. Other methods don't lock,
+        # threads which call them directly should hold lock themselves (like: with interpreter.lock.read).
+        self.lock = RWLock()
+
+        # Journal which changes are recorded to it (see open_journal), None mean no journal
+        self.journal = None
+
         # This store all tasks times to specific format, for handle conflicts.
-        self.reserved = {
-            "saturday": [],
-            "sunday": [],
-            "monday": [],
-            "tuesday": [],
-            "wednesday": [],
-            "thursday": [],
-            "friday": [],
-        }
+        # Index: day index in WEEK_DAYS, Value: sorted reserved times of that day
+        self.reserved = [DayReserved() for _ in WEEK_DAYS]
+
+        # Minute grid of week, each minute hold id of task which reserved it, for fast conflict check and lookups.
+        self.occupancy = Occupancy()
+        # Key: task name, Value: task id in occupancy grid. (id 0 mean free, so names[0] is None)
+        self.task_ids = {}
+        self.task_names = [None]
+
+        # Dated tasks (which have recurrence), they are not in reserved index and occupancy grid.
+        # They are bucketed by their time of week, so conflicts are only checked with dated tasks at same time
+        self.dated = DatedIndex()
+
+        # Dependency graph of "after" relationships, Key: task name, Value: names of tasks which are after it
+        self.dependents = {}
+
+        # Changes for undo and redo, each one is ("change", [(old task, new task), ...]) or ("rename", old name, new name).
+        # Tasks are never changed in place, so changes only keep references to tasks (no copy).
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.undone = []
 
     def execute(self, statement):
+        if isinstance(statement, Draw):
+            # draw only hold lock while it get tasks, not while schedule is drawn or shown
+            with self.stats.time("Draw") if self.stats is not None else nullcontext():
+                self.draw(statement.path)
+        elif isinstance(statement, READ_STATEMENTS):
+            with self.lock.read:
+                self.execute_statement(statement)
+        else:
+            with self.lock.write:
+                self.execute_statement(statement)
+
+    def execute_statement(self, statement):
+        if self.stats is None:
+            self.run_statement(statement)
+        else:
+            with self.stats.time(type(statement).__name__):
+                self.run_statement(statement)
+
+    def run_statement(self, statement):
         if isinstance(statement, TaskSt):
             if statement.update:
                 self.update_task(statement)
@@ -44,47 +103,313 @@ class Interpreter:
             self.rename_task(statement)
         elif isinstance(statement, Print):
             self.print(statement)
+        elif isinstance(statement, Find):
+            self.find(statement)
         elif isinstance(statement, Draw):
-            self.draw()
+            self.draw(statement.path)
+        elif isinstance(statement, Check):
+            # program is checked before running (see run), nothing to do here
+            pass
+        elif isinstance(statement, Save):
+            self.save(statement.path)
+        elif isinstance(statement, Export):
+            self.export(statement.path)
+        elif isinstance(statement, Import):
+            self.import_tasks(statement.path)
+        elif isinstance(statement, Load):
+            self.load(statement.path)
+        elif isinstance(statement, Undo):
+            self.undo()
+            self.record([statement])
+        elif isinstance(statement, Redo):
+            self.redo()
+            self.record([statement])
         else:
             raise RuntimeError("Invalid statement!")
 
+    def run(self, program: Program):
+        """execute all statements of program.
+        * If program have check statement, first whole program is checked and if it has any conflict, nothing is executed."""
+        if any(isinstance(st, Check) for st in program.statements):
+            with self.lock.read, self.stats.time("check") if self.stats is not None else nullcontext():
+                report = self.check(program.statements)
+            if report:
+                raise RuntimeError("\n".join(report))
+        self.run_stream(program.statements)
+
+    def run_stream(self, statements, batch_size: int = None):
+        """execute statements one by one as they come (statements can be a generator like Parser.parse_statements).
+        * Consecutive task statements are added together with bulk path (add_tasks),
+        batch_size limit number of tasks in a batch, so memory is bounded for huge scripts. (None mean no limit)"""
+        batch = []
+        for st in statements:
+            if isinstance(st, TaskSt) and not st.update:
+                batch.append(st)
+                if batch_size is not None and len(batch) >= batch_size:
+                    self.add_batch(batch)
+                    batch = []
+                continue
+            if batch:
+                self.add_batch(batch)
+                batch = []
+            self.execute(st)
+        if batch:
+            self.add_batch(batch)
+
+    def add_batch(self, task_stmts: list[TaskSt]):
+        """add tasks of run_stream with bulk path, in profile each task of batch is one TaskSt statement"""
+        with self.lock.write:
+            if self.stats is None:
+                self.add_tasks(task_stmts)
+            else:
+                with self.stats.time("TaskSt", len(task_stmts)):
+                    self.add_tasks(task_stmts)
+
     def add_task(self, task_stmt: TaskSt):
-        # TODO check conflict of task
+        """add one task, its conflicts are checked with apply_changes"""
+        if task_stmt.time.flexible:
+            # flexible task is placed with bulk path
+            self.add_tasks([task_stmt])
+            return
         task = self.parse_task(task_stmt)
-        if self.validate_task(task):
-            self.tasks[task.name] = task
-            self.fill_reserved(task)
+        if self.tasks.get(task.name) is not None:
+            raise RuntimeError(f"Task {task.name} is already exists!!!")
+        self.apply_changes([(None, task)])
+        self.record([task_stmt])
+
+    def add_tasks(self, task_stmts):
+        """Add many tasks in one transaction, all of them are added or (if any of them is invalid) none of them.
+        * New tasks are checked against each other with one sweep (check.find_conflicts),
+        and against reserved tasks with occupancy grid, then all of them are filled.
+        * Flexible tasks are placed together after other tasks of batch (see place_flexible),
+        tasks which are after them are made after they are placed."""
+        task_stmts = list(task_stmts)
+        # tasks of batch can be after each other, so "after" task is searched in batch too
+        pending = {}
+        tasks = ChainMap(pending, self.tasks)
+        # Key: task name, Value: statement of flexible tasks and tasks which wait for them
+        flexible = {}
+        waiting = {}
+        for st in task_stmts:
+            if tasks.get(st.name) is not None or st.name in flexible or st.name in waiting:
+                raise RuntimeError(f"Task {st.name} is already exists!!!")
+            if st.time.flexible:
+                flexible[st.name] = st
+            elif st.time.after in flexible or st.time.after in waiting:
+                waiting[st.name] = st
+            else:
+                task = self.parse_task(st, tasks)
+                pending[task.name] = task
+
+        if flexible:
+            for task in self.place_flexible(list(flexible.values()), pending.values()):
+                pending[task.name] = task
+            for st in waiting.values():
+                pending[st.name] = self.parse_task(st, tasks)
+
+        self.apply_changes([(None, task) for task in pending.values()])
+        # flexible tasks are recorded where they are placed, so replaying journal put them in same time
+        self.record(
+            [get_placed_statement(st, pending[st.name]) if st.time.flexible else st for st in task_stmts]
+        )
+
+    def place_flexible(self, task_stmts: list[TaskSt], tasks) -> list[Task]:
+        """place flexible tasks in free times of their days, return placed tasks (see placement.place_tasks).
+        * tasks are new tasks which are not reserved yet, their times are not free for flexible tasks.
+        * Raise error if there is no free time for any of them."""
+        days = [DayFree(day) for day in self.reserved]
+        for task in tasks:
+            for d, s, e in self.get_reserved_parts(task):
+                days[d].take(s, e)
+        requests = []
+        for st in task_stmts:
+            self.validate_time(st.time.duration)
+            duration = convert_time_to_minute(st.time.duration)
+            if duration == 0:
+                raise RuntimeError(f"Task {st.name} has no time, duration is zero!!!")
+            start = end = None
+            if st.time.earliest is not None:
+                self.validate_time(st.time.earliest)
+                self.validate_time(st.time.latest)
+                start = convert_time_to_minute(st.time.earliest)
+                end = convert_time_to_minute(st.time.latest)
+            requests.append((duration, days_to_mask(st.days), start, end))
+
+        placed = []
+        for st, request, where in zip(task_stmts, requests, place_tasks(days, requests)):
+            if where is None:
+                raise RuntimeError(f"There is no free time for task {st.name}!!!")
+            day, start = where
+            placed.append(Task(st.name, start, (start + request[0]) % 1440, 1 << day))
+        return placed
+
+    def apply_changes(self, changes: list[tuple[Task, Task]]):
+        """Replace old tasks with new ones in one transaction, changes is list of (old task, new task), old task is None for new tasks.
+        * New tasks are checked against each other with one sweep (check.find_conflicts), and against reserved tasks
+        (without old tasks) with occupancy grid. If any of them is invalid, nothing is changed and error raise."""
+        olds = [old for old, _ in changes if old is not None]
+        news = [new for _, new in changes]
+        for old in olds:
+            self.clear_reserved(old)
+        try:
+            conflicts = find_conflicts(news)
+            if conflicts:
+                i, j, s, _ = conflicts[0]
+                # report reserved part of older task (like validate_task), not only overlapped time
+                day, minute = divmod(s, 1440)
+                start, end = next((ps, pe) for d, ps, pe in self.get_reserved_parts(news[i]) if d == day and ps <= minute < pe)
+                raise_conflict(news[j], WEEK_DAYS[day], [start, end, news[i].name])
+            # dated tasks are not in sweep, each one is checked with new tasks at same time of week
+            if any(task.recurrence is not None for task in news):
+                batch = DatedIndex()
+                for task in news:
+                    batch.add(task)
+                position = {task.name: j for j, task in enumerate(news)}
+                for i, task in enumerate(news):
+                    if task.recurrence is None:
+                        continue
+                    for other in batch.candidates(task):
+                        j = position[other.name]
+                        # pair of dated tasks is checked once
+                        if j == i or (other.recurrence is not None and j < i):
+                            continue
+                        found = find_conflict(task, other)
+                        if found is not None:
+                            raise_conflict(task, *get_conflict_info(found, other.name))
+            for task in news:
+                self.validate_task(task, True)
+        except Exception:
+            for old in olds:
+                self.fill_reserved(old)
+            raise
+
+        # nothing can fail from here, commit changes
+        for old, new in changes:
+            if old is not None:
+                self.unlink_task(old)
+            self.tasks[new.name] = new
+            self.link_task(new)
+            self.fill_reserved(new)
+        self.remember(("change", changes))
 
     def update_task(self, task_stmt: TaskSt):
         """for update there is 4 possible way:
         * Update time only (start and end)
         * Update time only (duration and after specific event)
         * Update day only
-        * Update time and day together"""
-        # Check task is exists?
-        task = self.tasks.get(task_stmt.name)
-        old_task = deepcopy(task)
+        * Update time and day together
+        Tasks which are after updated task (directly or not) move with it, if any of them have conflict nothing is updated."""
+        old_task, task = self.get_updated_task(task_stmt)
+        self.apply_changes([(old_task, task)] + self.get_dependent_changes(task))
+        self.record([task_stmt])
 
-        if task is None:
+    def get_updated_task(self, task_stmt: TaskSt, tasks: dict = None):
+        """return (old task, updated task) of an update statement, without changing anything.
+        * tasks is the tasks which statement run on them, default is self.tasks"""
+        if tasks is None:
+            tasks = self.tasks
+        # Check task is exists?
+        old_task = tasks.get(task_stmt.name)
+        if old_task is None:
             raise SystemError(f"Task {task_stmt.name} is not defined!!!")
 
-        updated_task = None
+        task = old_task
         if task_stmt.time is not None:
             # use parse_task to get start and end time from different structure of statement(from _ to _ , at _ duration _ , duration _ after event_name)
-            updated_task = self.parse_task(task_stmt)
-            task.start = updated_task.start
-            task.end = updated_task.end
+            updated_task = self.parse_task(task_stmt, tasks)
             if task_stmt.time.after is not None:
-                task.days = updated_task.days
+                if old_task.recurrence is not None:
+                    raise RuntimeError(f"Task {old_task.name} can't be after {task_stmt.time.after}, because it's a dated task!!!")
+                # task can't be after itself or after tasks which are after it
+                parent = task_stmt.time.after
+                while parent is not None:
+                    if parent == old_task.name:
+                        raise RuntimeError(
+                            f"Task {old_task.name} can't be after {task_stmt.time.after}, because {task_stmt.time.after} is after {old_task.name}!!!"
+                        )
+                    parent = tasks[parent].after
+                task = replace(updated_task, name=old_task.name)
+            else:
+                # task with new time don't follow any task
+                task = replace(
+                    old_task,
+                    start_minute=updated_task.start_minute,
+                    end_minute=updated_task.end_minute,
+                    after=None,
+                    duration=None,
+                    follow_days=False,
+                )
 
         if task_stmt.days is not None and len(task_stmt.days) > 0:
-            task.days = task_stmt.days
+            task = replace(
+                task, day_mask=days_to_mask(task_stmt.days), day_names=tuple(task_stmt.days), follow_days=False
+            )
+        if task_stmt.every is not None:
+            if old_task.after is not None:
+                raise RuntimeError(f"Task {old_task.name} can't be a dated task, because it's after {old_task.after}!!!")
+            # it's rare, so tasks are scanned instead of passing dependency graph of caller
+            if any(t.after == old_task.name for t in tasks.values()):
+                raise RuntimeError(f"Task {old_task.name} can't be a dated task, because some tasks are after it!!!")
+            task = replace(task, recurrence=self.parse_recurrence(task_stmt.every))
 
-        # update reserved, if task wasn't valid, it will raise error
-        self.clear_reserved(old_task)
-        if self.validate_task(task, True):
-            self.fill_reserved(task)
+        # tasks are not changed in place, old task is replaced by updated one
+        return old_task, task
+
+    def get_dependent_changes(self, task: Task, tasks: dict = None, dependents: dict = None):
+        """return (old, new) of tasks which are after given (updated) task directly or not, in topological order.
+        * Only tasks which time or days changed are returned, tasks after an unchanged task are not visited."""
+        if tasks is None:
+            tasks = self.tasks
+        if dependents is None:
+            dependents = self.dependents
+        changes = []
+        queue = deque([task])
+        while queue:
+            parent = queue.popleft()
+            for name in dependents.get(parent.name, ()):
+                old = tasks[name]
+                new = follow_task(old, parent)
+                if (new.start_minute, new.end_minute, new.day_mask) != (
+                    old.start_minute,
+                    old.end_minute,
+                    old.day_mask,
+                ):
+                    changes.append((old, new))
+                    queue.append(new)
+        return changes
+
+    def link_task(self, task: Task, dependents: dict = None):
+        """add task to dependency graph"""
+        if task.after is not None:
+            if dependents is None:
+                dependents = self.dependents
+            dependents.setdefault(task.after, []).append(task.name)
+
+    def unlink_task(self, task: Task, dependents: dict = None):
+        """remove task from dependency graph"""
+        if task.after is not None:
+            if dependents is None:
+                dependents = self.dependents
+            siblings = dependents[task.after]
+            siblings.remove(task.name)
+            if not siblings:
+                del dependents[task.after]
+
+    def rename_links(self, old: str, new: str, tasks: dict = None, dependents: dict = None):
+        """rename a task in dependency graph, tasks which are after it are replaced with ones that are after new name"""
+        if tasks is None:
+            tasks = self.tasks
+        if dependents is None:
+            dependents = self.dependents
+        children = dependents.pop(old, None)
+        if children:
+            for child in children:
+                tasks[child] = replace(tasks[child], after=new)
+            dependents[new] = children
+        after = tasks[old].after
+        if after is not None:
+            siblings = dependents[after]
+            siblings[siblings.index(old)] = new
 
     def rename_task(self, rename_stmt: RenameTask):
         # Check Task exists?
@@ -95,23 +420,160 @@ class Interpreter:
         if self.tasks.get(rename_stmt.new) is not None:
             raise SystemError(f"Task {rename_stmt.new} is not UNIQUE!!!")
 
-        task.name = rename_stmt.new
-        self.tasks.pop(rename_stmt.old)
-        self.tasks[task.name] = task
+        self.rename(rename_stmt.old, rename_stmt.new)
+        self.remember(("rename", rename_stmt.old, rename_stmt.new))
+        self.record([rename_stmt])
+
+    def rename(self, old: str, new: str):
+        """rename task in tasks, reserved index, occupancy ids and dependency graph, without any check"""
+        task = self.tasks[old]
+        for d, s, e in self.get_reserved_parts(task):
+            self.reserved[d].rename(s, old, new)
+            if self.stats is not None:
+                self.stats.count("reserved_entries")
+        self.rename_links(old, new)
+        task_id = self.task_ids.pop(old, None)
+        if task_id is not None:
+            self.task_ids[new] = task_id
+            self.task_names[task_id] = new
+        self.tasks.pop(old)
+        self.tasks[new] = replace(task, name=new)
+        if task.recurrence is not None:
+            self.dated.remove(old)
+            self.dated.add(self.tasks[new])
+
+    def remember(self, change: tuple):
+        """add change to history for undo, changes which are undone can't be redone after a new change"""
+        self.history.append(change)
+        self.undone.clear()
+
+    def undo(self):
+        """revert last change"""
+        if not self.history:
+            raise RuntimeError("There is nothing to undo!!!")
+        change = self.history.pop()
+        if change[0] == "rename":
+            self.rename(change[2], change[1])
+        else:
+            changes = change[1]
+            self.swap_tasks([new for _, new in changes], [old for old, _ in changes if old is not None])
+        self.undone.append(change)
+
+    def redo(self):
+        """apply again last change which is reverted by undo"""
+        if not self.undone:
+            raise RuntimeError("There is nothing to redo!!!")
+        change = self.undone.pop()
+        if change[0] == "rename":
+            self.rename(change[1], change[2])
+        else:
+            changes = change[1]
+            self.swap_tasks([old for old, _ in changes if old is not None], [new for _, new in changes])
+        self.history.append(change)
+
+    def swap_tasks(self, removed: list[Task], added: list[Task]):
+        """replace removed tasks with added ones, without any check (for undo and redo, which go back to a valid state)"""
+        for task in removed:
+            self.clear_reserved(task)
+            self.unlink_task(task)
+            del self.tasks[task.name]
+        for task in added:
+            self.tasks[task.name] = task
+            self.link_task(task)
+            self.fill_reserved(task)
 
     def print(self, print_stmt: Print):
-        if print_stmt.today:
-            today = get_today()
-            for task in self.tasks.values():
-                if today.lower() in task.days:
-                    print(task)
+        if print_stmt.date is not None:
+            start = self.parse_date(print_stmt.date)
+            end = start if print_stmt.until is None else self.parse_date(print_stmt.until)
+            for when, task in self.get_occurrences(start, end):
+                print(f"{format_day(when)}\t{task.name} from {task.start} to {task.end}", file=self.out)
+        elif print_stmt.today or print_stmt.day is not None:
+            day = get_today() if print_stmt.today else print_stmt.day
+            if print_stmt.start is None:
+                tasks = self.get_day_tasks(WEEK_DAYS.index(day.lower()))
+            else:
+                self.validate_time(print_stmt.start)
+                self.validate_time(print_stmt.end)
+                tasks = self.get_tasks_between(
+                    WEEK_DAYS.index(day.lower()),
+                    convert_time_to_minute(print_stmt.start),
+                    convert_time_to_minute(print_stmt.end),
+                )
+            for task in tasks:
+                print(task, file=self.out)
         else:
             task = self.tasks.get(print_stmt.target_name)
             if task is None:
                 raise SystemError(f"Task {print_stmt.target_name} is not defined!!!")
-            print(task)
+            print(task, file=self.out)
+
+    def get_occurrences(self, start: int, end: int):
+        """yield (date, task) of each occurrence of weekly and dated tasks from start until end (ordinals of dates, inclusive), sorted by date and time.
+        * Weekly tasks are read from reserved index of each day, and each dated task is a generator of its occurrences,
+        they are merged lazily, so a long window is never materialized."""
+        weekly = (
+            (when, task.start_minute, task.name, task)
+            for when in range(start, end + 1)
+            for task in self.get_day_tasks(day_index(when))
+        )
+        dated = [get_task_occurrences(task, start, end) for task in self.dated.values()]
+        for when, _, _, task in merge(weekly, *dated):
+            yield when, task
+
+    def get_day_tasks(self, day: int) -> list[Task]:
+        """return tasks which start on day (index of WEEK_DAYS), sorted by start time.
+        * reserved index of day is already sorted, entries of midnight-spanning tasks of yesterday (start at 00:00) are skipped."""
+        if self.stats is not None:
+            self.stats.count("reserved_entries", len(self.reserved[day]))
+        tasks = []
+        for s, _, name in self.reserved[day]:
+            task = self.tasks[name]
+            if s == task.start_minute and task.day_mask >> day & 1:
+                tasks.append(task)
+        return tasks
+
+    def get_tasks_between(self, day: int, start: int, end: int) -> list[Task]:
+        """return tasks which reserved any time from start to end of day (index of WEEK_DAYS), sorted by time.
+        * If end is before start, range continue to tomorrow."""
+        if end > start:
+            entries = self.reserved[day].between(start, end)
+        else:
+            entries = self.reserved[day].between(start, 1440) + self.reserved[(day + 1) % 7].between(0, end)
+        if self.stats is not None:
+            self.stats.count("reserved_entries", len(entries))
+        # midnight-spanning task can have two entries in range
+        names = dict.fromkeys(name for _, _, name in entries)
+        return [self.tasks[name] for name in names]
+
+    def find(self, find_stmt: Find):
+        """print earliest free time (or all free times) of each day of statement which is at least duration long"""
+        self.validate_time(find_stmt.duration)
+        duration = convert_time_to_minute(find_stmt.duration)
+        start = end = None
+        if find_stmt.start is not None:
+            self.validate_time(find_stmt.start)
+            self.validate_time(find_stmt.end)
+            start = convert_time_to_minute(find_stmt.start)
+            end = convert_time_to_minute(find_stmt.end)
+        found = False
+        for day in DAY_INDEXES[days_to_mask(find_stmt.days)]:
+            times = self.free_times(day, duration, start, end)
+            if not find_stmt.all:
+                times = islice(times, 1)
+            for s, e in times:
+                found = True
+                # free time of a window which cross midnight can start on tomorrow
+                start_day = WEEK_DAYS[(day + 1) % 7] if s >= 1440 else WEEK_DAYS[day]
+                print(f"{start_day} from {format_minute(s % 1440)} to {format_minute(e % 1440)}", file=self.out)
+        if not found:
+            print("No free time found.", file=self.out)
 
-    def parse_task(self, stmt: TaskSt) -> Task:
+    def free_times(self, day: int, duration: int, start: int = None, end: int = None):
+        """yield free times of day (index of WEEK_DAYS) which are at least duration minutes long, see reserved.free_times"""
+        return free_times(self.reserved, day, duration, start, end)
+
+    def parse_task(self, stmt: TaskSt, tasks: dict = None) -> Task:
         """This convert a task statement to main task model.
         There is 3 way to set time for a task:
         * From .. : .. to .. : ..
@@ -119,50 +581,85 @@ class Interpreter:
         * Duration .. : .. after task_name
 
         Error: If time of Task is None (may happen in updating tasks), Runtime error will raise.
+        * tasks is the tasks which "after" task is searched in them, default is self.tasks
         """
+        if tasks is None:
+            tasks = self.tasks
         name = stmt.name
-        start = stmt.time.start
-        end = stmt.time.end
-        days = stmt.days
+        days = days_to_mask(stmt.days) if stmt.days is not None else 0
+        day_names = tuple(stmt.days) if stmt.days is not None else None
         # if start time is not defined, mean this task defined by after keyword (mean structure is :>> task task_name duration _ after _)
-        if start is None:
-            next_of = self.tasks.get(stmt.time.after)
+        if stmt.time.start is None:
+            next_of = tasks.get(stmt.time.after)
             if next_of is None:
                 raise RuntimeError(f"Task {stmt.time.after} is not defined!!!")
-            start = next_of.end
-            if days is None:
+            if next_of.recurrence is not None:
+                raise RuntimeError(f"Task {name} can't be after {next_of.name}, because it's a dated task!!!")
+            start = next_of.end_minute
+            if stmt.days is None:
                 # if using "... AFTER event_name" structure for task time, task don't have days (Except when use batch_task for day), should set days based task was before current task.
                 # NOTE: this work when time of task on different days are same, if code updated for different time on different days, this section should be updated.
-                if end_is_on_tomorrow(next_of.start, next_of.end):
-                    days = []
-                    for d in next_of.days:
-                        # get next day of week
-                        days.append(
-                            WEEK_DAY[
-                                (WEEK_DAY.index(d.capitalize()) + 1) % len(WEEK_DAY)
-                            ]
-                        )
+                if next_of.overnight:
+                    days = next_days_mask(next_of.day_mask)
+                    day_names = next_day_names(next_of.days)
                 else:
-                    days = next_of.days
+                    days = next_of.day_mask
+                    day_names = tuple(next_of.days)
+        else:
+            self.validate_time(stmt.time.start)
+            start = convert_time_to_minute(stmt.time.start)
 
         # if end time is not defined, mean this task defined by duration
-        if end is None:
-            end = self.get_end_time(start, stmt.time.duration)
+        if stmt.time.end is None:
+            end = self.get_end_minute(start, stmt.time.duration)
+        else:
+            self.validate_time(stmt.time.end)
+            end = convert_time_to_minute(stmt.time.end)
+        if end == start:
+            # task without any time can't be reserved (it also break sorted order of reserved times)
+            raise RuntimeError(f"Task {name} has no time, start and end are same!!!")
+
+        if stmt.time.after is not None:
+            # remember dependency, so task can move with the task which is after it
+            return Task(
+                name,
+                start,
+                end,
+                days,
+                stmt.time.after,
+                convert_time_to_minute(stmt.time.duration),
+                stmt.days is None,
+                day_names=day_names,
+            )
+        if stmt.every is not None:
+            recurrence = self.parse_recurrence(stmt.every)
+            if next(occurrences(recurrence, days), None) is None:
+                raise RuntimeError(f"Task {name} has no date, none of its days are between its dates!!!")
+            return Task(name, start, end, days, recurrence=recurrence, day_names=day_names)
+        return Task(name, start, end, days, day_names=day_names)
+
+    def parse_recurrence(self, every: Every) -> Recurrence:
+        """convert dates of a dated task statement to recurrence of task model"""
+        start = self.parse_date(every.start)
+        until = None
+        if every.until is not None:
+            until = self.parse_date(every.until)
+            if until < start:
+                raise RuntimeError(f"Dates are invalid!!! {every.until} is before {every.start}")
+        exceptions = frozenset(self.parse_date(d) for d in every.exceptions or ())
+        return Recurrence(start, until, every.interval, exceptions)
 
-        return Task(name, start, end, days)
+    def parse_date(self, text: str) -> int:
+        """convert YYYY-MM-DD to ordinal of date"""
+        try:
+            return date.fromisoformat(text).toordinal()
+        except ValueError:
+            raise RuntimeError(f"Date is invalid!!! got {text}")
 
-    def get_end_time(self, start_time: str, duration: str) -> str:
-        """* This function also do validating time format.(start, end, duration)"""
-        self.validate_time(start_time)
+    def get_end_minute(self, start: int, duration: str) -> int:
+        """* This function also do validating duration format."""
         self.validate_time(duration)
-        h1, m1 = split_time(start_time)
-        h2, m2 = split_time(duration)
-        m3 = m1 + m2
-        mr = m3 % 60  # result minute
-        hr = (h1 + h2 + int(m3 / 60)) % 24  # result hour
-        end = f"{hr:02d}:{mr:02d}"
-        self.validate_time(end)
-        return end
+        return (start + convert_time_to_minute(duration)) % 1440
 
     def validate_task(self, task: Task, updating: bool = False):
         """This function check a task is valid or not.
@@ -173,9 +670,7 @@ class Interpreter:
         # check conflict
         conflict, day, info = self.check_conflict(task)
         if conflict:
-            raise RuntimeError(
-                f"'{task.name}' have conflict with {info[2]} in {day} from {convert_minute_to_time(info[0])} to {convert_minute_to_time(info[1])}!!!"
-            )
+            raise_conflict(task, day, info)
         return True
 
     def validate_time(self, time: str):
@@ -184,82 +679,401 @@ class Interpreter:
             raise RuntimeError(f"Time is invalid!!! got {time}")
 
     def get_task_in_days(self, days: list[str]) -> list[Task]:
-        tasks = []
-        for t in self.tasks.values():
-            for d in days:
-                if d in t.days:
-                    tasks.append(t)
-                    break
-        return tasks
+        mask = days_to_mask(days)
+        return [t for t in self.tasks.values() if t.day_mask & mask]
+
+    def get_reserved_parts(self, task: Task):
+        """yield (day index, start, end) of each part of task that should be reserved.
+        * Midnight-spanning task split to two parts, first one until end of day, second one from start of tomorrow (if it end after 00:00).
+        * Dated tasks are not reserved in weekly index, they have no part."""
+        if task.recurrence is not None:
+            return
+        s = task.start_minute
+        e = task.end_minute
+        if task.overnight:
+            for d in DAY_INDEXES[task.day_mask]:
+                yield d, s, 1440  # 1440 = 24*60
+                # task which end at 00:00 has nothing on tomorrow, an empty part would break sorted order of reserved index
+                if e:
+                    yield (d + 1) % 7, 0, e
+        else:
+            for d in DAY_INDEXES[task.day_mask]:
+                yield d, s, e
+
+    def get_task_id(self, name: str) -> int:
+        """return id of task in occupancy grid, new task get a new id."""
+        task_id = self.task_ids.get(name)
+        if task_id is None:
+            task_id = len(self.task_names)
+            self.task_ids[name] = task_id
+            self.task_names.append(name)
+        return task_id
 
     def fill_reserved(self, task: Task):
-        in_tomorrow = end_is_on_tomorrow(task.start, task.end)
-        for d in task.days:
-            s = convert_time_to_minute(task.start)
-            e = convert_time_to_minute(task.end)
-            if in_tomorrow:
-                # fill today
-                self.reserved[d.lower()].append([s, 1440, task.name])  # 1440 = 24*60
-                # fill tomorrow
-                self.reserved[
-                    WEEK_DAY[
-                        (WEEK_DAY.index(d.capitalize()) + 1) % len(WEEK_DAY)
-                    ].lower()
-                ].append([0, e, task.name])
-            else:
-                self.reserved[d.lower()].append([s, e, task.name])
+        if task.recurrence is not None:
+            self.dated.add(task)
+            return
+        task_id = self.get_task_id(task.name)
+        n = 0
+        for d, s, e in self.get_reserved_parts(task):
+            self.reserved[d].insert(s, e, task.name)
+            self.occupancy.fill(d, s, e, task_id)
+            n += 1
+        if self.stats is not None:
+            self.stats.count("reserved_entries", n)
 
     def clear_reserved(self, task: Task):
-        in_tomorrow = end_is_on_tomorrow(task.start, task.end)
-        for d in task.days:
-            # remove from day of start task
-            for r in self.reserved[d.lower()]:
-                if r[2] == task.name:
-                    self.reserved[d.lower()].remove(r)
-            if in_tomorrow:
-                tomorrow = WEEK_DAY[
-                    (WEEK_DAY.index(d.capitalize()) + 1) % len(WEEK_DAY)
-                ].lower()
-                for r in self.reserved[tomorrow]:
-                    if r[2] == task.name:
-                        self.reserved[tomorrow].remove(r)
+        if task.recurrence is not None:
+            self.dated.remove(task.name)
+            return
+        n = 0
+        for d, s, e in self.get_reserved_parts(task):
+            self.reserved[d].remove(s, task.name)
+            self.occupancy.clear(d, s, e)
+            n += 1
+        if self.stats is not None:
+            self.stats.count("reserved_entries", n)
 
     def check_conflict(self, new_task: Task):
-        in_tomorrow = end_is_on_tomorrow(new_task.start, new_task.end)
-
-        for d in new_task.days:
-            for r in self.reserved[d.lower()]:
-                s = convert_time_to_minute(new_task.start)
-                e = convert_time_to_minute(new_task.end)
-                if in_tomorrow:
-                    if s < r[1]:
-                        return (True, d, r)
-                else:
-                    if r[0] <= s < r[1] or r[0] < e <= r[1] or (r[0] > s and e > r[1]):
-                        return (True, d, r)
-
-                if in_tomorrow:
-                    for r in self.reserved[
-                        WEEK_DAY[
-                            (WEEK_DAY.index(d.capitalize()) + 1) % len(WEEK_DAY)
-                        ].lower()
-                    ]:
-                        if r[0] < e:
-                            return (
-                                True,
-                                WEEK_DAY[
-                                    (WEEK_DAY.index(d.capitalize()) + 1) % len(WEEK_DAY)
-                                ].lower(),
-                                r,
-                            )
+        """return (True, day, reserved entry) of first part of new task which overlap a reserved time, (False, None, None) if it's free.
+        * In profile each part is one conflict comparison (one test on occupancy grid)."""
+        n = 0
+        for d, s, e in self.get_reserved_parts(new_task):
+            n += 1
+            if self.occupancy.is_free(d, s, e):
+                continue
+            if self.stats is not None:
+                self.stats.count("conflict_comparisons", n)
+                self.stats.count("reserved_entries")
+            # grid only know that it's busy, get reserved time from index for report
+            return (True, WEEK_DAYS[d], self.reserved[d].overlap(s, e))
+        if self.stats is not None:
+            self.stats.count("conflict_comparisons", n)
+        if new_task.recurrence is not None or self.dated:
+            return self.check_dated_conflict(new_task)
+        return False, None, None
+
+    def check_dated_conflict(self, new_task: Task):
+        """check conflict of a dated task with weekly tasks, and of any task with dated tasks (like check_conflict, day have date too).
+        * Dated task is checked on occupancy grid only for days which it has any date on them,
+        and against dated tasks at same time of week (see reserved.DatedIndex) with their recurrences (see recurrence.find_conflict),
+        occurrences are never expanded."""
+        if new_task.recurrence is not None:
+            for day in DAY_INDEXES[new_task.day_mask]:
+                first = next(occurrences(new_task.recurrence, 1 << day), None)
+                if first is None:
+                    continue
+                for d, s, e in self.get_reserved_parts(replace(new_task, day_mask=1 << day, recurrence=None)):
+                    if self.stats is not None:
+                        self.stats.count("conflict_comparisons")
+                    if not self.occupancy.is_free(d, s, e):
+                        # second part of midnight-spanning task is on tomorrow
+                        when = first if d == day else first + 1
+                        return (True, format_day(when), self.reserved[d].overlap(s, e))
+        for task in self.dated.candidates(new_task):
+            if self.stats is not None:
+                self.stats.count("conflict_comparisons")
+            if task.name == new_task.name:
+                continue
+            found = find_conflict(new_task, task)
+            if found is not None:
+                return (True, *get_conflict_info(found, task.name))
         return False, None, None
 
-    def draw(self):
-        plot = Plot(self.tasks.values())
-        plot.draw()
+    def booked_at(self, day: str, time: str):
+        """return task which reserved given day and time (like tuesday 14:30), None if it's free."""
+        task_id = self.occupancy.owner(
+            WEEK_DAYS.index(day.lower()), convert_time_to_minute(time)
+        )
+        return self.tasks.get(self.task_names[task_id]) if task_id else None
+
+    def draw(self, path: str = None):
+        """show schedule, or save it to path (png, svg, pdf, ...) if it's given"""
+        # matplotlib is slow to import, so it's only imported when something is drawn
+        from plot import Plot
+
+        # tasks are never changed in place, so list of them is a consistent view even when state change while drawing
+        # dated tasks are not on every week, only weekly tasks are drawn
+        with self.lock.read:
+            tasks = [t for t in self.tasks.values() if t.recurrence is None]
+        plot = Plot(tasks)
+        plot.draw(path)
+
+    def save(self, path: str):
+        """save whole state (tasks and reserved times) to a snapshot file"""
+        save_snapshot(self, path)
+
+    def export(self, path: str):
+        """write all tasks to an iCalendar (.ics) or CSV (.csv) file, see export.export_tasks"""
+        # export is only imported when it's used, like plot
+        from export import export_tasks
+
+        export_tasks(self.tasks.values(), path)
+
+    def import_tasks(self, path: str, chunk_size: int = None) -> int:
+        """add tasks of a CSV (.csv) or iCalendar (.ics) file without any DSL code, return number of added tasks.
+        * File is read in chunks (see importer.read_chunks), each chunk is validated at once and added in one transaction with apply_changes,
+        so a chunk is added completely or (if any of its rows is invalid or has conflict) not at all, like batches of run_stream.
+        Chunks before an invalid chunk stay added, error has line of invalid row (or row which has conflict).
+        * Each chunk is one change, so undo revert a whole chunk (in journal too, it's one line)."""
+        # importer is only imported when it's used, like plot
+        from importer import read_chunks, build_tasks, IMPORT_CHUNK_SIZE
+
+        count = 0
+        for rows in read_chunks(path, chunk_size or IMPORT_CHUNK_SIZE):
+            tasks = build_tasks(rows)
+            names = [t.name for t in tasks]
+            if len(set(names)) != len(names) or not self.tasks.keys().isdisjoint(names):
+                seen = set()
+                for row, name in zip(rows, names):
+                    if name in seen or name in self.tasks:
+                        raise RuntimeError(f"line {row[0]}: Task {name} is already exists!!!")
+                    seen.add(name)
+            try:
+                self.apply_changes([(None, task) for task in tasks])
+            except ConflictError as e:
+                # line of row which has conflict, like errors of build_tasks
+                raise RuntimeError(f"line {rows[names.index(e.task.name)][0]}: {e}")
+            if self.journal is not None:
+                self.record([get_task_statement(task) for task in tasks])
+            count += len(tasks)
+        return count
+
+    def load(self, path: str):
+        """replace whole state with a snapshot file made by save, tasks are not validated again"""
+        load_snapshot(self, path)
+        # loaded state is not made by changes of history, so they can't be undone
+        self.history.clear()
+        self.undone.clear()
+        if self.journal is not None:
+            # loaded state is not in journal, so it become a checkpoint
+            self.journal.checkpoint(self)
+
+    def open_journal(self, journal):
+        """restore state from journal (see journal.Journal) and record next changes to it"""
+        self.journal = None
+        journal.replay(self)
+        self.journal = journal
+
+    def record(self, statements: list):
+        """record statements which changed tasks to journal, if there is a journal"""
+        if self.journal is None:
+            return
+        self.journal.append(statements)
+        if self.journal.need_checkpoint():
+            self.journal.checkpoint(self)
+            # undo and redo statements of journal are replayed from checkpoint, so they can't go before it
+            self.history.clear()
+            self.undone.clear()
+
+    def check(self, statements: list) -> list[str]:
+        """Check all statements together without running them and return report of every conflict and error (empty if there is none).
+        Each version of tasks (from create/update/rename until next change) live between two statements,
+        two versions conflict if they live together and their time overlap, so all conflicts found with one sweep.
+        * Undo and redo are followed with a copy of history, they kill versions of a change and bring back versions before it."""
+        tasks = dict(self.tasks)
+        # all versions of tasks, their (born, died) statement index and line of statement which made them
+        versions = list(tasks.values())
+        lifetimes = [(-1, len(statements))] * len(versions)
+        lines = [None] * len(versions)
+        # versions of same task (made by update and rename) have same identity, to report each conflict once
+        identities = list(range(len(versions)))
+        # Key: task name, Value: index of current version
+        current = {name: i for i, name in enumerate(tasks)}
+        # copy of dependency graph, updates move tasks which are after updated task too
+        dependents = {name: list(children) for name, children in self.dependents.items()}
+        # copy of history, changes are recorded same as apply_changes and rename_task (consecutive task statements are one change)
+        history = list(self.history)
+        undone = list(self.undone)
+        in_batch = False
+        errors = []
+
+        def kill(name, index):
+            i = current.pop(name)
+            lifetimes[i] = (lifetimes[i][0], index)
+            return identities[i]
+
+        def swap(change, forward, index):
+            """apply change (or revert it when forward is False) to tasks, return born versions as (task, identity)"""
+            if change[0] == "rename":
+                old, new = (change[1], change[2]) if forward else (change[2], change[1])
+                self.rename_links(old, new, tasks, dependents)
+                return [(replace(tasks.pop(old), name=new), kill(old, index))]
+            olds = [old for old, _ in change[1] if old is not None]
+            news = [new for _, new in change[1]]
+            removed, added = (olds, news) if forward else (news, olds)
+            killed = {}
+            for task in removed:
+                killed[task.name] = kill(task.name, index)
+                self.unlink_task(task, dependents)
+                tasks.pop(task.name)
+            for task in added:
+                self.link_task(task, dependents)
+            return [(task, killed.get(task.name)) for task in added]
+
+        for index, st in enumerate(statements):
+            if not isinstance(st, (TaskSt, RenameTask, Undo, Redo)):
+                in_batch = False
+                continue
+            adding = isinstance(st, TaskSt) and not st.update
+            try:
+                if isinstance(st, (Undo, Redo)):
+                    source, target = (history, undone) if isinstance(st, Undo) else (undone, history)
+                    if not source:
+                        action = "undo" if isinstance(st, Undo) else "redo"
+                        raise RuntimeError(f"There is nothing to {action}!!!")
+                    change = source.pop()
+                    target.append(change)
+                    born = swap(change, isinstance(st, Redo), index)
+                elif isinstance(st, RenameTask):
+                    task = tasks.get(st.old)
+                    if task is None:
+                        raise SystemError(f"Task {st.old} is not defined!!!")
+                    if tasks.get(st.new) is not None:
+                        raise SystemError(f"Task {st.new} is not UNIQUE!!!")
+                    change = ("rename", st.old, st.new)
+                    born = swap(change, True, index)
+                elif st.update:
+                    old_task, task = self.get_updated_task(st, tasks)
+                    change = ("change", [(old_task, task)] + self.get_dependent_changes(task, tasks, dependents))
+                    born = swap(change, True, index)
+                else:
+                    if tasks.get(st.name) is not None:
+                        raise RuntimeError(f"Task {st.name} is already exists!!!")
+                    if st.time.flexible:
+                        # flexible task is placed in free time when it runs, so it can't conflict, it's kept without any day
+                        task = Task(st.name, 0, 0, 0)
+                    else:
+                        task = self.parse_task(st, tasks)
+                    self.link_task(task, dependents)
+                    born = [(task, None)]
+                    if in_batch:
+                        history[-1][1].append((None, task))
+                    else:
+                        change = ("change", [(None, task)])
+            except (RuntimeError, SystemError) as e:
+                errors.append(f"line {st.line}: {e}")
+                in_batch = False
+                continue
+            if not isinstance(st, (Undo, Redo)) and not (adding and in_batch):
+                history.append(change)
+                undone.clear()
+            in_batch = adding
+            for task, identity in born:
+                tasks[task.name] = task
+                current[task.name] = len(versions)
+                # new tasks have new identity
+                identities.append(len(versions) if identity is None else identity)
+                versions.append(task)
+                lifetimes.append((index, len(statements)))
+                lines.append(st.line)
+
+        report = []
+        seen = set()
+        for i, j, s, e in find_conflicts(versions, lifetimes, identities):
+            pair = tuple(sorted((identities[i], identities[j])))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            # i is always the older version
+            where = f"line {lines[i]}" if lines[i] is not None else "defined before"
+            report.append(
+                f"line {lines[j]}: '{versions[j].name}' have conflict with '{versions[i].name}' ({where}) in {WEEK_DAYS[s // 1440]} from {format_minute(s % 1440)} to {format_minute(e % 1440)}"
+            )
+        # dated versions are not in sweep, each one is checked with other versions which live with it
+        dated = [i for i, task in enumerate(versions) if task.recurrence is not None]
+        for i in dated:
+            for j, other in enumerate(versions):
+                if identities[i] == identities[j] or (other.recurrence is not None and j < i):
+                    continue
+                if lifetimes[i][0] >= lifetimes[j][1] or lifetimes[j][0] >= lifetimes[i][1]:
+                    continue
+                pair = tuple(sorted((identities[i], identities[j])))
+                if pair in seen:
+                    continue
+                found = find_conflict(versions[i], other)
+                if found is None:
+                    continue
+                seen.add(pair)
+                old, new = (i, j) if i < j else (j, i)
+                day, info = get_conflict_info(found, "")
+                where = f"line {lines[old]}" if lines[old] is not None else "defined before"
+                report.append(
+                    f"line {lines[new]}: '{versions[new].name}' have conflict with '{versions[old].name}' ({where}) in {day} from {format_minute(info[0])} to {format_minute(info[1])}"
+                )
+        return errors + report
 
 
 # =========== Helper functions ===========
+def follow_task(task: Task, parent: Task) -> Task:
+    """return task moved to right after its parent (the task which it's after it)"""
+    start = parent.end_minute
+    day_mask = task.day_mask
+    day_names = task.day_names
+    if task.follow_days:
+        if parent.overnight:
+            day_mask, day_names = next_days_mask(parent.day_mask), next_day_names(parent.days)
+        else:
+            day_mask, day_names = parent.day_mask, tuple(parent.days)
+    return replace(
+        task,
+        start_minute=start,
+        end_minute=(start + task.duration) % 1440,
+        day_mask=day_mask,
+        day_names=day_names,
+    )
+
+
+def get_placed_statement(task_stmt: TaskSt, task: Task) -> TaskSt:
+    """return statement of flexible task with time and day which it's placed in"""
+    return TaskSt(task.name, TaskTime(task.start, task.end), task.days, line=task_stmt.line)
+
+
+def get_task_statement(task: Task) -> TaskSt:
+    """return statement which define a task with fixed time (like tasks of import), for journal"""
+    every = None
+    rule = task.recurrence
+    if rule is not None:
+        every = Every(
+            format_date(rule.start),
+            None if rule.until is None else format_date(rule.until),
+            rule.interval,
+            [format_date(o) for o in sorted(rule.exceptions)] or None,
+        )
+    return TaskSt(task.name, TaskTime(task.start, task.end), task.days, every=every)
+
+
+def get_task_occurrences(task: Task, start: int, end: int):
+    """yield (date, start minute, name, task) of each occurrence of a dated task between two dates, for merge"""
+    for when in occurrences(task.recurrence, task.day_mask, start, end):
+        yield when, task.start_minute, task.name, task
+
+
+def get_conflict_info(found: tuple, name: str) -> tuple:
+    """convert (date, start, end) of recurrence.find_conflict to day and reserved time info of raise_conflict"""
+    when, s, e = found
+    if s >= 1440:
+        # overlap start on tomorrow of date
+        when, s, e = when + 1, s - 1440, e - 1440
+    return format_day(when), [s, e % 1440, name]
+
+
+class ConflictError(RuntimeError):
+    """Error of a task which has conflict, task is the task which has conflict (so callers can find where it's defined)"""
+
+    def __init__(self, message: str, task: Task):
+        super().__init__(message)
+        self.task = task
+
+
+def raise_conflict(task: Task, day: str, info: list):
+    """raise conflict error of task with reserved time info ([start, end, name])"""
+    raise ConflictError(
+        f"'{task.name}' have conflict with {info[2]} in {day} from {convert_minute_to_time(info[0])} to {convert_minute_to_time(info[1])}!!!",
+        task,
+    )
+
+
 def get_today():
     """get today in format day of week"""
     day = date.today().weekday()
@@ -267,14 +1081,19 @@ def get_today():
 
 
 # REPL
-def repl():
-    """Read-Eval-Print Loop for the interpreter."""
+def repl(journal=None):
+    """Read-Eval-Print Loop for the interpreter.
+    * If journal is given, state is restored from it and every change is recorded to it."""
     interpreter = Interpreter()
+    if journal is not None:
+        interpreter.open_journal(journal)
     print("Welcome to Schedu REPL!")
     print("Copyright 2025 By Mohsen Lotfi")
     print("Type your commands below (type 'exit' to exit):")
     while True:
         try:
+            if journal is not None:
+                journal.idle()
             code = input(">> ")
 
             if code.strip().lower() == "exit":
@@ -284,27 +1103,164 @@ def repl():
             tokens = tokenize(code)
             parser = Parser(tokens)
             prog = parser.parse_program()
-            for p in prog.statements:
-                interpreter.execute(p)
+            interpreter.run(prog)
+        except (KeyboardInterrupt, EOFError):
+            print("Exiting...")
+            break
         except Exception as e:
             print(f"{e}")
+    if journal is not None:
+        journal.close()
 
 
 if __name__ == "__main__":
-    from lexer import tokenize
+    from lexer import tokenize, tokenize_lines
 
     parser = argparse.ArgumentParser(description="Schedu DSL Interpreter")
     parser.add_argument("file", nargs="?", help="Path to the Schedu DSL script file")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only check the script and report all conflicts, without running it",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read, parse and run the script statement by statement, for very large scripts (check statement is ignored)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always tokenize and parse the script, don't use or write cached program",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Path of journal file for REPL, state is restored from it and every change is recorded to it",
+    )
+    parser.add_argument(
+        "--sync",
+        choices=("always", "batch", "never"),
+        default="batch",
+        help="When journal is flushed to disk (default: batch)",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=10000,
+        help="Number of journaled statements between checkpoints (default: 10000)",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="ADDRESS",
+        help="Run schedule server on a unix socket (unix:/path) or TCP address (host:port), see server.py",
+    )
+    parser.add_argument(
+        "--serve-files",
+        metavar="DIR",
+        help="Directory of files of --serve sessions (draw to, save, load, export and import use DIR/session), without it they are not allowed",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="PATTERN",
+        help="Check all .schedu files of a directory (or files of a glob pattern) in parallel, result of each file is a JSON line",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes for --batch (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--import",
+        dest="import_path",
+        metavar="PATH",
+        help="Add tasks of a CSV (.csv) or iCalendar (.ics) file before running the script, without script only import it (and --export)",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="PATH",
+        help="After running the script, export all tasks to an iCalendar (.ics) or CSV (.csv) file",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Write profile of the script run to PATH: time of lex, parse, check and each statement type, and hot-path counters (cache is not used)",
+    )
+    parser.add_argument(
+        "--profile-format",
+        choices=("json", "folded"),
+        default="json",
+        help="Format of --profile, folded is folded stacks for flamegraph (default: json)",
+    )
     args = parser.parse_args()
 
-    if args.file:
-        with open(args.file, "r", encoding="utf-8") as f:
-            code = f.read()
-        tokens = tokenize(code)
-        parser = Parser(tokens)
-        prog = parser.parse_program()
+    if args.batch:
+        from batch import run_batch
+
+        if not run_batch(args.batch, args.workers):
+            raise SystemExit(1)
+    elif args.serve:
+        import asyncio
+        from server import serve
+
+        try:
+            asyncio.run(serve(args.serve, args.serve_files))
+        except KeyboardInterrupt:
+            pass
+    elif args.file:
+        stats = None
+        if args.profile:
+            from stats import Stats
+
+            stats = Stats()
+        interpreter = Interpreter(stats=stats)
+        try:
+            if args.import_path:
+                interpreter.execute(Import(args.import_path))
+            if args.stream:
+                # lex and parse are done statement by statement, so their time is in time of statements
+                with open(args.file, "r", encoding="utf-8") as f:
+                    interpreter.run_stream(
+                        Parser(tokenize_lines(f)).parse_statements(), batch_size=1000
+                    )
+            else:
+                if args.no_cache or stats is not None:
+                    with open(args.file, "r", encoding="utf-8") as f:
+                        code = f.read()
+                    if stats is None:
+                        prog = Parser(tokenize(code)).parse_program()
+                    else:
+                        with stats.time("lex"):
+                            tokens = list(tokenize(code))
+                        with stats.time("parse"):
+                            prog = Parser(tokens).parse_program()
+                else:
+                    from cache import load_program
+
+                    prog = load_program(args.file)
+                if args.check:
+                    with stats.time("check") if stats is not None else nullcontext():
+                        report = interpreter.check(prog.statements)
+                    for r in report:
+                        print(r)
+                    if report:
+                        raise SystemExit(1)
+                    print("No conflict found.")
+                else:
+                    interpreter.run(prog)
+            if args.export and not args.check:
+                interpreter.execute(Export(args.export))
+        finally:
+            if stats is not None:
+                stats.write(args.profile, args.profile_format)
+    elif args.import_path:
+        # convert a file to another format (with --export) or only validate it
         interpreter = Interpreter()
-        for p in prog.statements:
-            interpreter.execute(p)
+        print(f"{interpreter.import_tasks(args.import_path)} tasks imported.")
+        if args.export:
+            interpreter.execute(Export(args.export))
+    elif args.journal:
+        from journal import Journal
+
+        repl(Journal(args.journal, sync=args.sync, checkpoint_every=args.checkpoint_every))
     else:
         repl()
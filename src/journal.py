@@ -0,0 +1,207 @@
+import glob
+import os
+import time
+from lexer import tokenize
+from parser import Parser, RenameTask, TaskTime, Undo, Redo, Every
+
+# First line of journal file, followed by generation of checkpoint which journal continue from it
+JOURNAL_HEADER = "schedu-journal"
+
+
+def format_time(time: TaskTime) -> str:
+    if time.flexible:
+        return f"duration {time.duration} flexible"
+    if time.after is not None:
+        return f'duration {time.duration} after "{time.after}"'
+    if time.duration is not None:
+        return f"at {time.start} duration {time.duration}"
+    return f"from {time.start} to {time.end}"
+
+
+def format_every(days: list[str], every: Every) -> str:
+    parts = ["every other" if every.interval == 2 else "every", " and ".join(days), "from", every.start]
+    if every.until is not None:
+        parts += ["until", every.until]
+    if every.exceptions:
+        parts += ["except", " and ".join(every.exceptions)]
+    return " ".join(parts)
+
+
+def format_statement(statement) -> str:
+    """convert a task, update, rename, undo or redo statement back to DSL code"""
+    if isinstance(statement, Undo):
+        return "undo"
+    if isinstance(statement, Redo):
+        return "redo"
+    if isinstance(statement, RenameTask):
+        return f'rename task "{statement.old}" to "{statement.new}"'
+    parts = ["update task" if statement.update else "task", f'"{statement.name}"']
+    if statement.time is not None:
+        parts.append(format_time(statement.time))
+    if statement.time is not None and statement.time.after is not None and statement.days:
+        # task after another one can't have "in", its days are only given by a day block
+        return f"{' and '.join(statement.days)} {{ {' '.join(parts)} }}"
+    if statement.every is not None:
+        parts.append(format_every(statement.days, statement.every))
+    elif statement.days:
+        parts.append("in " + " and ".join(statement.days))
+    if statement.time is not None and statement.time.earliest is not None:
+        parts.append(f"between {statement.time.earliest} and {statement.time.latest}")
+    return " ".join(parts)
+
+
+def read_lines(f, offset: int):
+    """yield (offset after line, statements of line) of each complete line of journal, stop at last line if it's not written completely.
+    * Last line of a crash can be cut anywhere, but line break is written last, so only a last line without line break
+    is not complete, it's ignored and everything before it is restored.
+    * A complete line which can't be parsed is an error, journal is never cut before it.
+    * offset is size of lines before f (header), offsets are in bytes so journal can be truncated to them.
+    * Names can have line breaks, so lines are joined until all quotes are closed (like lexer.tokenize_lines)."""
+    chunk = []
+    quotes = 0
+    first_line = 2
+    for number, line in enumerate(f, 2):
+        if not chunk:
+            first_line = number
+        chunk.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        code = "".join(chunk)
+        chunk = []
+        quotes = 0
+        if not code.endswith("\n"):
+            return
+        try:
+            statements = Parser(tokenize(code, first_line)).parse_program().statements
+        except SyntaxError as e:
+            raise RuntimeError(f"Journal line {e.lineno or first_line} can't be replayed!!! {e.msg}")
+        offset += len(code.encode("utf-8"))
+        yield offset, statements
+
+
+class Journal:
+    """Append-only journal of statements which changed tasks (task, update, rename, undo and redo), for restore state after restart.
+    * Each line is statements of one change, so replay group them (and undo revert them) same as when they ran.
+    * Every checkpoint_every statements, whole state is saved to a checkpoint (snapshot) and journal start again from it,
+    so restart only load last checkpoint and replay statements after it.
+    * Each change is written to operating system at once, so a crash of process never lose it.
+    sync is policy of flushing journal to disk (fsync), for crash of operating system:
+        "always": fsync after each statement
+        "batch": fsync after batch_size statements or when interval seconds passed from last sync,
+        and when nothing is appended for a while (see idle) (default)
+        "never": leave it to operating system"""
+
+    def __init__(
+        self,
+        path: str,
+        sync: str = "batch",
+        batch_size: int = 100,
+        interval: float = 1.0,
+        checkpoint_every: int = 10000,
+    ):
+        if sync not in ("always", "batch", "never"):
+            raise RuntimeError(f"Invalid journal sync policy {sync}!!!")
+        self.path = path
+        self.sync = sync
+        self.batch_size = batch_size
+        self.interval = interval
+        self.checkpoint_every = checkpoint_every
+        self.generation = self.read_generation()
+        self.file = open(path, "a", encoding="utf-8")
+        if self.file.tell() == 0:
+            self.file.write(f"{JOURNAL_HEADER} {self.generation}\n")
+        # statements which are written but not synced yet, and statements after last checkpoint
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.since_checkpoint = 0
+
+    def read_generation(self) -> int:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = f.readline().split()
+        except FileNotFoundError:
+            return 0
+        if len(header) != 2 or header[0] != JOURNAL_HEADER:
+            raise RuntimeError(f"{self.path} is not a schedu journal!!!")
+        return int(header[1])
+
+    def checkpoint_path(self, generation: int) -> str:
+        return f"{self.path}.{generation}.checkpoint"
+
+    def replay(self, interpreter):
+        """restore state of interpreter from last checkpoint and statements after it"""
+        if self.generation > 0:
+            interpreter.load(self.checkpoint_path(self.generation))
+        replayed = 0
+        # line breaks are read as they are, so offsets are same as file
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            end = len(f.readline().encode("utf-8"))  # header
+            for end, statements in read_lines(f, end):
+                # each line is one change, so undo and redo revert same changes as when they ran
+                interpreter.run_stream(statements)
+                replayed += len(statements)
+            size = f.seek(0, os.SEEK_END)
+        if end < size:
+            # incomplete tail is removed, otherwise next statements are appended to it and they are lost too
+            self.file.truncate(end)
+        # replayed statements are not in checkpoint yet
+        self.since_checkpoint = replayed
+
+    def append(self, statements):
+        """write statements of one change (like a batch of task statements which are added together) as one line"""
+        self.file.write(" ".join(map(format_statement, statements)) + "\n")
+        self.file.flush()
+        self.unsynced += len(statements)
+        self.since_checkpoint += len(statements)
+        if self.sync == "always" or (
+            self.sync == "batch"
+            and (
+                self.unsynced >= self.batch_size
+                or time.monotonic() - self.last_sync >= self.interval
+            )
+        ):
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        if self.sync != "never":
+            os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def idle(self):
+        """sync statements which are not synced yet, it's called before waiting for next change (like REPL before input),
+        so last changes before an idle time don't wait for next append to be synced"""
+        if self.unsynced:
+            self.flush()
+
+    def need_checkpoint(self) -> bool:
+        return self.since_checkpoint >= self.checkpoint_every
+
+    def checkpoint(self, interpreter):
+        """save state of interpreter as a new checkpoint and start an empty journal after it.
+        * New checkpoint is written before journal is replaced, and old checkpoint is removed after it,
+        so a crash in any step still leave a journal with its checkpoint."""
+        generation = self.generation + 1
+        interpreter.save(self.checkpoint_path(generation))
+        with open(self.checkpoint_path(generation), "rb") as f:
+            os.fsync(f.fileno())
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(f"{JOURNAL_HEADER} {generation}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.file.close()
+        os.replace(temp_path, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+        for old in glob.glob(glob.escape(self.path) + ".*.checkpoint"):
+            if old != self.checkpoint_path(generation):
+                os.remove(old)
+        self.generation = generation
+        self.unsynced = 0
+        self.since_checkpoint = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
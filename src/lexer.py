@@ -1,93 +1,142 @@
 import re
+from bisect import bisect_right
+from typing import NamedTuple
+
+# Keywords of language (lower case) and their token name, words are matched in bulk and classified with this table.
+KEYWORDS = {
+    "draw": "DRAW",
+    "check": "CHECK",
+    "save": "SAVE",
+    "load": "LOAD",
+    "export": "EXPORT",
+    "import": "IMPORT",
+    "undo": "UNDO",
+    "redo": "REDO",
+    "update": "UPDATE",
+    "rename": "RENAME",
+    "print": "PRINT",
+    "find": "FIND",
+    "all": "ALL",
+    "free": "FREE",
+    "between": "BETWEEN",
+    "task": "TASK",
+    "from": "FROM",
+    "to": "TO",
+    "at": "AT",
+    "duration": "DURATION",
+    "after": "AFTER",
+    "flexible": "FLEXIBLE",
+    "every": "EVERY",
+    "other": "OTHER",
+    "until": "UNTIL",
+    "except": "EXCEPT",
+    "in": "IN",
+    "today": "TODAY",
+    "saturday": "WEEK_DAY",
+    "sunday": "WEEK_DAY",
+    "monday": "WEEK_DAY",
+    "tuesday": "WEEK_DAY",
+    "wednesday": "WEEK_DAY",
+    "thursday": "WEEK_DAY",
+    "friday": "WEEK_DAY",
+    "and": "AND",
+}
 
 # This is token names and patterns for tokenizing, order of patterns is IMPORTANT! first pattern will match.
 TOKEN_SPEC = [
-    ("DRAW", r"draw"),
-    ("UPDATE", r"update"),
-    ("RENAME", r"rename"),
-    ("PRINT", r"print"),
-    ("TASK", r"task"),
-    ("FROM", r"from"),
-    ("TO", r"\bto\b"),
-    ("AT", r"\bat\b"),
-    ("DURATION", r"duration"),
-    ("AFTER", r"after"),
-    ("IN", r"\bin\b"),
-    ("TODAY", r"today"),
-    ("WEEK_DAY", r"saturday|sunday|monday|tuesday|wednesday|thursday|friday"),
-    ("AND", r"and"),
+    # any word, it's a keyword or a mismatch
+    ("WORD", r"[A-Za-z_]\w*"),
+    ("DATE", r"\d{4}-\d{2}-\d{2}"),
     ("TIME", r"\d{2}:\d{2}"),
     ("STRING", r'"[^"]*"'),
     ("OPEN_CURLY_BRACKET", r"{"),
     ("CLOSE_CURLY_BRACKET", r"}"),
-    ("SKIP", r"\s"),
+    # whole run of whitespaces is one match
+    ("SKIP", r"\s+"),
     # First for mismatch word, second for any mismatch character
-    ("MISMATCH", r"\b\w+\b|.+"),
+    ("MISMATCH", r"\w+|.+"),
 ]
 
-TOKEN_REGEX = re.compile(
-    "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC), re.IGNORECASE
-)
+TOKEN_REGEX = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC))
+
+NEW_LINE_REGEX = re.compile("\n")
+
+
+class Token(NamedTuple):
+    kind: str
+    value: str
+    line: int
+    col: int
+
 
+def get_line_starts(code: str) -> list[int]:
+    """return index of start of each line of code, for find line of an index with binary search"""
+    return [0] + [m.end() for m in NEW_LINE_REGEX.finditer(code)]
 
-def get_code_snippet_with_location(code: str, index):
+
+def get_location(line_starts: list[int], index) -> tuple[int, int]:
+    """return line number and position (column) of given index on its line."""
+    line = bisect_right(line_starts, index)
+    return line, index - line_starts[line - 1]
+
+
+def get_code_snippet_with_location(code: str, index, line_starts: list[int] = None):
     """return line number, position and snippet code of error with given index."""
-    # count lines with get number of \n occurrence in code until index
-    line = code.count("\n", 0, index) + 1
-    # position index of error on that line
-    col = index - code.rfind("\n", 0, index) - 1
+    if line_starts is None:
+        line_starts = get_line_starts(code)
+    line, col = get_location(line_starts, index)
     # which line error occurred
-    snippet = code.split("\n")[line - 1]
+    end = line_starts[line] - 1 if line < len(line_starts) else len(code)
+    snippet = code[line_starts[line - 1] : end]
     return (snippet, line, col)
 
 
-def tokenize(code):
-    n = len(code)
-    pos = 0
-    while pos < n:
-        # get first token that match start from pos
-        token = TOKEN_REGEX.match(code, pos)
-
-        if not token:
-            snippet, line, col = get_code_snippet_with_location(code, pos)
-            raise SyntaxError(
-                f"Tokenizing failed!!! Invalid token is: {value!r} !!\n In line {line}:>\t{snippet!r}\tat {col}"
-            )
-
+def tokenize(code, first_line: int = 1):
+    """* first_line is line number of start of code, when code is a part of a bigger file"""
+    line_starts = get_line_starts(code)
+    first_line -= 1
+    for token in TOKEN_REGEX.finditer(code):
         # get token name and value
         kind = token.lastgroup
-        value = token.group()
-
         if kind == "SKIP":
             # if token is whitespace, new line, ... go to next token and do nothing
-            pass
-        elif kind == "MISMATCH":
+            continue
+
+        value = token.group()
+        if kind == "WORD":
+            value = value.lower()
+            kind = KEYWORDS.get(value, "MISMATCH")
+        elif kind == "STRING":
+            value = value.strip('"')
+
+        pos = token.start()
+        if kind == "MISMATCH":
             # this is last pattern, mean token dont match with our grammar
-            snippet, line, col = get_code_snippet_with_location(code, pos)
+            snippet, line, col = get_code_snippet_with_location(code, pos, line_starts)
+            # location is set as SyntaxError fields, so it's shown as "(line ..)" and tools can read it
             raise SyntaxError(
-                f"Unexpected character {value!r} !!!\n In line {line}:>\t{snippet!r}\tat {col}"
+                f"Unexpected character {token.group()!r} !!!\n>\t{snippet!r}\tat {col}",
+                (None, line + first_line, col + 1, snippet),
             )
-        else:
-            if kind == "STRING":
-                value = value.strip('"')
-            elif kind in (
-                "DRAW",
-                "UPDATE",
-                "RENAME",
-                "PRINT",
-                "TASK",
-                "FROM",
-                "TO",
-                "AT",
-                "DURATION",
-                "AFTER",
-                "IN",
-                "TODAY",
-                "WEEK_DAY",
-                "AND",
-            ):
-                value = value.lower()
-
-            yield (kind, value)
-
-        pos = token.end()
+
+        line = bisect_right(line_starts, pos)
+        yield Token(kind, value, line + first_line, pos - line_starts[line - 1])
+
+
+def tokenize_lines(lines):
+    """Tokenize code line by line (like an opened file), so whole code is never read in memory.
+    * Only strings can be longer than a line, so lines are joined until all quotes are closed."""
+    chunk = []
+    quotes = 0
+    first_line = 1
+    for number, line in enumerate(lines, 1):
+        if not chunk:
+            first_line = number
+        chunk.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield from tokenize("".join(chunk), first_line)
+            chunk = []
+            quotes = 0
+    if chunk:
+        yield from tokenize("".join(chunk), first_line)
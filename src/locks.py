@@ -0,0 +1,84 @@
+import threading
+
+
+class RWLock:
+    """Reader-writer lock, many readers can hold it together, or only one writer.
+    * Writer which is waiting block new readers, so a stream of readers can't starve writers,
+    and readers which are waiting when a writer release it go before next writer, so writers can't starve readers.
+    * It's not reentrant, thread which hold it shouldn't take it again.
+
+    Usage:
+        with lock.read:
+            ...
+        with lock.write:
+            ..."""
+
+    __slots__ = ("condition", "readers", "writer", "waiting_readers", "waiting_writers", "read_admits", "read", "write")
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        # number of readers which hold lock, and True when a writer hold it
+        self.readers = 0
+        self.writer = False
+        self.waiting_readers = 0
+        self.waiting_writers = 0
+        # number of readers which can take lock before waiting writers, they were waiting when last writer released it
+        self.read_admits = 0
+        self.read = _Read(self)
+        self.write = _Write(self)
+
+    def acquire_read(self):
+        with self.condition:
+            self.waiting_readers += 1
+            while self.writer or (self.waiting_writers and not self.read_admits):
+                self.condition.wait()
+            self.waiting_readers -= 1
+            if self.read_admits:
+                self.read_admits -= 1
+            self.readers += 1
+
+    def release_read(self):
+        with self.condition:
+            self.readers -= 1
+            if self.readers == 0:
+                self.condition.notify_all()
+
+    def acquire_write(self):
+        with self.condition:
+            self.waiting_writers += 1
+            while self.writer or self.readers or self.read_admits:
+                self.condition.wait()
+            self.waiting_writers -= 1
+            self.writer = True
+
+    def release_write(self):
+        with self.condition:
+            self.writer = False
+            self.read_admits = self.waiting_readers
+            self.condition.notify_all()
+
+
+class _Read:
+    __slots__ = ("lock",)
+
+    def __init__(self, lock: RWLock):
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire_read()
+
+    def __exit__(self, *exc):
+        self.lock.release_read()
+
+
+class _Write:
+    __slots__ = ("lock",)
+
+    def __init__(self, lock: RWLock):
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire_write()
+
+    def __exit__(self, *exc):
+        self.lock.release_write()
@@ -1,14 +1,50 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from helpers import format_minute, mask_to_days, days_to_mask
+from recurrence import Recurrence
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
-    """Main Task Model."""
+    """Main Task Model.
+    * start_minute and end_minute are minute of day (0 - 1439).
+    * day_mask is a 7 bit mask of days, bit i is helpers.WEEK_DAYS[i].
+    * overnight is True when task end on tomorrow (midnight-spanning task).
+    * after is name of task which this task is after it (defined by "duration .. after .."), and duration is its length in minutes.
+    When after task is moved, this task move with it. If follow_days is True days of task also follow after task.
+    * recurrence is dates which days of task occur on them (dated task), None mean every week of abstract week.
+    Dated tasks are not in weekly index, their conflicts are found from their recurrence (see recurrence.find_conflict).
+    * day_names are days as they are written in statement (in their order), they are only for output (days and __repr__)."""
 
     name: str
-    start: str
-    end: str
-    days: list[str]
+    start_minute: int
+    end_minute: int
+    day_mask: int
+    after: str = None
+    duration: int = None
+    follow_days: bool = False
+    recurrence: Recurrence = None
+    day_names: tuple = field(default=None, compare=False)
+    overnight: bool = field(init=False)
+
+    def __post_init__(self):
+        self.overnight = self.end_minute < self.start_minute
+
+    @property
+    def start(self) -> str:
+        return format_minute(self.start_minute)
+
+    @property
+    def end(self) -> str:
+        return format_minute(self.end_minute)
+
+    @property
+    def days(self) -> list[str]:
+        # names which are written are used while they are still days of task (day_mask can be changed without them)
+        if self.day_names is not None and days_to_mask(self.day_names) == self.day_mask:
+            return list(self.day_names)
+        return mask_to_days(self.day_mask)
 
     def __repr__(self):
+        if self.recurrence is not None:
+            return f"Task > {self.name}\t From {self.start} To {self.end} in {self.days} {self.recurrence}"
         return f"Task > {self.name}\t From {self.start} To {self.end} in {self.days}"
@@ -0,0 +1,36 @@
+from array import array
+
+DAY_MINUTES = 1440  # 24*60
+
+
+class Occupancy:
+    """Minute grid of a week (7 x 1440), each cell hold id of task which reserved that minute (0 mean free).
+    * Each day also keep a bitmask of busy minutes, so testing a range is one int operation instead of a loop.
+    * Days are index of helpers.WEEK_DAYS."""
+
+    __slots__ = ("cells", "masks")
+
+    def __init__(self):
+        self.cells = array("I", bytes(4 * 7 * DAY_MINUTES))
+        self.masks = [0] * 7
+
+    def is_free(self, day: int, start: int, end: int) -> bool:
+        return not (self.masks[day] >> start) & ((1 << (end - start)) - 1)
+
+    def fill(self, day: int, start: int, end: int, task_id: int):
+        if end <= start:
+            return
+        base = day * DAY_MINUTES
+        self.cells[base + start : base + end] = array("I", [task_id]) * (end - start)
+        self.masks[day] |= ((1 << (end - start)) - 1) << start
+
+    def clear(self, day: int, start: int, end: int):
+        if end <= start:
+            return
+        base = day * DAY_MINUTES
+        self.cells[base + start : base + end] = array("I", bytes(4 * (end - start)))
+        self.masks[day] &= ~(((1 << (end - start)) - 1) << start)
+
+    def owner(self, day: int, minute: int) -> int:
+        """return id of task which reserved given minute, 0 if it's free."""
+        return self.cells[day * DAY_MINUTES + minute]
@@ -10,46 +10,142 @@ class Program:
 
 @dataclass
 class TaskTime:
+    """* if flexible = True, task has only duration and interpreter place it in a free time of one of its days,
+    between earliest and latest (any time of day if they are None)."""
+
     start: str = None
     end: str = None
     duration: str = None
     after: str = None
+    flexible: bool = False
+    earliest: str = None
+    latest: str = None
+
+
+@dataclass
+class Every:
+    """Dates of a dated task (every [other] days from start [until until] [except ...]), dates are YYYY-MM-DD
+    * interval is number of weeks between occurrences (2 for every other week)"""
+
+    start: str
+    until: str = None
+    interval: int = 1
+    exceptions: list[str] = None
 
 
 @dataclass
 class TaskSt:
     """This is a model for tasks statements (create, update, ...)
     * if update = True, mean this is not for creating task, is for update an old task (Default is False)
+    * if every is set, task is dated and occur on days only in its dates (days are set from every statement too)
     """
 
     name: str
     time: TaskTime
     days: list[str] = None
     update: bool = False
+    line: int = None
+    every: Every = None
 
 
 @dataclass
 class RenameTask:
     old: str
     new: str
+    line: int = None
 
 
 @dataclass
 class Print:
-    """* if today = True, mean print today events and ignore target_name. (Default is False)"""
+    """* if today = True, mean print today events and ignore target_name. (Default is False)
+    * if day is set (like monday), print tasks of that day and ignore target_name.
+    * start and end limit printed tasks of day (or today) to tasks which are on between them.
+    * if date is set (like 2026-01-05), print occurrences of all tasks from date until until (only date if until is None)."""
 
     target_name: str
     today: bool = False
+    day: str = None
+    start: str = None
+    end: str = None
+    date: str = None
+    until: str = None
+
+
+@dataclass
+class Find:
+    """Represent find statement, search free times of days which are at least duration long
+    * if all = False, only earliest free time of each day is found.
+    * start and end limit search to free times between them, otherwise free time can start any time of day."""
+
+    duration: str
+    days: list[str]
+    all: bool = False
+    start: str = None
+    end: str = None
 
 
 @dataclass
 class Draw:
-    """Represent draw statement"""
+    """Represent draw statement
+    * if path is given (draw to "file.png"), schedule is saved to that file instead of showing it."""
+
+    path: str = None
+
+
+@dataclass
+class Check:
+    """Represent check statement, program that have it is checked for all conflicts before running"""
 
     pass
 
 
+@dataclass
+class Save:
+    """Represent save statement, save whole state of interpreter to a snapshot file"""
+
+    path: str
+
+
+@dataclass
+class Load:
+    """Represent load statement, replace whole state of interpreter with a snapshot file"""
+
+    path: str
+
+
+@dataclass
+class Export:
+    """Represent export statement, write all tasks to an iCalendar (.ics) or CSV (.csv) file"""
+
+    path: str
+
+
+@dataclass
+class Import:
+    """Represent import statement, add tasks of a CSV (.csv) or iCalendar (.ics) file without any DSL code"""
+
+    path: str
+    line: int = None
+
+
+@dataclass
+class Undo:
+    """Represent undo statement, revert last change (task statements which run together are one change)"""
+
+    line: int = None
+
+
+@dataclass
+class Redo:
+    """Represent redo statement, apply again last change which is reverted by undo"""
+
+    line: int = None
+
+
 # constant
+# Version of grammar and AST, should be increased when they change (cached programs of old versions are ignored)
+PARSER_VERSION = 10
+
 WEEK_DAYS = (
     "SATURDAY",
     "SUNDAY",
@@ -63,15 +159,19 @@ WEEK_DAYS = (
 
 # Parser
 class Parser:
+    """Parser read tokens one by one and only keep current token (one token lookahead),
+    so tokens can be a generator and whole code is never kept in memory."""
+
     def __init__(self, tokens):
-        self.tokens = list(tokens)
-        self.pos = 0
+        self.tokens = iter(tokens)
+        # current token, None when reach end of code
+        self.current = next(self.tokens, None)
 
     def peek(self):
         """This return current token name, where parser position is on it.
         when reach end of code, return None"""
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos][0]
+        if self.current is not None:
+            return self.current[0]
         return None
 
     def expect(self, kind):
@@ -79,44 +179,79 @@ class Parser:
         if yes, return current token value (not name) and go on next token,\n
         else raise Syntax Error."""
         if self.peek() == kind:
-            value = self.tokens[self.pos][1]
-            self.pos += 1
+            value = self.current[1]
+            self.current = next(self.tokens, None)
             return value
         raise SyntaxError(f"Expected {kind}, got {self.peek()}")
 
+    def line(self):
+        """return line of current token, None when reach end of code"""
+        if self.current is not None:
+            return self.current.line
+        return None
+
     def parse_program(self):
-        """Start point of each statement"""
-        statements = []
+        return Program(list(self.parse_statements()))
+
+    def parse_statements(self):
+        """Start point of each statement, yield each statement as soon as it's parsed
+        * Syntax errors get location of token which parser was on it (line and offset fields of SyntaxError)."""
+        try:
+            yield from self.parse_statements_without_location()
+        except SyntaxError as e:
+            if e.lineno is None and self.current is not None:
+                e.lineno = self.current.line
+                e.offset = self.current.col + 1
+            raise
+
+    def parse_statements_without_location(self):
         while self.peek() is not None:
             kind = self.peek()
             if kind == "TASK":
-                statements.append(self.parse_task())
+                yield self.parse_task()
             elif kind == "UPDATE":
-                statements.append(self.parse_update())
+                yield self.parse_update()
             elif kind == "RENAME":
-                statements.append(self.parse_rename())
+                yield self.parse_rename()
             elif kind == "PRINT":
-                statements.append(self.parse_print())
+                yield self.parse_print()
+            elif kind == "FIND":
+                yield self.parse_find()
             elif kind == "WEEK_DAY":
-                statements.extend(self.parse_batch_task_for_days())
+                yield from self.parse_batch_task_for_days()
             elif kind == "DRAW":
-                statements.append(self.parse_draw())
+                yield self.parse_draw()
+            elif kind == "CHECK":
+                yield self.parse_check()
+            elif kind == "SAVE":
+                yield self.parse_save()
+            elif kind == "LOAD":
+                yield self.parse_load()
+            elif kind == "EXPORT":
+                yield self.parse_export()
+            elif kind == "IMPORT":
+                yield self.parse_import()
+            elif kind == "UNDO":
+                yield self.parse_undo()
+            elif kind == "REDO":
+                yield self.parse_redo()
             else:
                 raise SyntaxError(f"Unknown statement, Starting with {kind}")
-        return Program(statements)
 
     def parse_task(self, with_day: bool = True):
         """* Should set with_day = False When check batch_task statements, otherwise keep it default (True)"""
+        line = self.line()
         self.expect("TASK")
         name = self.expect("STRING")  # parse name of task
         # parse time of task
         time = None
         days = None
+        every = None
         if self.peek() in ("FROM", "AT", "DURATION"):
-            if self.peek() == ("DURATION"):
-                # When start define task time with DURATION, dont need day, because statement should have AFTER event_name
-                with_day = False
             time = self.parse_task_time()
+            if time.after is not None:
+                # When define task time with DURATION .. AFTER event_name, dont need day, because days are same as event
+                with_day = False
         else:
             raise SyntaxError("Invalid statement, Expected time for task")
 
@@ -124,10 +259,14 @@ class Parser:
             if self.peek() == "IN":
                 self.expect("IN")
                 days = self.parse_day_list()
+            elif self.peek() == "EVERY" and not time.flexible:
+                days, every = self.parse_every()
             else:
                 raise SyntaxError("Invalid statement, Excepted days for task")
+        if time.flexible and self.peek() == "BETWEEN":
+            time.earliest, time.latest = self.parse_between()
 
-        return TaskSt(name, time, days)
+        return TaskSt(name, time, days, line=line, every=every)
 
     def parse_task_time(self):
         """*This only handle when time start with FROM and AT (not handle duration)"""
@@ -146,6 +285,9 @@ class Parser:
         elif self.peek() == "DURATION":
             self.expect("DURATION")
             duration = self.expect("TIME")
+            if self.peek() == "FLEXIBLE":
+                self.expect("FLEXIBLE")
+                return TaskTime(duration=duration, flexible=True)
             self.expect("AFTER")
             after = self.expect("STRING")
             return TaskTime(duration=duration, after=after)
@@ -157,6 +299,29 @@ class Parser:
             days.append(self.expect("WEEK_DAY"))  # append next days
         return days
 
+    def parse_every(self):
+        """parse (every [other] days from DATE [until DATE] [except DATE and DATE ...]), return (days, Every)"""
+        self.expect("EVERY")
+        interval = 1
+        if self.peek() == "OTHER":
+            self.expect("OTHER")
+            interval = 2
+        days = self.parse_day_list()
+        self.expect("FROM")
+        start = self.expect("DATE")
+        until = None
+        if self.peek() == "UNTIL":
+            self.expect("UNTIL")
+            until = self.expect("DATE")
+        exceptions = None
+        if self.peek() == "EXCEPT":
+            self.expect("EXCEPT")
+            exceptions = [self.expect("DATE")]
+            while self.peek() == "AND":
+                self.expect("AND")
+                exceptions.append(self.expect("DATE"))
+        return days, Every(start, until, interval, exceptions)
+
     def parse_batch_task_for_days(self):
         days = self.parse_day_list()
         self.expect("OPEN_CURLY_BRACKET")  # start block of batch tasks
@@ -171,46 +336,132 @@ class Parser:
         return tasks
 
     def parse_update(self):
+        line = self.line()
         self.expect("UPDATE")
         self.expect("TASK")
         name = self.expect("STRING")
         time = None
         days = None
+        every = None
         with_day = True
         have_option = False
         if self.peek() in ("FROM", "AT", "DURATION"):
-            if self.peek() == "DURATION":
-                with_day = False
             time = self.parse_task_time()
+            if time.flexible:
+                raise SyntaxError("Flexible time is only for new tasks")
+            if time.after is not None:
+                with_day = False
             have_option = True
         if with_day and self.peek() == "IN":
             self.expect("IN")
             days = self.parse_day_list()
             have_option = True
+        elif with_day and self.peek() == "EVERY":
+            days, every = self.parse_every()
+            have_option = True
         if not have_option:
             raise RuntimeError("Excepted some option (time or date) for update")
-        return TaskSt(name, time, days, True)
+        return TaskSt(name, time, days, True, line, every)
 
     def parse_rename(self):
+        line = self.line()
         self.expect("RENAME")
         self.expect("TASK")
         old = self.expect("STRING")
         self.expect("TO")
         new = self.expect("STRING")
-        return RenameTask(old, new)
+        return RenameTask(old, new, line)
 
     def parse_print(self):
         self.expect("PRINT")
         if self.peek() == "TODAY":
             self.expect("TODAY")
-            return Print("today", True)
+            start, end = self.parse_print_range()
+            return Print("today", True, start=start, end=end)
+        elif self.peek() == "WEEK_DAY":
+            day = self.expect("WEEK_DAY")
+            start, end = self.parse_print_range()
+            return Print(None, day=day, start=start, end=end)
         elif self.peek() == "TASK":
             self.expect("TASK")
             name = self.expect("STRING")
             return Print(name)
+        elif self.peek() == "DATE":
+            day = self.expect("DATE")
+            until = None
+            if self.peek() == "UNTIL":
+                self.expect("UNTIL")
+                until = self.expect("DATE")
+            return Print(None, date=day, until=until)
         else:
             raise SyntaxError("Invalid print command")
 
+    def parse_print_range(self):
+        """parse optional (from .. to ..) of print, return (None, None) if there is not"""
+        if self.peek() != "FROM":
+            return None, None
+        self.expect("FROM")
+        start = self.expect("TIME")
+        self.expect("TO")
+        return start, self.expect("TIME")
+
+    def parse_find(self):
+        self.expect("FIND")
+        find_all = False
+        if self.peek() == "ALL":
+            self.expect("ALL")
+            find_all = True
+        duration = self.expect("TIME")
+        self.expect("FREE")
+        self.expect("IN")
+        days = self.parse_day_list()
+        start = end = None
+        if self.peek() == "BETWEEN":
+            start, end = self.parse_between()
+        return Find(duration, days, find_all, start, end)
+
+    def parse_between(self):
+        """parse (between .. and ..), return (start, end)"""
+        self.expect("BETWEEN")
+        start = self.expect("TIME")
+        self.expect("AND")
+        return start, self.expect("TIME")
+
     def parse_draw(self):
         self.expect("DRAW")
+        if self.peek() == "TO":
+            self.expect("TO")
+            return Draw(self.expect("STRING"))
         return Draw()
+
+    def parse_check(self):
+        self.expect("CHECK")
+        return Check()
+
+    def parse_undo(self):
+        line = self.line()
+        self.expect("UNDO")
+        return Undo(line)
+
+    def parse_redo(self):
+        line = self.line()
+        self.expect("REDO")
+        return Redo(line)
+
+    def parse_save(self):
+        self.expect("SAVE")
+        return Save(self.expect("STRING"))
+
+    def parse_load(self):
+        self.expect("LOAD")
+        return Load(self.expect("STRING"))
+
+    def parse_import(self):
+        line = self.line()
+        self.expect("IMPORT")
+        return Import(self.expect("STRING"), line)
+
+    def parse_export(self):
+        self.expect("EXPORT")
+        self.expect("TO")
+        return Export(self.expect("STRING"))
@@ -0,0 +1,98 @@
+from bisect import bisect_right
+from helpers import DAY_INDEXES
+from reserved import free_times
+
+
+class DayFree:
+    """Free times of one day as sorted [start, end) intervals, made from gaps of reserved index of that day (reserved.DayReserved).
+    * Unlike reserved index, times are taken from it while tasks are placed, without making any task."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, reserved=None):
+        # intervals never overlap, so ends are sorted too
+        self.starts = []
+        self.ends = []
+        if reserved is not None:
+            for s, e in reserved.gaps(0, 1440):
+                self.starts.append(s)
+                self.ends.append(e)
+
+    def __repr__(self):
+        return repr(list(zip(self.starts, self.ends)))
+
+    def gaps(self, start: int, end: int):
+        """yield each free [start, end) in given range, sorted by start."""
+        starts = self.starts
+        ends = self.ends
+        i = bisect_right(ends, start)
+        while i < len(starts) and starts[i] < end:
+            yield max(starts[i], start), min(ends[i], end)
+            i += 1
+
+    def take(self, start: int, end: int):
+        """remove [start, end) from free times, it can be free or not"""
+        i = bisect_right(self.ends, start)
+        j = i
+        while j < len(self.starts) and self.starts[j] < end:
+            j += 1
+        if i == j:
+            return
+        starts = []
+        ends = []
+        if self.starts[i] < start:
+            starts.append(self.starts[i])
+            ends.append(start)
+        if self.ends[j - 1] > end:
+            starts.append(end)
+            ends.append(self.ends[j - 1])
+        self.starts[i:j] = starts
+        self.ends[i:j] = ends
+
+
+def window_size(start: int, end: int) -> int:
+    """return length of window which tasks can be placed in it, (None, None) is whole day"""
+    if start is None:
+        return 1440
+    return (end - start) % 1440 or 1440
+
+
+def get_priority(request: tuple) -> tuple:
+    """return order of placing a request, (slack, -duration). slack is time of all windows of task which is more than duration."""
+    duration, mask, start, end = request
+    return len(DAY_INDEXES[mask]) * window_size(start, end) - duration, -duration
+
+
+def place_tasks(days: list[DayFree], requests: list[tuple]) -> list[tuple[int, int]]:
+    """Place flexible tasks in free times of days (7 DayFree, index of WEEK_DAYS) with best-fit.
+    * requests are (duration, day mask, start, end) of each task, task should be placed in one of days of mask,
+    between start and end of that day (None for any time of day, end before start mean end is on tomorrow).
+    * Tasks which have less choices are placed first (then longer ones), each one in the smallest free time which it fit in it
+    (earliest one if there are many), so big free times are kept for tasks that need them.
+    return (day index, start minute) of each request (start minute is always in its day), None for requests which there is no free time for them."""
+    order = sorted(range(len(requests)), key=lambda i: get_priority(requests[i]))
+    result = [None] * len(requests)
+    for i in order:
+        duration, mask, start, end = requests[i]
+        best = None
+        for d in DAY_INDEXES[mask]:
+            for s, e in free_times(days, d, duration, start, end):
+                if best is None or e - s < best[0]:
+                    best = (e - s, d, s)
+                    if e - s == duration:
+                        break
+            if best is not None and best[0] == duration:
+                # nothing fit better than exact size
+                break
+        if best is None:
+            continue
+        _, d, s = best
+        if s >= 1440:
+            # free time of window start on tomorrow (window cross midnight)
+            d, s = (d + 1) % 7, s - 1440
+        e = s + duration
+        days[d].take(s, min(e, 1440))
+        if e > 1440:
+            days[(d + 1) % 7].take(0, e - 1440)
+        result[i] = (d, s)
+    return result
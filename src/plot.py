@@ -1,7 +1,8 @@
-import matplotlib.pyplot as plt
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
 import matplotlib.patches as patches
 from models import Task
-from helpers import convert_time_to_minute, end_is_on_tomorrow
+from helpers import DAY_INDEXES
 
 days = [
     "Saturday",
@@ -13,85 +14,69 @@ days = [
     "Friday",
 ]
 
+FIGURE_SIZE = (15, 9)
+FONT_SIZE = 10
+# Width of one character of labels in hours (x axis unit) with FIGURE_SIZE and FONT_SIZE, for culling labels that don't fit
+CHAR_WIDTH = 0.18
+
 
 class Plot:
     def __init__(self, tasks: list[Task]):
         self.tasks = tasks
 
-    def add_task(self, ax, task: Task):
-        name = task.name
-        dys = task.days
-        start = convert_time_to_minute(task.start) / 60
-        end = convert_time_to_minute(task.end) / 60
-        duration = end - start
-        for day in dys:
-            if end_is_on_tomorrow(task.start, task.end):
-                # Add the part for the current day
-                rect = patches.Rectangle(
-                    (start, days.index(day.capitalize())),
-                    24 - start,
-                    1,
-                    linewidth=1,
-                    edgecolor="black",
-                    facecolor="skyblue",
-                    alpha=0.7,
-                )
-                ax.add_patch(rect)
-                ax.text(
-                    start + (24 - start) / 2,
-                    days.index(day.capitalize()) + 0.5,
-                    name + f"\n{task.start}\n to \n {task.end}",
-                    horizontalalignment="center",
-                    verticalalignment="center",
-                    fontsize=10,
-                    color="black",
-                )
-                # Add the part for the next day
-                next_day_index = (days.index(day.capitalize()) + 1) % len(days)
-                rect = patches.Rectangle(
-                    (0, next_day_index),
-                    end,
-                    1,
-                    linewidth=1,
-                    edgecolor="black",
-                    facecolor="skyblue",
-                    alpha=0.7,
-                )
-                ax.add_patch(rect)
-                ax.text(
-                    end / 2,
-                    next_day_index + 0.5,
-                    name + f"\n{task.start}\n to \n {task.end}",
-                    horizontalalignment="center",
-                    verticalalignment="center",
-                    fontsize=10,
-                    color="black",
-                )
-            else:
-                rect = patches.Rectangle(
-                    (start, days.index(day.capitalize())),
-                    duration,
-                    1,
-                    linewidth=1,
-                    edgecolor="black",
-                    facecolor="skyblue",
-                    alpha=0.7,
-                )
-                ax.add_patch(rect)
+    def get_parts(self):
+        """yield (day index, start hour, duration in hour, task) of each rectangle of tasks,
+        midnight-spanning tasks have two parts (today and tomorrow)."""
+        for task in self.tasks:
+            start = task.start_minute / 60
+            end = task.end_minute / 60
+            for day_index in DAY_INDEXES[task.day_mask]:
+                if task.overnight:
+                    # the part for the current day and the part for the next day
+                    yield day_index, start, 24 - start, task
+                    yield (day_index + 1) % len(days), 0, end, task
+                else:
+                    yield day_index, start, end - start, task
+
+    def get_label(self, task: Task, width: float):
+        """return label of a rectangle with given width (hour), abbreviated if full label doesn't fit, None if nothing fit."""
+        chars = int(width / CHAR_WIDTH)
+        if chars >= max(len(task.name), 6):
+            return task.name + f"\n{task.start}\n to \n {task.end}"
+        if chars >= len(task.name):
+            return task.name
+        if chars >= 2:
+            return task.name[: chars - 1] + "…"
+        return None
+
+    def add_tasks(self, ax):
+        """add all tasks to ax, all rectangles are one collection (one artist), labels that can't fit are culled"""
+        rects = []
+        for day_index, start, width, task in self.get_parts():
+            rects.append(patches.Rectangle((start, day_index), width, 1))
+            label = self.get_label(task, width)
+            if label is not None:
                 ax.text(
-                    start + duration / 2,
-                    days.index(day.capitalize()) + 0.5,
-                    name + f"\n{task.start}\n to \n {task.end}",
+                    start + width / 2,
+                    day_index + 0.5,
+                    label,
                     horizontalalignment="center",
                     verticalalignment="center",
-                    fontsize=10,
+                    fontsize=FONT_SIZE,
                     color="black",
+                    clip_on=True,
                 )
+        ax.add_collection(
+            PatchCollection(
+                rects,
+                linewidth=1,
+                edgecolor="black",
+                facecolor="skyblue",
+                alpha=0.7,
+            )
+        )
 
-    def draw(self):
-        fig, ax = plt.subplots(figsize=(15, 9))
-        fig.canvas.manager.set_window_title("Weekly Schedule")
-
+    def setup_axes(self, ax):
         # Days on y-axis
         ax.set_yticks([i + 0.5 for i in range(len(days))])
         ax.set_yticklabels(days)
@@ -106,10 +91,24 @@ class Plot:
 
         # Grid
         ax.grid(True, which="both", axis="both", linestyle="--", alpha=0.5)
+        ax.set_title("Weekly Schedule")
 
-        # Draw Tasks
-        for t in self.tasks:
-            self.add_task(ax, t)
+    def draw(self, path: str = None):
+        """show schedule in a window, or if path is given, save it to that file without any window.
+        * Format of file is based on its extension (png, svg, pdf, ...)."""
+        if path is not None:
+            # figure without pyplot don't need any GUI backend, so it works on headless servers
+            fig = Figure(figsize=FIGURE_SIZE)
+            ax = fig.add_subplot()
+            self.setup_axes(ax)
+            self.add_tasks(ax)
+            fig.savefig(path)
+            return
 
-        plt.title("Weekly Schedule")
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=FIGURE_SIZE)
+        fig.canvas.manager.set_window_title("Weekly Schedule")
+        self.setup_axes(ax)
+        self.add_tasks(ax)
         plt.show()
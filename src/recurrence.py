@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from datetime import date
+from math import gcd
+from helpers import DAY_INDEXES, WEEK_DAYS
+
+
+@dataclass(frozen=True, slots=True)
+class Recurrence:
+    """Dated recurrence of a task, days of task (Task.day_mask) every interval weeks from start until until (both inclusive), except some dates.
+    * Dates are ordinals (date.toordinal), so occurrences and conflicts are found with integer arithmetic and nothing is expanded.
+    * Weeks start at saturday (like helpers.WEEK_DAYS), week of start is first week, every other week (interval 2) skip each second week after it.
+    * until None mean it never ends."""
+
+    start: int
+    until: int = None
+    interval: int = 1
+    exceptions: frozenset = frozenset()
+
+    @property
+    def period(self) -> int:
+        return 7 * self.interval
+
+    def __str__(self):
+        text = f"every {'other week' if self.interval == 2 else 'week'} from {format_date(self.start)}"
+        if self.until is not None:
+            text += f" until {format_date(self.until)}"
+        if self.exceptions:
+            text += " except " + " and ".join(format_date(o) for o in sorted(self.exceptions))
+        return text
+
+
+# Tasks without any date occur every week forever, same as this recurrence (start is the first date of calendar)
+WEEKLY = Recurrence(1)
+
+
+def format_date(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def day_index(ordinal: int) -> int:
+    """return index of day of date in WEEK_DAYS (ordinal 1 is a monday)"""
+    return (ordinal + 1) % 7
+
+
+def format_day(ordinal: int) -> str:
+    """return day and date, like monday 2026-01-05"""
+    return f"{WEEK_DAYS[day_index(ordinal)]} {format_date(ordinal)}"
+
+
+def week_start(ordinal: int) -> int:
+    """return saturday of week of date"""
+    return ordinal - day_index(ordinal)
+
+
+def occurrences(rule: Recurrence, day_mask: int, first: int = None, last: int = None):
+    """yield date of each occurrence of days of day_mask, sorted, from first until last (both inclusive, None mean no limit).
+    * Occurrences are made one by one, so a window of an endless recurrence is never materialized."""
+    lo = rule.start if first is None else max(rule.start, first)
+    hi = rule.until if last is None else last if rule.until is None else min(rule.until, last)
+    period = rule.period
+    days = DAY_INDEXES[day_mask]
+    week = week_start(rule.start)
+    if lo > week:
+        # skip weeks before window without visiting them
+        week += (lo - week) // period * period
+    while hi is None or week <= hi:
+        for d in days:
+            o = week + d
+            if o < lo:
+                continue
+            if hi is not None and o > hi:
+                return
+            if o not in rule.exceptions:
+                yield o
+        week += period
+
+
+def first_common(a: int, pa: int, b: int, pb: int, lo: int, hi: int = None):
+    """return smallest x >= lo which x = a (mod pa) and x = b (mod pb) (chinese remainder theorem), None if there is not until hi"""
+    g = gcd(pa, pb)
+    if (b - a) % g:
+        return None
+    m = pb // g
+    x = a + pa * ((b - a) // g * pow(pa // g, -1, m) % m)
+    # solutions repeat every lcm of periods
+    x = lo + (x - lo) % (pa // g * pb)
+    if hi is not None and x > hi:
+        return None
+    return x
+
+
+def find_conflict(a, b):
+    """return (date, start, end) of first time which tasks a and b (models.Task, tasks without recurrence are WEEKLY) overlap,
+    start and end are minutes from start of date (end can be after 1440 for midnight-spanning tasks), None if they never overlap.
+    * For each pair of days of tasks and each distance of their dates (-1, 0, 1 day), first common occurrence is found from periods
+    of tasks with gcd, so cost doesn't depend on number of occurrences (only on number of exceptions which are skipped)."""
+    ra = a.recurrence or WEEKLY
+    rb = b.recurrence or WEEKLY
+    ea = a.end_minute + (1440 if a.overnight else 0)
+    eb = b.end_minute + (1440 if b.overnight else 0)
+    best = None
+    for delta in (-1, 0, 1):
+        # occurrence of b is delta days after occurrence of a
+        s = max(a.start_minute, b.start_minute + delta * 1440)
+        e = min(ea, eb + delta * 1440)
+        if s >= e:
+            continue
+        lo = max(ra.start, rb.start - delta)
+        hi = ra.until
+        if rb.until is not None:
+            hi = rb.until - delta if hi is None else min(hi, rb.until - delta)
+        for da in DAY_INDEXES[a.day_mask]:
+            a0 = week_start(ra.start) + da
+            for db in DAY_INDEXES[b.day_mask]:
+                # dates of a which dates of b are delta days after them
+                b0 = week_start(rb.start) + db - delta
+                x = first_common(a0, ra.period, b0, rb.period, lo, hi)
+                while x is not None and (x in ra.exceptions or x + delta in rb.exceptions):
+                    x = first_common(a0, ra.period, b0, rb.period, x + 1, hi)
+                if x is not None and (best is None or (x, s) < best[:2]):
+                    best = (x, s, e)
+    return best
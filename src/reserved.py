@@ -0,0 +1,242 @@
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from helpers import DAY_INDEXES
+from recurrence import week_start
+
+# Width of buckets of DatedIndex in minutes, each day has 24 buckets
+DATED_BUCKET = 60
+DATED_BUCKETS = 7 * 1440 // DATED_BUCKET
+# Dated tasks which end in this number of weeks are bucketed by their weeks too
+DATED_WEEKS = 8
+
+
+class DayReserved:
+    """Reserved times of one day, sorted by start minute.
+    Each entry is [start, end, task_name] (minutes of day, end is exclusive).
+    * Entries of a day never overlap each other (conflicts are rejected before filling),
+    so they are sorted by end too and every lookup can be done with binary search."""
+
+    __slots__ = ("starts", "entries")
+
+    def __init__(self):
+        # starts[i] is entries[i][0], kept separately for bisect
+        self.starts = []
+        self.entries = []
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return repr(self.entries)
+
+    def insert(self, start: int, end: int, name: str):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.entries.insert(i, [start, end, name])
+
+    def find(self, start: int, name: str) -> int:
+        """return index of entry of given task which start at given minute, -1 if not found."""
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.entries[i][2] == name:
+                return i
+            i += 1
+        return -1
+
+    def remove(self, start: int, name: str):
+        i = self.find(start, name)
+        if i != -1:
+            del self.starts[i]
+            del self.entries[i]
+
+    def rename(self, start: int, old: str, new: str):
+        i = self.find(start, old)
+        if i != -1:
+            self.entries[i][2] = new
+
+    def first_overlap(self, start: int) -> int:
+        """return index of first entry which is not ended at start (len of entries if there is not)."""
+        # entries are sorted by end too, so it's the last entry which start before (or at) start, if it's not ended yet
+        i = bisect_right(self.starts, start) - 1
+        if i < 0 or self.entries[i][1] <= start:
+            i += 1
+        return i
+
+    def between(self, start: int, end: int) -> list:
+        """return all entries that overlap with [start, end), sorted by start."""
+        i = self.first_overlap(start)
+        return self.entries[i : bisect_left(self.starts, end, i)]
+
+    def gaps(self, start: int, end: int):
+        """yield each free [start, end) of day in given range, sorted by start.
+        * Entries are visited one by one, so taking only first gaps doesn't visit whole day."""
+        entries = self.entries
+        i = self.first_overlap(start)
+        while i < len(entries) and entries[i][0] < end:
+            s, e, _ = entries[i]
+            if s > start:
+                yield start, s
+            # entries are sorted by end too, so free time after this entry start from its end
+            start = e
+            i += 1
+        if start < end:
+            yield start, end
+
+    def overlap(self, start: int, end: int):
+        """return first entry that overlap with [start, end), None if this time is free."""
+        # only entries which start before end can overlap, last of them has the biggest end
+        i = bisect_left(self.starts, end)
+        if i == 0 or self.entries[i - 1][1] <= start:
+            return None
+        # go back to first overlapped entry, for report the earliest conflict
+        i -= 1
+        while i > 0 and self.entries[i - 1][1] > start:
+            i -= 1
+        return self.entries[i]
+
+
+
+class DatedIndex:
+    """Dated tasks (which have recurrence) bucketed by day of week and hour, for find dated tasks which can conflict with a task without visiting all of them.
+    * Two tasks can only overlap on a date if their times overlap on week (without dates), so tasks which share a bucket
+    with a task are only candidates, and their dates are checked with recurrence.find_conflict.
+    * Dated tasks can be at same time of week (like every other week on different weeks), so they overlap each other and
+    can't be kept like DayReserved, each bucket is a set of names.
+    * Tasks which end in a few weeks (like single dates of an imported calendar) are many at same hours of week,
+    so they are bucketed by their weeks too, and they are only candidates of tasks which live in same weeks.
+    * It's used like a dict of name to task (iter, len, values), tasks are in order they are added."""
+
+    __slots__ = ("tasks", "order", "buckets", "endless", "weeks", "added")
+
+    def __init__(self):
+        # Key: task name, Value: task model
+        self.tasks = {}
+        # Key: task name, Value: number of task when it was added, for visit candidates in same order as tasks
+        self.order = {}
+        # names of all tasks in each hour of week, and of tasks which are not short (see is_short)
+        self.buckets = [set() for _ in range(DATED_BUCKETS)]
+        self.endless = [set() for _ in range(DATED_BUCKETS)]
+        # Key: week number * DATED_BUCKETS + hour of week, Value: names of short tasks in that hour
+        self.weeks = {}
+        self.added = 0
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __contains__(self, name: str):
+        return name in self.tasks
+
+    def __getitem__(self, name: str):
+        return self.tasks[name]
+
+    def values(self):
+        return self.tasks.values()
+
+    def add(self, task):
+        self.tasks[task.name] = task
+        self.order[task.name] = self.added
+        self.added += 1
+        for b in get_buckets(task):
+            self.buckets[b % DATED_BUCKETS].add(task.name)
+        if is_short(task):
+            for key in get_week_buckets(task):
+                self.weeks.setdefault(key, set()).add(task.name)
+        else:
+            for b in get_buckets(task):
+                self.endless[b % DATED_BUCKETS].add(task.name)
+
+    def remove(self, name: str):
+        task = self.tasks.pop(name)
+        del self.order[name]
+        for b in get_buckets(task):
+            self.buckets[b % DATED_BUCKETS].discard(name)
+        if is_short(task):
+            for key in get_week_buckets(task):
+                names = self.weeks.get(key)
+                if names is not None:
+                    names.discard(name)
+                    if not names:
+                        del self.weeks[key]
+        else:
+            for b in get_buckets(task):
+                self.endless[b % DATED_BUCKETS].discard(name)
+
+    def candidates(self, task) -> list:
+        """return dated tasks which their time of week overlap hours of task (any task, weekly or dated), in order they are added.
+        * For a short task, short tasks are only taken from its weeks."""
+        names = set()
+        if is_short(task):
+            for b in get_buckets(task):
+                names.update(self.endless[b % DATED_BUCKETS])
+            for key in get_week_buckets(task):
+                names.update(self.weeks.get(key, ()))
+        else:
+            for b in get_buckets(task):
+                names.update(self.buckets[b % DATED_BUCKETS])
+        return [self.tasks[name] for name in sorted(names, key=self.order.__getitem__)]
+
+
+def is_short(task) -> bool:
+    """a dated task which end in DATED_WEEKS weeks"""
+    rule = task.recurrence
+    return rule is not None and rule.until is not None and rule.until - rule.start < DATED_WEEKS * 7
+
+
+def get_buckets(task):
+    """yield hour of week (from saturday 00:00) of each bucket which task has any part in it, without its dates.
+    Midnight-spanning part of friday continue after end of week (DATED_BUCKETS or more)."""
+    end = task.end_minute + (1440 if task.overnight else 0)
+    if end <= task.start_minute:
+        return
+    for d in DAY_INDEXES[task.day_mask]:
+        s = d * 1440 + task.start_minute
+        e = d * 1440 + end
+        yield from range(s // DATED_BUCKET, (e - 1) // DATED_BUCKET + 1)
+
+
+def get_week_buckets(task):
+    """yield week number * DATED_BUCKETS + hour of week of buckets of a short task in each week between its dates,
+    part of friday which continue after end of week is in next week."""
+    rule = task.recurrence
+    buckets = list(get_buckets(task))
+    for week in range(week_start(rule.start) // 7, week_start(rule.until) // 7 + 1):
+        for b in buckets:
+            yield week * DATED_BUCKETS + b
+
+def free_times(days: list, day: int, duration: int, start: int = None, end: int = None):
+    """yield free times of day which are at least duration minutes long, as (start, end) minutes from start of day.
+    * days are 7 objects which have gaps(start, end) like DayReserved, day is index of it.
+    * Free times are gaps of days, so midnight-spanning tasks of yesterday are considered,
+    and free time at end of day continue to tomorrow (end can be more than 1440) until first reserved time of tomorrow.
+    * If start and end are given, only free times between them are found (end before start mean end is on tomorrow),
+    otherwise free time can start any time of day."""
+    if start is None:
+        start, end, last_start = 0, 2 * 1440, 1440
+    else:
+        if end <= start:
+            end += 1440
+        last_start = end
+    gaps = days[day].gaps(start, min(end, 1440))
+    if end > 1440:
+        tomorrow = days[(day + 1) % 7].gaps(0, end - 1440)
+        gaps = chain(gaps, ((s + 1440, e + 1440) for s, e in tomorrow))
+
+    # gaps of today and tomorrow which touch at midnight are one free time
+    current = None
+    for s, e in gaps:
+        if current is not None and current[1] == s:
+            current = (current[0], e)
+            continue
+        if current is not None and current[1] - current[0] >= duration:
+            yield current
+        if s >= last_start:
+            return
+        current = (s, e)
+    if current is not None and current[1] - current[0] >= duration:
+        yield current
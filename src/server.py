@@ -0,0 +1,128 @@
+import asyncio
+import io
+import json
+import os
+import re
+import stat
+from dataclasses import replace
+from functools import lru_cache
+from client import LINE_LIMIT, parse_address
+from interpreter import Interpreter
+from lexer import tokenize
+from parser import Parser, Program, Draw, Save, Load, Export, Import
+
+# Number of parsed codes which are kept, planners send same queries again and again.
+# Only short codes are kept, so big scripts don't stay in memory.
+PROGRAM_CACHE_SIZE = 4096
+CACHED_CODE_SIZE = 1024
+# Statements which read or write files, over server they only use files of their session (see Server.get_path)
+FILE_STATEMENTS = (Draw, Save, Load, Export, Import)
+PATH_SEPARATORS = re.compile(r"[\\/]")
+
+
+def parse(code: str) -> tuple:
+    """return statements of code, same short code is tokenized and parsed once (statements are never changed by interpreter)"""
+    if len(code) <= CACHED_CODE_SIZE:
+        return parse_cached(code)
+    return tuple(Parser(tokenize(code)).parse_statements())
+
+
+@lru_cache(maxsize=PROGRAM_CACHE_SIZE)
+def parse_cached(code: str) -> tuple:
+    return tuple(Parser(tokenize(code)).parse_statements())
+
+
+class Server:
+    """Host many named interpreters (sessions) in one process, each session has its own schedule.
+    * Protocol is JSON lines, each request is {"session": name, "code": DSL code} (and optional "id", which is sent back),
+    and each response is {"ok": bool, "output": printed text, "error": message (only when not ok)}.
+    * Requests of a connection are answered in order, so clients can pipeline them.
+    * Code runs in event loop without await, so a request never see half-run code of another one."""
+
+    def __init__(self, files: str = None):
+        # Key: session name, Value: interpreter of session (created on first request)
+        self.sessions = {}
+        # Directory which each session has its own directory in it, for files of draw to, save, load, export and import.
+        # None mean statements which use files are not allowed, so a tenant can never read or write files of server.
+        self.files = files
+
+    def get_path(self, session: str, path: str) -> str:
+        """return path of a file of session, only relative paths inside directory of session are allowed"""
+        if self.files is None:
+            raise RuntimeError("Server doesn't allow files!!! start it with a files directory (--serve-files)")
+        if session in ("", ".", "..") or PATH_SEPARATORS.search(session):
+            raise RuntimeError(f"Session {session} can't have files, its name is not a valid directory name!!!")
+        if os.path.isabs(path) or os.path.splitdrive(path)[0] or ".." in PATH_SEPARATORS.split(path):
+            raise RuntimeError(f"Path {path} is not allowed!!! use a relative path without ..")
+        directory = os.path.join(self.files, session)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, path)
+
+    def get_statements(self, session: str, statements) -> list:
+        """return statements of a request, paths of file statements are moved to directory of session"""
+        result = []
+        for st in statements:
+            if isinstance(st, FILE_STATEMENTS):
+                if st.path is None:
+                    raise RuntimeError('Server can\'t show schedule, use draw to "file"!!!')
+                # parsed statements are cached and shared, so they are not changed
+                st = replace(st, path=self.get_path(session, st.path))
+            result.append(st)
+        return result
+
+    def get_session(self, name: str) -> Interpreter:
+        interpreter = self.sessions.get(name)
+        if interpreter is None:
+            interpreter = Interpreter(io.StringIO())
+            self.sessions[name] = interpreter
+        return interpreter
+
+    def handle(self, line: bytes) -> dict:
+        """run one request line, return its response"""
+        response = {"ok": True, "output": ""}
+        interpreter = None
+        try:
+            request = json.loads(line)
+            if "id" in request:
+                response["id"] = request["id"]
+            statements = self.get_statements(request["session"], parse(request["code"]))
+            interpreter = self.get_session(request["session"])
+            interpreter.run(Program(statements))
+        except Exception as e:
+            response["ok"] = False
+            response["error"] = f"{e}"
+        if interpreter is not None:
+            response["output"] = interpreter.out.getvalue()
+            interpreter.out.seek(0)
+            interpreter.out.truncate()
+        return response
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                writer.write(json.dumps(self.handle(line)).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ValueError:
+            # request line is longer than LINE_LIMIT
+            writer.write(json.dumps({"ok": False, "output": "", "error": "Request is too long!!!"}).encode("utf-8") + b"\n")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, address: str) -> asyncio.AbstractServer:
+        kind, *where = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(where[0]) and stat.S_ISSOCK(os.stat(where[0]).st_mode):
+                # socket of a server which is not running anymore
+                os.remove(where[0])
+            return await asyncio.start_unix_server(self.serve_client, where[0], limit=LINE_LIMIT)
+        return await asyncio.start_server(self.serve_client, *where, limit=LINE_LIMIT)
+
+
+async def serve(address: str, files: str = None):
+    """run schedule server on address (see client.parse_address) until it's stopped, files is directory of sessions files (see Server)"""
+    server = await Server(files).start(address)
+    async with server:
+        print(f"Schedu server is listening on {address}", flush=True)
+        await server.serve_forever()
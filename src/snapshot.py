@@ -0,0 +1,242 @@
+import mmap
+import struct
+import sys
+from array import array
+from dataclasses import replace
+from helpers import WEEK_DAYS
+from models import Task
+from recurrence import Recurrence
+from occupancy import Occupancy, DAY_MINUTES
+from reserved import DayReserved, DatedIndex
+
+# Snapshot file layout (all arrays in byte order of header):
+# * header
+# * tasks: ids (I), start minutes (H), end minutes (H), day masks (B), name offsets (I, one more than tasks), names (utf-8)
+#   since version 2 also index of after task in tasks (i, -1 for none) and durations (H), day masks have follow_days at bit 7
+# * occupancy: cells (I, 7 * 1440), busy bitmask of each day (7 * 180 bytes)
+# * reserved: number of entries of each day (I, 7), then for each day starts (H), ends (H), task ids (I)
+# * since version 3, dated tasks: number of them (I), index in tasks (I), start dates (I), until dates (I, 0 for none),
+#   intervals (B), number of exceptions (I), exception dates (I). dates are ordinals, dated tasks have task id 0
+# * since version 4, days of tasks as they are written (models.Task.day_names): code of each task (I, see encode_day_names)
+MAGIC = b"SCHEDUSN"
+# Version of snapshot format, should be increased when layout changes (and old versions still be loaded)
+SNAPSHOT_VERSION = 4
+# magic, version, byte order (0 = little, 1 = big), number of tasks, size of names, size of task id table
+HEADER = struct.Struct("<8sHBxIII")
+MASK_BYTES = DAY_MINUTES // 8
+FOLLOW_DAYS_BIT = 0x80
+
+
+def save_snapshot(interpreter, path: str):
+    """write tasks, reserved index and occupancy grid of interpreter to a snapshot file"""
+    tasks = list(interpreter.tasks.values())
+    indexes = {t.name: i for i, t in enumerate(tasks)}
+    names = [t.name.encode("utf-8") for t in tasks]
+    offsets = array("I", [0])
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+    reserved_counts = array("I", [len(day) for day in interpreter.reserved])
+
+    with open(path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                SNAPSHOT_VERSION,
+                0 if sys.byteorder == "little" else 1,
+                len(tasks),
+                offsets[-1],
+                len(interpreter.task_names),
+            )
+        )
+        f.write(array("I", [interpreter.task_ids.get(t.name, 0) for t in tasks]))
+        f.write(array("H", [t.start_minute for t in tasks]))
+        f.write(array("H", [t.end_minute for t in tasks]))
+        f.write(array("B", [t.day_mask | (FOLLOW_DAYS_BIT if t.follow_days else 0) for t in tasks]))
+        f.write(offsets)
+        f.write(b"".join(names))
+        f.write(array("i", [-1 if t.after is None else indexes[t.after] for t in tasks]))
+        f.write(array("H", [t.duration or 0 for t in tasks]))
+
+        f.write(interpreter.occupancy.cells)
+        for mask in interpreter.occupancy.masks:
+            f.write(mask.to_bytes(MASK_BYTES, "little"))
+
+        f.write(reserved_counts)
+        for day in interpreter.reserved:
+            f.write(array("H", day.starts))
+            f.write(array("H", [e[1] for e in day.entries]))
+            f.write(array("I", [interpreter.task_ids[e[2]] for e in day.entries]))
+
+        dated = [(i, t.recurrence) for i, t in enumerate(tasks) if t.recurrence is not None]
+        f.write(array("I", [len(dated)]))
+        f.write(array("I", [i for i, _ in dated]))
+        f.write(array("I", [r.start for _, r in dated]))
+        f.write(array("I", [r.until or 0 for _, r in dated]))
+        f.write(array("B", [r.interval for _, r in dated]))
+        f.write(array("I", [len(r.exceptions) for _, r in dated]))
+        f.write(array("I", [o for _, r in dated for o in sorted(r.exceptions)]))
+
+        f.write(array("I", [encode_day_names(t.day_names) for t in tasks]))
+
+
+def encode_day_names(names) -> int:
+    """return day names in one int, 3 bits for each name (index in WEEK_DAYS + 1) from first name at lowest bits, 0 for none.
+    * More than 10 names don't fit, they are not kept (task is shown with days of its mask)."""
+    if not names or len(names) > 10:
+        return 0
+    code = 0
+    for name in reversed(names):
+        code = code << 3 | WEEK_DAYS.index(name.lower()) + 1
+    return code
+
+
+def decode_day_names(code: int) -> tuple:
+    names = []
+    while code:
+        names.append(WEEK_DAYS[(code & 7) - 1])
+        code >>= 3
+    return tuple(names) or None
+
+
+class SnapshotReader:
+    """read arrays one after another from a memory-mapped snapshot"""
+
+    def __init__(self, view: memoryview, swap: bool, pos: int):
+        self.view = view
+        self.swap = swap
+        self.pos = pos
+
+    def read_bytes(self, size: int) -> bytes:
+        data = self.view[self.pos : self.pos + size]
+        if len(data) != size:
+            # slice is released now, otherwise it's kept by traceback and mapped file can't be closed
+            data.release()
+            raise RuntimeError("Snapshot file is broken!!!")
+        self.pos += size
+        return data
+
+    def read_array(self, typecode: str, count: int) -> array:
+        result = array(typecode)
+        result.frombytes(self.read_bytes(result.itemsize * count))
+        if self.swap:
+            result.byteswap()
+        return result
+
+
+def load_snapshot(interpreter, path: str):
+    """replace state of interpreter with a snapshot file, without validating it again"""
+    with open(path, "rb") as f:
+        try:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file can't be mapped
+            raise RuntimeError(f"{path} is not a schedu snapshot!!!")
+    with m:
+        view = memoryview(m)
+        try:
+            if len(view) < HEADER.size:
+                raise RuntimeError(f"{path} is not a schedu snapshot!!!")
+            magic, version, order, count, names_size, ids_size = HEADER.unpack_from(view)
+            if magic != MAGIC:
+                raise RuntimeError(f"{path} is not a schedu snapshot!!!")
+            if version > SNAPSHOT_VERSION:
+                raise RuntimeError(
+                    f"Snapshot version {version} is newer than supported version {SNAPSHOT_VERSION}!!!"
+                )
+            reader = SnapshotReader(view, order != (0 if sys.byteorder == "little" else 1), HEADER.size)
+            load(interpreter, reader, version, count, names_size, ids_size)
+        finally:
+            view.release()
+
+
+def load(interpreter, reader: SnapshotReader, version: int, count: int, names_size: int, ids_size: int):
+    ids = reader.read_array("I", count)
+    starts = reader.read_array("H", count)
+    ends = reader.read_array("H", count)
+    masks = reader.read_array("B", count)
+    offsets = reader.read_array("I", count + 1)
+    names = bytes(reader.read_bytes(names_size))
+    names = [names[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(count)]
+    if version >= 2:
+        afters = reader.read_array("i", count)
+        durations = reader.read_array("H", count)
+    else:
+        # version 1 didn't have dependencies, tasks are loaded as fixed time tasks
+        afters = [-1] * count
+        durations = [0] * count
+
+    tasks = {}
+    task_ids = {}
+    task_names = [None] * ids_size
+    dependents = {}
+    for i, name in enumerate(names):
+        if afters[i] == -1:
+            task = Task(name, starts[i], ends[i], masks[i] & 0x7F)
+        else:
+            after = names[afters[i]]
+            task = Task(
+                name,
+                starts[i],
+                ends[i],
+                masks[i] & 0x7F,
+                after,
+                durations[i],
+                bool(masks[i] & FOLLOW_DAYS_BIT),
+            )
+            dependents.setdefault(after, []).append(name)
+        tasks[name] = task
+        if ids[i]:
+            task_ids[name] = ids[i]
+            task_names[ids[i]] = name
+
+    occupancy = Occupancy()
+    occupancy.cells = reader.read_array("I", 7 * DAY_MINUTES)
+    occupancy.masks = [
+        int.from_bytes(reader.read_bytes(MASK_BYTES), "little") for _ in range(7)
+    ]
+
+    reserved_counts = reader.read_array("I", 7)
+    reserved = []
+    for n in reserved_counts:
+        day = DayReserved()
+        day_starts = reader.read_array("H", n)
+        day_ends = reader.read_array("H", n)
+        day_ids = reader.read_array("I", n)
+        # entries are saved sorted, so they are used as they are
+        day.entries = [[s, e, task_names[i]] for s, e, i in zip(day_starts, day_ends, day_ids) if s != e]
+        if len(day.entries) != n:
+            # empty parts of tasks which end at 00:00 (saved before they were skipped) break sorted order
+            day.starts = [e[0] for e in day.entries]
+        else:
+            day.starts = day_starts.tolist()
+        reserved.append(day)
+
+    dated = DatedIndex()
+    if version >= 3:
+        n = reader.read_array("I", 1)[0]
+        indexes = reader.read_array("I", n)
+        dated_starts = reader.read_array("I", n)
+        untils = reader.read_array("I", n)
+        intervals = reader.read_array("B", n)
+        counts = reader.read_array("I", n)
+        exceptions = reader.read_array("I", sum(counts))
+        pos = 0
+        for i, start, until, interval, count in zip(indexes, dated_starts, untils, intervals, counts):
+            recurrence = Recurrence(start, until or None, interval, frozenset(exceptions[pos : pos + count]))
+            pos += count
+            task = tasks[names[i]] = replace(tasks[names[i]], recurrence=recurrence)
+            dated.add(task)
+
+    if version >= 4:
+        # tasks are just made, so they are changed in place
+        for name, code in zip(names, reader.read_array("I", count)):
+            if code:
+                tasks[name].day_names = decode_day_names(code)
+
+    interpreter.tasks = tasks
+    interpreter.dated = dated
+    interpreter.dependents = dependents
+    interpreter.task_ids = task_ids
+    interpreter.task_names = task_names
+    interpreter.occupancy = occupancy
+    interpreter.reserved = reserved
@@ -0,0 +1,86 @@
+import json
+from time import perf_counter
+
+
+class Stats:
+    """Profile of an interpreter, it's opt-in: Interpreter(stats=Stats()) or --profile in command line.
+    * Time of each phase (lex, parse, check) and each statement type (TaskSt, RenameTask, Print, ...) is recorded
+    as frames, each frame is path of its parents and itself (like "run;TaskSt"), so it can be exported as folded stacks for flamegraph.
+    * Counters are number of things which are done in hot paths, like conflict comparisons and reserved entries touched.
+    * It's not thread safe, only one thread should run statements of a profiled interpreter.
+
+    Usage:
+        with stats.time("parse"):
+            ...
+        stats.count("conflict_comparisons")"""
+
+    __slots__ = ("frames", "stack", "counters")
+
+    def __init__(self):
+        # Key: path of frame, Value: [calls, total seconds, self seconds (without children)]
+        self.frames = {}
+        # frames which are running, each one is [path, calls, start time, seconds of children]
+        self.stack = []
+        # Key: counter name, Value: count
+        self.counters = {}
+
+    def time(self, name: str, calls: int = 1):
+        """start a frame, it ends at end of with block. calls is number of statements which are done in it (like a batch of tasks)"""
+        path = f"{self.stack[-1][0]};{name}" if self.stack else name
+        self.stack.append([path, calls, perf_counter(), 0.0])
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        path, calls, start, children = self.stack.pop()
+        elapsed = perf_counter() - start
+        frame = self.frames.get(path)
+        if frame is None:
+            frame = self.frames[path] = [0, 0.0, 0.0]
+        frame[0] += calls
+        frame[1] += elapsed
+        frame[2] += elapsed - children
+        if self.stack:
+            self.stack[-1][3] += elapsed
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def phases(self) -> dict:
+        """return calls and total time of each frame name wherever it is (like all TaskSt statements), sorted by time"""
+        phases = {}
+        for path, (calls, total, _) in self.frames.items():
+            names = path.split(";")
+            # frame inside a frame with same name is already in time of outer one
+            if names[-1] in names[:-1]:
+                continue
+            phase = phases.setdefault(names[-1], {"calls": 0, "time": 0.0})
+            phase["calls"] += calls
+            phase["time"] += total
+        return dict(sorted(phases.items(), key=lambda item: -item[1]["time"]))
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": self.phases(),
+            "frames": {
+                path: {"calls": calls, "time": total, "self_time": own}
+                for path, (calls, total, own) in self.frames.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_folded(self) -> str:
+        """return frames as folded stacks (one "path self-microseconds" line for each frame), input of flamegraph.pl and speedscope"""
+        return "".join(f"{path} {round(own * 1e6)}\n" for path, (_, _, own) in self.frames.items())
+
+    def write(self, path: str, format: str = "json"):
+        """write profile to a file, format is json or folded (see to_folded)"""
+        if format not in ("json", "folded"):
+            raise RuntimeError(f"Profile format is invalid!!! got {format}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json() + "\n" if format == "json" else self.to_folded())
@@ -0,0 +1,24 @@
+import io
+import os
+import sys
+
+import pytest
+
+# modules of src import each other by their names (like python src/interpreter.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from interpreter import Interpreter  # noqa: E402
+from lexer import tokenize  # noqa: E402
+from parser import Parser  # noqa: E402
+
+
+def run(interpreter: Interpreter, code: str) -> str:
+    """run code like one REPL input, return printed text"""
+    interpreter.out = io.StringIO()
+    interpreter.run(Parser(tokenize(code)).parse_program())
+    return interpreter.out.getvalue()
+
+
+@pytest.fixture
+def interpreter() -> Interpreter:
+    return Interpreter(io.StringIO())
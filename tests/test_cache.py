@@ -0,0 +1,141 @@
+import marshal
+import os
+
+import pytest
+
+import cache
+import parser as ast
+from cache import decode_node, encode_node, evict, get_cache_key, load_program
+from lexer import tokenize
+from parser import Parser
+
+# every statement type, and every optional part of them
+SCRIPT = """
+check
+task "A" from 08:00 to 09:00 in monday and friday
+task "B" at 09:30 duration 00:15 in tuesday
+task "C" duration 01:00 after "A"
+monday { task "D" duration 00:30 after "B" }
+task "E" duration 02:00 flexible in monday and wednesday between 09:00 and 17:00
+task "F" from 18:00 to 19:00 every monday and friday from 2026-01-05 until 2026-06-30 except 2026-04-03 and 2026-04-10
+task "G" from 10:00 to 12:00 every other tuesday from 2026-01-06
+update task "A" from 07:00 to 08:00 in sunday
+rename task "B" to "B2"
+undo
+redo
+print task "A"
+print today
+print monday from 10:00 to 12:00
+print 2026-01-05 until 2026-01-11
+find 01:30 free in monday and friday
+find all 01:30 free in monday between 08:00 and 18:00
+draw
+draw to "week.png"
+save "week.snapshot"
+load "week.snapshot"
+export to "week.csv"
+import "team.csv"
+"""
+
+
+@pytest.fixture
+def parses(monkeypatch) -> list:
+    """number of scripts which are lexed and parsed (not loaded from cache), as a list of their code"""
+    codes = []
+
+    def counting_tokenize(code, *args):
+        codes.append(code)
+        return tokenize(code, *args)
+
+    monkeypatch.setattr(cache, "tokenize", counting_tokenize)
+    return codes
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "week.schedu"
+    path.write_text(SCRIPT, encoding="utf-8")
+    return path
+
+
+def cached_files(cache_dir) -> list:
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".sdc"))
+
+
+def test_node_round_trip_of_every_statement():
+    statements = Parser(tokenize(SCRIPT)).parse_program().statements
+    types = {type(st).__name__ for st in statements}
+    assert types == {"Check", "TaskSt", "RenameTask", "Undo", "Redo", "Print", "Find", "Draw", "Save", "Load", "Export", "Import"}
+    # nested nodes (time and every of tasks) and lists (days and exceptions) are kept too
+    encoded = marshal.loads(marshal.dumps([encode_node(st) for st in statements]))
+    assert [decode_node(st) for st in encoded] == statements
+    assert all(type(v) is not tuple for st in statements for v in vars(st).values())
+    assert isinstance(decode_node(encode_node(statements[6])).every, ast.Every)
+
+
+def test_cache_hit_skip_lexer_and_parser(script, tmp_path, parses):
+    first = load_program(str(script), str(tmp_path / "cache"))
+    second = load_program(str(script), str(tmp_path / "cache"))
+    assert len(parses) == 1
+    assert second == first == Parser(tokenize(SCRIPT)).parse_program()
+
+
+def test_cache_dir_is_next_to_script(script, tmp_path, monkeypatch):
+    monkeypatch.delenv("SCHEDU_CACHE_DIR", raising=False)
+    load_program(str(script))
+    assert len(cached_files(tmp_path / cache.CACHE_DIR_NAME)) == 1
+
+
+def test_changed_script_is_parsed_again(script, tmp_path, parses):
+    load_program(str(script), str(tmp_path / "cache"))
+    script.write_text(SCRIPT + 'task "H" from 20:00 to 21:00 in monday\n', encoding="utf-8")
+    program = load_program(str(script), str(tmp_path / "cache"))
+    assert len(parses) == 2
+    assert program.statements[-1].name == "H"
+    assert len(cached_files(tmp_path / "cache")) == 2
+
+
+def test_new_parser_version_is_parsed_again(script, tmp_path, parses, monkeypatch):
+    load_program(str(script), str(tmp_path / "cache"))
+    key = get_cache_key(SCRIPT.encode())
+    monkeypatch.setattr(cache, "PARSER_VERSION", ast.PARSER_VERSION + 1)
+    assert get_cache_key(SCRIPT.encode()) != key
+    load_program(str(script), str(tmp_path / "cache"))
+    assert len(parses) == 2
+
+
+@pytest.mark.parametrize("data", [b"", b"not a cache", marshal.dumps([("NoSuchNode", 1)])])
+def test_broken_cache_file_is_replaced(script, tmp_path, parses, data):
+    program = load_program(str(script), str(tmp_path / "cache"))
+    (path,) = cached_files(tmp_path / "cache")
+    (tmp_path / "cache" / path).write_bytes(data)
+    assert load_program(str(script), str(tmp_path / "cache")) == program
+    assert len(parses) == 2
+    # it's written again, so next load is a hit
+    assert load_program(str(script), str(tmp_path / "cache")) == program
+    assert len(parses) == 2
+
+
+def test_evict_remove_least_recently_used(tmp_path):
+    for i, name in enumerate(["old", "used", "new"]):
+        path = tmp_path / f"{name}.sdc"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    (tmp_path / "other.txt").write_bytes(b"x" * 1000)
+    # a hit update time of file, so it's kept
+    os.utime(tmp_path / "used.sdc", (2000, 2000))
+    evict(str(tmp_path), 250)
+    assert sorted(os.listdir(tmp_path)) == ["new.sdc", "other.txt", "used.sdc"]
+    evict(str(tmp_path), 100)
+    assert sorted(os.listdir(tmp_path)) == ["other.txt", "used.sdc"]
+
+
+def test_load_evict_old_programs(script, tmp_path):
+    load_program(str(script), str(tmp_path / "cache"))
+    (old,) = cached_files(tmp_path / "cache")
+    os.utime(tmp_path / "cache" / old, (1000, 1000))
+    script.write_text(SCRIPT + "undo\n", encoding="utf-8")
+    size = os.path.getsize(tmp_path / "cache" / old)
+    load_program(str(script), str(tmp_path / "cache"), max_size=size + 10)
+    (new,) = cached_files(tmp_path / "cache")
+    assert new != old
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from check import find_conflicts, week_intervals
+from conftest import run
+from lexer import tokenize
+from models import Task
+from parser import Parser
+
+
+def check(interpreter, code: str) -> list[str]:
+    return interpreter.check(Parser(tokenize(code)).parse_program().statements)
+
+
+def test_check_report_every_conflict(interpreter):
+    report = check(
+        interpreter,
+        'task "A" from 08:00 to 09:00 in monday\n'
+        'task "B" from 08:30 to 09:30 in monday\n'
+        'task "C" from 23:00 to 01:00 in sunday\n'
+        'task "D" from 00:30 to 02:00 in monday\n',
+    )
+    # conflicts are reported in order of time in week
+    assert report == [
+        "line 4: 'D' have conflict with 'C' (line 3) in monday from 00:30 to 01:00",
+        "line 2: 'B' have conflict with 'A' (line 1) in monday from 08:30 to 09:00",
+    ]
+
+
+def test_check_follow_updates_and_undo(interpreter):
+    report = check(
+        interpreter,
+        'task "A" from 08:00 to 09:00 in monday\n'
+        'update task "A" from 10:00 to 11:00\n'
+        'task "B" from 08:00 to 09:00 in monday\n'
+        "undo\n"
+        "undo\n"
+        'task "C" from 08:30 to 09:30 in monday\n',
+    )
+    # second undo revert update, so A is back at 08:00 from line 5 when C is added
+    assert report == ["line 6: 'C' have conflict with 'A' (line 5) in monday from 08:30 to 09:00"]
+
+
+def test_program_with_check_is_not_run_when_it_has_conflict(interpreter):
+    with pytest.raises(RuntimeError, match="have conflict"):
+        run(interpreter, 'check task "A" from 08:00 to 09:00 in monday task "B" from 08:30 to 09:30 in monday')
+    assert interpreter.tasks == {}
+
+
+def test_check_run_same_as_interpreter(interpreter):
+    code = 'task "A" from 08:00 to 09:00 in monday\ntask "B" from 09:00 to 10:00 in monday\nundo\nredo\n'
+    assert check(interpreter, code) == []
+    run(interpreter, code)
+    assert list(interpreter.tasks) == ["A", "B"]
+
+
+def test_check_many_updates_of_one_task(interpreter):
+    # old versions of A are at same time of week, but each version of B only live with one of them
+    code = 'task "A" from 08:00 to 09:00 in monday\n' + 'update task "A" from 10:00 to 11:00\nupdate task "A" from 08:00 to 09:00\n' * 1000
+    code += 'task "B" from 10:30 to 11:30 in monday\nupdate task "A" from 12:00 to 13:00\nupdate task "B" from 08:30 to 09:30\n'
+    # B never live with A at 10:00, and A is at 12:00 when B move to 08:30
+    assert check(interpreter, code) == []
+    code += 'update task "A" from 09:00 to 10:00\n'
+    assert check(interpreter, code) == ["line 2005: 'A' have conflict with 'B' (line 2004) in monday from 09:00 to 09:30"]
+
+
+def test_find_conflicts_same_as_brute_force():
+    random.seed(4)
+    tasks, lifetimes, identities = [], [], []
+    for _ in range(300):
+        start = random.randrange(0, 1440, 30)
+        tasks.append(Task("t", start, (start + random.randrange(30, 180, 30)) % 1440, random.randrange(1, 128)))
+        born = random.randrange(-1, 50)
+        lifetimes.append((born, random.randrange(born + 1, 52)))
+        identities.append(len(identities))
+    # later versions of a task start when its previous version die
+    for i in range(50, 300, 3):
+        identities[i] = identities[i - 1]
+        lifetimes[i] = (lifetimes[i - 1][1], max(lifetimes[i - 1][1] + 1, lifetimes[i][1]))
+    expected = set()
+    for i in range(len(tasks)):
+        for j in range(i + 1, len(tasks)):
+            if lifetimes[i][0] >= lifetimes[j][1] or lifetimes[j][0] >= lifetimes[i][1]:
+                continue
+            if any(s1 < e2 and s2 < e1 for s1, e1 in week_intervals(tasks[i]) for s2, e2 in week_intervals(tasks[j])):
+                expected.add((i, j))
+    conflicts = find_conflicts(tasks, lifetimes, identities)
+    assert {(i, j) for i, j, _, _ in conflicts} == expected
+    assert len(conflicts) == len(expected)
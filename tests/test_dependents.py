@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import run
+from interpreter import Interpreter
+
+CHAIN = """
+task "A" from 08:00 to 09:00 in monday
+task "B" duration 01:00 after "A"
+task "C" duration 00:30 after "B"
+"""
+
+
+def times(interpreter: Interpreter) -> dict:
+    return {name: (t.start, t.end, t.days, t.after) for name, t in interpreter.tasks.items()}
+
+
+@pytest.fixture
+def chain(interpreter) -> Interpreter:
+    """C is after B and B is after A"""
+    run(interpreter, CHAIN)
+    return interpreter
+
+
+def test_update_move_whole_chain(chain):
+    run(chain, 'update task "A" from 10:00 to 11:00')
+    assert times(chain) == {
+        "A": ("10:00", "11:00", ["monday"], None),
+        "B": ("11:00", "12:00", ["monday"], "A"),
+        "C": ("12:00", "12:30", ["monday"], "B"),
+    }
+    assert list(chain.reserved[2]) == [[600, 660, "A"], [660, 720, "B"], [720, 750, "C"]]
+    # whole chain is one change
+    run(chain, "undo")
+    assert times(chain)["C"] == ("10:00", "10:30", ["monday"], "B")
+    assert list(chain.reserved[2]) == [[480, 540, "A"], [540, 600, "B"], [600, 630, "C"]]
+
+
+def test_update_follow_days_of_chain(chain):
+    run(chain, 'update task "A" in friday and monday')
+    assert {name: t.days for name, t in chain.tasks.items()} == {name: ["friday", "monday"] for name in "ABC"}
+
+
+def test_update_is_rejected_when_a_dependent_has_conflict(chain):
+    run(chain, 'task "X" from 12:00 to 13:00 in monday')
+    before = times(chain)
+    with pytest.raises(RuntimeError, match="'C' have conflict with X in monday from 12:0 to 13:0"):
+        run(chain, 'update task "A" from 10:00 to 11:00')
+    # nothing is moved, not even tasks before the one which has conflict
+    assert times(chain) == before
+    assert list(chain.reserved[2]) == [[480, 540, "A"], [540, 600, "B"], [600, 630, "C"], [720, 780, "X"]]
+    assert chain.dependents == {"A": ["B"], "B": ["C"]}
+
+
+@pytest.mark.parametrize("parent", ["A", "B", "C"])
+def test_task_can_not_be_after_itself_or_its_dependents(chain, parent):
+    before = times(chain)
+    with pytest.raises(RuntimeError, match=f"Task A can't be after {parent}, because {parent} is after A"):
+        run(chain, f'update task "A" duration 01:00 after "{parent}"')
+    assert times(chain) == before
+
+
+def test_rename_keep_links(chain):
+    run(chain, 'rename task "A" to "A2"\nrename task "B" to "B2"')
+    assert chain.dependents == {"A2": ["B2"], "B2": ["C"]}
+    assert chain.tasks["B2"].after == "A2"
+    assert chain.tasks["C"].after == "B2"
+    # links of new names are followed by update
+    run(chain, 'update task "A2" from 14:00 to 15:00')
+    assert times(chain)["C"] == ("16:00", "16:30", ["monday"], "B2")
+    run(chain, "undo\nundo\nundo")
+    assert chain.dependents == {"A": ["B"], "B": ["C"]}
+    assert times(chain)["B"] == ("09:00", "10:00", ["monday"], "A")
@@ -0,0 +1,23 @@
+from conftest import run
+
+
+def test_find_free_time_after_midnight(interpreter):
+    run(interpreter, 'task "A" from 22:00 to 00:00 in monday')
+    assert run(interpreter, "find 00:30 free in monday between 22:00 and 02:00") == "tuesday from 00:00 to 02:00\n"
+
+
+def test_find_free_time_which_span_midnight(interpreter):
+    run(interpreter, 'task "A" from 20:00 to 23:00 in monday')
+    assert run(interpreter, "find 00:30 free in monday between 22:00 and 02:00") == "monday from 23:00 to 02:00\n"
+
+
+def test_find_all_free_times_of_window_which_cross_midnight(interpreter):
+    run(interpreter, 'task "A" from 22:00 to 23:00 in friday task "B" from 00:30 to 01:00 in saturday')
+    assert run(interpreter, "find all 00:30 free in friday between 21:00 and 02:00") == (
+        "friday from 21:00 to 22:00\nfriday from 23:00 to 00:30\nsaturday from 01:00 to 02:00\n"
+    )
+
+
+def test_find_without_free_time(interpreter):
+    run(interpreter, 'task "A" from 08:00 to 18:00 in monday')
+    assert run(interpreter, "find 01:00 free in monday between 09:00 and 17:00") == "No free time found.\n"
@@ -0,0 +1,137 @@
+from datetime import date
+
+import pytest
+
+from conftest import run
+from helpers import WEEK_DAYS
+from importer import IMPORT_CHUNK_SIZE
+from interpreter import Interpreter
+from journal import Journal
+from recurrence import day_index
+from stats import Stats
+
+SCRIPT = """
+task "Gym" from 07:00 to 08:00 in monday and friday
+task "Night shift" from 22:00 to 02:00 in saturday
+task "Standup" at 09:30 duration 00:15 in tuesday and wednesday
+task "Review" from 10:00 to 11:00 every other monday from 2026-01-05 until 2026-03-30 except 2026-02-02
+task "Course" from 18:00 to 20:00 every thursday from 2026-01-01
+"""
+
+
+def write_csv(path, rows: list[str]):
+    path.write_text("name,start,end,days\n" + "".join(row + "\n" for row in rows), encoding="utf-8")
+
+
+def tasks_of(interpreter: Interpreter) -> dict:
+    return {name: (t.start_minute, t.end_minute, t.day_mask, t.recurrence) for name, t in interpreter.tasks.items()}
+
+
+@pytest.mark.parametrize("extension", ["csv", "ics"])
+def test_export_and_import_round_trip(interpreter, tmp_path, extension):
+    run(interpreter, SCRIPT)
+    path = tmp_path / f"week.{extension}"
+    interpreter.export(str(path))
+    imported = Interpreter()
+    assert imported.import_tasks(str(path)) == len(interpreter.tasks)
+    assert tasks_of(imported) == tasks_of(interpreter)
+
+
+def test_csv_and_ics_round_trip(interpreter, tmp_path):
+    run(interpreter, SCRIPT)
+    interpreter.export(str(tmp_path / "week.ics"))
+    from_ics = Interpreter()
+    from_ics.import_tasks(str(tmp_path / "week.ics"))
+    from_ics.export(str(tmp_path / "week.csv"))
+    from_csv = Interpreter()
+    from_csv.import_tasks(str(tmp_path / "week.csv"))
+    assert tasks_of(from_csv) == tasks_of(interpreter)
+
+
+def test_weekly_tasks_start_from_given_date(interpreter, tmp_path):
+    from export import export_tasks
+
+    run(interpreter, 'task "Gym" from 22:30 to 00:30 in monday')
+    path = tmp_path / "week.ics"
+    # 2026-01-01 is a thursday
+    export_tasks(interpreter.tasks.values(), str(path), date(2026, 1, 1))
+    text = path.read_bytes().decode("utf-8")
+    assert "DTSTART:20260105T223000\r\n" in text
+    assert "DTEND:20260106T003000\r\n" in text
+    assert "RRULE:FREQ=WEEKLY;WKST=SA;BYDAY=MO\r\n" in text
+
+
+def test_conflict_error_has_line_of_row(interpreter, tmp_path):
+    path = tmp_path / "week.csv"
+    write_csv(path, ["A,08:00,09:00,monday", "B,08:30,09:30,monday", "C,10:00,11:00,monday"])
+    with pytest.raises(RuntimeError, match=r"^line 3: 'B' have conflict"):
+        interpreter.import_tasks(str(path))
+    assert interpreter.tasks == {}
+
+
+def test_conflict_with_a_task_of_schedule_has_line_of_row(interpreter, tmp_path):
+    run(interpreter, 'task "A" from 10:30 to 11:30 in monday')
+    path = tmp_path / "week.csv"
+    write_csv(path, ["B,08:00,09:00,monday", "C,10:00,11:00,monday"])
+    with pytest.raises(RuntimeError, match=r"^line 3: 'C' have conflict"):
+        interpreter.import_tasks(str(path))
+
+
+def test_invalid_row_has_its_line(interpreter, tmp_path):
+    path = tmp_path / "week.csv"
+    write_csv(path, ["A,08:00,09:00,monday", "B,25:00,09:30,monday"])
+    with pytest.raises(RuntimeError, match=r"^line 3: Time is invalid"):
+        interpreter.import_tasks(str(path))
+
+
+def test_chunks_before_invalid_chunk_stay_added(interpreter, tmp_path):
+    path = tmp_path / "week.csv"
+    write_csv(path, ["A,08:00,09:00,monday", "B,09:00,10:00,monday", "C,09:30,10:30,monday"])
+    with pytest.raises(RuntimeError, match=r"^line 4:"):
+        interpreter.import_tasks(str(path), chunk_size=2)
+    assert list(interpreter.tasks) == ["A", "B"]
+
+
+def test_undo_revert_a_chunk_and_journal_replay_same(tmp_path):
+    path = tmp_path / "week.csv"
+    write_csv(path, ["A,08:00,09:00,monday", "B,09:00,10:00,monday", "C,10:00,11:00,monday"])
+    journal_path = str(tmp_path / "week.journal")
+    interpreter = Interpreter()
+    interpreter.open_journal(Journal(journal_path))
+    run(interpreter, 'task "X" from 12:00 to 13:00 in monday')
+    interpreter.import_tasks(str(path), chunk_size=2)
+    run(interpreter, "undo")
+    assert list(interpreter.tasks) == ["X", "A", "B"]
+    run(interpreter, "undo")
+    assert list(interpreter.tasks) == ["X"]
+    run(interpreter, "redo")
+    interpreter.journal.close()
+
+    restored = Interpreter()
+    journal = Journal(journal_path)
+    restored.open_journal(journal)
+    journal.close()
+    assert list(restored.tasks) == ["X", "A", "B"]
+
+
+def test_import_a_chunk_of_single_dates(tmp_path):
+    # one task for each hour of each day, they are all dated tasks on only one date
+    first = date(2026, 1, 1).toordinal()
+    rows = []
+    for i in range(IMPORT_CHUNK_SIZE):
+        day = first + i // 24
+        rows.append(f"r{i},{i % 24:02d}:00,{i % 24:02d}:30,{WEEK_DAYS[day_index(day)]},{date.fromordinal(day)},{date.fromordinal(day)},,")
+    path = tmp_path / "year.csv"
+    path.write_text("name,start,end,days,from,until,interval,except\n" + "".join(row + "\n" for row in rows), encoding="utf-8")
+    interpreter = Interpreter(stats=Stats())
+    assert interpreter.import_tasks(str(path), chunk_size=IMPORT_CHUNK_SIZE // 4) == IMPORT_CHUNK_SIZE
+    # tasks of other chunks are only compared when they are in same week at same hour
+    assert interpreter.stats.counters["conflict_comparisons"] < 4 * IMPORT_CHUNK_SIZE
+    path.write_text(
+        "name,start,end,days,from,until,interval,except\n"
+        "early,08:30,09:00,sunday,2026-01-04,2026-01-04,,\n"
+        "late,08:15,08:45,monday,2026-01-05,2026-01-05,,\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(RuntimeError, match=r"^line 3: 'late' have conflict with r104 in monday 2026-01-05"):
+        interpreter.import_tasks(str(path))
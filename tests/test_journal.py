@@ -0,0 +1,172 @@
+import pytest
+
+from conftest import run
+from interpreter import Interpreter
+from journal import Journal
+
+
+def write_journal(path, body: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("schedu-journal 0\n" + body)
+
+
+def replay_open(path) -> Interpreter:
+    """return interpreter which is restored from journal and record to it"""
+    interpreter = Interpreter()
+    interpreter.open_journal(Journal(str(path), sync="always"))
+    return interpreter
+
+
+def replay(path) -> Interpreter:
+    """return interpreter which is restored from journal, without recording to it"""
+    interpreter = replay_open(path)
+    interpreter.journal.close()
+    interpreter.journal = None
+    return interpreter
+
+
+def test_truncated_tail_keeps_complete_lines(tmp_path):
+    path = tmp_path / "week.journal"
+    write_journal(
+        path,
+        'task "A" from 08:00 to 09:00 in monday\n'
+        'task "B" from 09:00 to 10:00 in monday\n'
+        'task "C" from 12:00 to 1',
+    )
+    assert list(replay(path).tasks) == ["A", "B"]
+
+
+def test_line_without_line_break_is_not_complete(tmp_path):
+    path = tmp_path / "week.journal"
+    # last line is valid, but its line break was not written
+    write_journal(path, 'task "A" from 08:00 to 09:00 in monday\ntask "B" from 09:00 to 10:00 in monday')
+    assert list(replay(path).tasks) == ["A"]
+
+
+def test_unclosed_name_is_not_complete(tmp_path):
+    path = tmp_path / "week.journal"
+    write_journal(path, 'task "A" from 08:00 to 09:00 in monday\ntask "B fr')
+    assert list(replay(path).tasks) == ["A"]
+
+
+def test_changes_after_truncated_tail_are_kept(tmp_path):
+    path = tmp_path / "week.journal"
+    write_journal(path, 'task "A" from 08:00 to 09:00 in monday\ntask "B" from 09:0')
+    interpreter = replay_open(path)
+    run(interpreter, 'task "C" from 11:00 to 12:00 in monday')
+    interpreter.journal.close()
+    assert list(replay(path).tasks) == ["A", "C"]
+
+
+def test_undo_after_separate_tasks(tmp_path):
+    path = tmp_path / "week.journal"
+    interpreter = replay_open(path)
+    run(interpreter, 'task "A" from 08:00 to 09:00 in monday')
+    run(interpreter, 'task "B" from 09:00 to 10:00 in monday')
+    run(interpreter, "undo")
+    assert list(interpreter.tasks) == ["A"]
+    interpreter.journal.close()
+    assert list(replay(path).tasks) == ["A"]
+
+
+def test_undo_after_batch_of_tasks(tmp_path):
+    path = tmp_path / "week.journal"
+    interpreter = replay_open(path)
+    run(interpreter, 'task "A" from 07:00 to 08:00 in monday')
+    # tasks of one input are added together, so one undo remove both of them
+    run(interpreter, 'task "B" from 08:00 to 09:00 in monday task "C" from 09:00 to 10:00 in monday')
+    run(interpreter, "undo")
+    assert list(interpreter.tasks) == ["A"]
+    interpreter.journal.close()
+    restored = replay(path)
+    assert list(restored.tasks) == ["A"]
+    run(restored, "redo")
+    assert list(restored.tasks) == ["A", "B", "C"]
+
+
+def test_undo_and_redo_after_replay(tmp_path):
+    path = tmp_path / "week.journal"
+    interpreter = replay_open(path)
+    run(interpreter, 'task "A" from 08:00 to 09:00 in monday')
+    run(interpreter, 'task "B" from 09:00 to 10:00 in monday')
+    run(interpreter, 'rename task "B" to "C"')
+    interpreter.journal.close()
+    restored = replay(path)
+    run(restored, "undo")
+    assert list(restored.tasks) == ["A", "B"]
+    run(restored, "undo")
+    assert list(restored.tasks) == ["A"]
+
+
+def test_replay_from_checkpoint_and_lines_after_it(tmp_path):
+    path = tmp_path / "week.journal"
+    interpreter = Interpreter()
+    interpreter.open_journal(Journal(str(path), checkpoint_every=2))
+    for i in range(5):
+        run(interpreter, f'task "T{i}" from {8 + i:02d}:00 to {9 + i:02d}:00 in monday')
+    interpreter.journal.close()
+    # checkpoint has first 4 tasks and journal has the last one
+    assert (tmp_path / "week.journal.2.checkpoint").exists()
+    assert not (tmp_path / "week.journal.1.checkpoint").exists()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('task "T5" from 14:00 to 15')
+    assert list(replay(path).tasks) == [f"T{i}" for i in range(5)]
+
+
+def test_not_a_journal(tmp_path):
+    path = tmp_path / "week.journal"
+    path.write_text("something else\n", encoding="utf-8")
+    with pytest.raises(RuntimeError, match="not a schedu journal"):
+        Journal(str(path))
+
+
+def test_after_task_of_day_block_is_replayed(tmp_path):
+    path = tmp_path / "week.journal"
+    interpreter = replay_open(path)
+    run(interpreter, 'monday { task "A" from 10:00 to 11:00 task "B" duration 01:00 after "A" }')
+    run(interpreter, 'task "C" from 12:00 to 13:00 in friday')
+    expected = {name: repr(task) for name, task in interpreter.tasks.items()}
+    interpreter.journal.close()
+    assert {name: repr(task) for name, task in replay(path).tasks.items()} == expected
+
+
+def test_complete_line_which_cant_be_parsed_is_an_error(tmp_path):
+    path = tmp_path / "week.journal"
+    body = 'task "A" from 08:00 to 09:00 in monday\ntask "B" from 09:00 to\ntask "C" from 10:00 to 11:00 in monday\n'
+    write_journal(path, body)
+    with pytest.raises(RuntimeError, match="line 3"):
+        replay(path)
+    # nothing is cut from journal
+    assert path.read_text(encoding="utf-8") == "schedu-journal 0\n" + body
+
+
+def read_journal(path) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("sync", ["always", "batch", "never"])
+def test_changes_are_written_at_once(tmp_path, sync):
+    path = tmp_path / "week.journal"
+    interpreter = Interpreter()
+    interpreter.open_journal(Journal(str(path), sync=sync, interval=3600))
+    run(interpreter, 'task "A" from 08:00 to 09:00 in monday')
+    # journal is not closed, a crash of process now must not lose the change
+    assert 'task "A"' in read_journal(path)
+    interpreter.journal.close()
+
+
+def test_batch_sync_when_idle(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr("journal.os.fsync", synced.append)
+    journal = Journal(str(tmp_path / "week.journal"), sync="batch", batch_size=100, interval=3600)
+    interpreter = Interpreter()
+    interpreter.open_journal(journal)
+    run(interpreter, 'task "A" from 08:00 to 09:00 in monday')
+    assert synced == [] and journal.unsynced == 1
+    journal.idle()
+    assert len(synced) == 1 and journal.unsynced == 0
+    # nothing new to sync
+    journal.idle()
+    assert len(synced) == 1
+    journal.close()
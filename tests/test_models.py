@@ -0,0 +1,36 @@
+from conftest import run
+from interpreter import Interpreter
+from models import Task
+
+
+def test_repr_keep_days_as_written(interpreter):
+    assert run(interpreter, 'task "A" from 08:00 to 09:00 in Friday and monday print task "A"') == (
+        "Task > A\t From 08:00 To 09:00 in ['friday', 'monday']\n"
+    )
+
+
+def test_days_follow_updated_days(interpreter):
+    run(interpreter, 'task "A" from 08:00 to 09:00 in friday and monday')
+    run(interpreter, 'update task "A" in sunday and saturday')
+    assert interpreter.tasks["A"].days == ["sunday", "saturday"]
+    run(interpreter, "undo")
+    assert interpreter.tasks["A"].days == ["friday", "monday"]
+
+
+def test_days_of_after_task_follow_its_task(interpreter):
+    run(interpreter, 'task "A" from 22:00 to 01:00 in friday and monday task "B" duration 01:00 after "A"')
+    assert interpreter.tasks["B"].days == ["saturday", "tuesday"]
+
+
+def test_days_without_names_are_in_week_order():
+    assert Task("A", 0, 60, 0b1000100).days == ["monday", "friday"]
+    # names which are not days of task anymore are not used
+    assert Task("A", 0, 60, 0b0000100, day_names=("friday", "monday")).days == ["monday"]
+
+
+def test_days_are_kept_in_snapshot(interpreter, tmp_path):
+    run(interpreter, 'task "A" from 08:00 to 09:00 in friday and monday and saturday')
+    interpreter.save(str(tmp_path / "week.snapshot"))
+    loaded = Interpreter()
+    loaded.load(str(tmp_path / "week.snapshot"))
+    assert loaded.tasks["A"].days == ["friday", "monday", "saturday"]
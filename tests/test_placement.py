@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import run
+from interpreter import Interpreter
+from journal import Journal
+
+
+def placed(interpreter, name: str) -> tuple:
+    task = interpreter.tasks[name]
+    return task.start, task.end, task.days
+
+
+def test_flexible_task_after_midnight_is_on_tomorrow(interpreter):
+    run(interpreter, 'task "A" from 22:00 to 00:00 in monday')
+    run(interpreter, 'task "X" duration 00:30 flexible in monday between 22:00 and 02:00')
+    assert placed(interpreter, "X") == ("00:00", "00:30", ["tuesday"])
+
+
+def test_flexible_tasks_of_a_batch_after_midnight_dont_overlap(interpreter):
+    run(interpreter, 'task "A" from 22:00 to 00:00 in monday')
+    run(
+        interpreter,
+        'task "X" duration 00:30 flexible in monday between 22:00 and 02:00 '
+        'task "Y" duration 00:30 flexible in monday between 22:00 and 02:00',
+    )
+    assert sorted([placed(interpreter, "X"), placed(interpreter, "Y")]) == [
+        ("00:00", "00:30", ["tuesday"]),
+        ("00:30", "01:00", ["tuesday"]),
+    ]
+
+
+def test_flexible_task_placed_at_end_of_day_span_midnight(interpreter):
+    run(interpreter, 'task "A" from 00:00 to 23:30 in monday')
+    run(interpreter, 'task "X" duration 01:00 flexible in monday between 23:00 and 02:00')
+    assert placed(interpreter, "X") == ("23:30", "00:30", ["monday"])
+
+
+def test_flexible_task_after_midnight_is_restored_from_journal(tmp_path):
+    path = str(tmp_path / "week.journal")
+    interpreter = Interpreter()
+    interpreter.open_journal(Journal(path))
+    run(interpreter, 'task "A" from 22:00 to 00:00 in monday')
+    run(interpreter, 'task "X" duration 00:30 flexible in monday between 22:00 and 02:00')
+    interpreter.journal.close()
+
+    restored = Interpreter()
+    journal = Journal(path)
+    restored.open_journal(journal)
+    journal.close()
+    assert placed(restored, "X") == ("00:00", "00:30", ["tuesday"])
+
+
+def test_flexible_task_without_free_time(interpreter):
+    run(interpreter, 'task "A" from 22:00 to 02:00 in monday')
+    with pytest.raises(RuntimeError, match="no free time"):
+        run(interpreter, 'task "X" duration 00:30 flexible in monday between 22:00 and 02:00')
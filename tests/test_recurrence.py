@@ -0,0 +1,122 @@
+import io
+import random
+from datetime import date
+
+import pytest
+
+from conftest import run
+from interpreter import Interpreter
+from models import Task
+from recurrence import Recurrence, find_conflict, occurrences
+from reserved import DatedIndex
+from stats import Stats
+
+START = date(2026, 1, 1).toordinal()
+
+
+def test_occurrences_of_every_other_week():
+    # 2026-01-05 is a monday, weeks start at saturday
+    rule = Recurrence(date(2026, 1, 5).toordinal(), date(2026, 2, 16).toordinal(), 2, frozenset([date(2026, 2, 2).toordinal()]))
+    assert [date.fromordinal(o).isoformat() for o in occurrences(rule, 1 << 2)] == [
+        "2026-01-05",
+        "2026-01-19",
+        "2026-02-16",
+    ]
+
+
+def test_occurrences_of_a_window_of_endless_recurrence():
+    rule = Recurrence(START)
+    first = date(2030, 6, 1).toordinal()
+    found = list(occurrences(rule, 0x7F, first, first + 6))
+    assert found == list(range(first, first + 7))
+
+
+def brute_force(a: Task, b: Task, days: int):
+    """first overlap of two tasks by expanding each minute of their occurrences"""
+    def minutes(task):
+        rule = task.recurrence
+        length = (task.end_minute - task.start_minute) % 1440
+        result = set()
+        for o in occurrences(rule, task.day_mask, START, START + days):
+            base = (o - START) * 1440 + task.start_minute
+            result.update(range(base, base + length))
+        return result
+
+    common = minutes(a) & minutes(b)
+    return min(common) if common else None
+
+
+def random_task(rng: random.Random, name: str) -> Task:
+    start = rng.randrange(0, 1440, 30)
+    end = (start + rng.choice((30, 60, 120, 300, 900))) % 1440
+    first = START + rng.randrange(14)
+    until = first + rng.randrange(60)
+    exceptions = frozenset(first + rng.randrange(60) for _ in range(rng.randrange(3)))
+    rule = Recurrence(first, until, rng.choice((1, 2)), exceptions)
+    return Task(name, start, end, rng.randrange(1, 128), recurrence=rule)
+
+
+def test_find_conflict_is_same_as_brute_force():
+    rng = random.Random(1)
+    for _ in range(200):
+        a = random_task(rng, "a")
+        b = random_task(rng, "b")
+        # tasks end in 74 days, so 80 days cover all of them
+        found = find_conflict(a, b)
+        expected = brute_force(a, b, 80)
+        assert (found is None) == (expected is None)
+        if found is not None:
+            assert (found[0] - START) * 1440 + found[1] == expected
+
+
+def test_dated_index_only_skips_tasks_which_never_overlap():
+    rng = random.Random(2)
+    index = DatedIndex()
+    tasks = [random_task(rng, f"t{i}") for i in range(200)]
+    for task in tasks:
+        index.add(task)
+    for task in tasks[:50]:
+        candidates = index.candidates(task)
+        # candidates are in order they are added, and every task which overlap on a date is in them
+        assert candidates == sorted(candidates, key=tasks.index)
+        for other in tasks:
+            if find_conflict(task, other) is not None:
+                assert other in candidates
+
+
+def test_dated_conflict_is_checked_with_index():
+    interpreter = Interpreter(io.StringIO(), stats=Stats())
+    names = [f"t{h}" for h in range(0, 24, 2)]
+    run(interpreter, "".join(f'task "t{h}" from {h:02d}:00 to {h:02d}:30 every monday from 2026-01-05 until 2026-06-01\n' for h in range(0, 24, 2)))
+    before = interpreter.stats.counters["conflict_comparisons"]
+    # only dated tasks at same time of week are compared
+    run(interpreter, 'task "Lunch" from 12:00 to 13:00 every sunday from 2026-01-04')
+    assert interpreter.stats.counters["conflict_comparisons"] - before < 5
+    with pytest.raises(RuntimeError, match="'Late' have conflict with t14 in monday 2026-05-25"):
+        run(interpreter, 'task "Late" from 14:15 to 15:00 every monday from 2026-05-25')
+    run(interpreter, 'task "After" from 14:15 to 15:00 every monday from 2026-06-02')
+    run(interpreter, 'rename task "After" to "Later"\nundo\nundo')
+    assert list(interpreter.dated) == names + ["Lunch"]
+    assert index_names(interpreter.dated) == set(interpreter.dated)
+
+
+def test_batch_of_dated_tasks_is_checked_with_index(interpreter):
+    with pytest.raises(RuntimeError, match="have conflict"):
+        run(
+            interpreter,
+            'task "A" from 08:00 to 09:00 every monday from 2026-01-05\n'
+            'task "B" from 20:00 to 21:00 in monday\n'
+            'task "C" from 08:30 to 10:00 every other monday from 2026-02-02\n',
+        )
+    assert interpreter.tasks == {}
+    # every other week from different weeks never meet
+    run(
+        interpreter,
+        'task "A" from 08:00 to 09:00 every other monday from 2026-01-05\n'
+        'task "C" from 08:30 to 10:00 every other monday from 2026-01-12\n',
+    )
+    assert list(interpreter.dated) == ["A", "C"]
+
+
+def index_names(index: DatedIndex) -> set:
+    return set().union(*index.buckets)
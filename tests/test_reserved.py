@@ -0,0 +1,110 @@
+import pytest
+
+from conftest import run
+from interpreter import Interpreter
+from reserved import DayReserved
+
+SETUP = 'task "C" from 00:00 to 01:00 in tuesday\ntask "B" from 23:00 to 00:00 in monday'
+
+
+def sorted_index(interpreter: Interpreter) -> bool:
+    """entries of each day never overlap and are sorted by start and end"""
+    for day in interpreter.reserved:
+        entries = list(day)
+        if day.starts != [e[0] for e in entries]:
+            return False
+        for (s1, e1, _), (s2, e2, _) in zip(entries, entries[1:]):
+            if not (s1 < e1 <= s2 < e2):
+                return False
+    return True
+
+
+@pytest.fixture
+def midnight(interpreter) -> Interpreter:
+    """a task which end at 00:00 and a task which start at 00:00 on its tomorrow"""
+    run(interpreter, SETUP)
+    return interpreter
+
+
+def test_task_which_end_at_midnight_has_nothing_on_tomorrow(midnight):
+    assert list(midnight.reserved[3]) == [[0, 60, "C"]]
+    assert list(midnight.reserved[2]) == [[1380, 1440, "B"]]
+    assert sorted_index(midnight)
+
+
+def test_conflict_after_task_which_end_at_midnight(midnight):
+    with pytest.raises(RuntimeError, match="'E' have conflict with C in tuesday"):
+        run(midnight, 'task "E" from 00:10 to 00:20 in tuesday')
+
+
+def test_find_after_task_which_end_at_midnight(midnight):
+    assert run(midnight, "find 00:30 free in tuesday") == "tuesday from 01:00 to 00:00\n"
+
+
+def test_print_after_task_which_end_at_midnight(midnight):
+    assert run(midnight, "print tuesday from 00:00 to 00:45") == "Task > C\t From 00:00 To 01:00 in ['tuesday']\n"
+
+
+def test_flexible_after_task_which_end_at_midnight(midnight):
+    run(midnight, 'task "X" duration 00:30 flexible in monday between 23:00 and 02:00')
+    assert (midnight.tasks["X"].start, midnight.tasks["X"].days) == ("01:00", ["tuesday"])
+
+
+def test_update_and_undo_keep_index_sorted(midnight):
+    run(midnight, 'update task "B" from 22:00 to 00:00')
+    run(midnight, 'update task "C" from 00:00 to 02:00')
+    run(midnight, "undo")
+    run(midnight, "undo")
+    run(midnight, 'rename task "B" to "D"')
+    assert list(midnight.reserved[2]) == [[1380, 1440, "D"]]
+    assert sorted_index(midnight)
+
+
+@pytest.mark.parametrize(
+    "code, message",
+    [
+        (
+            'task "A" from 10:00 to 11:00 in monday\ntask "B" from 10:30 to 11:30 in monday',
+            "'B' have conflict with A in monday from 10:0 to 11:0!!!",
+        ),
+        (
+            'task "A" from 22:00 to 02:00 in friday\ntask "B" from 01:00 to 03:00 in saturday',
+            "'B' have conflict with A in saturday from 0:0 to 2:0!!!",
+        ),
+    ],
+)
+def test_conflict_in_batch_report_reserved_time(interpreter, code, message):
+    # a batch report same reserved time of older task as tasks which are added one by one
+    with pytest.raises(RuntimeError) as batch:
+        run(interpreter, code)
+    with pytest.raises(RuntimeError) as one_by_one:
+        for line in code.splitlines():
+            run(interpreter, line)
+    assert str(batch.value) == str(one_by_one.value) == message
+
+
+def test_day_reserved_lookups():
+    day = DayReserved()
+    for s, e, name in [(600, 660, "b"), (0, 60, "a"), (1380, 1440, "c")]:
+        day.insert(s, e, name)
+    assert day.starts == [0, 600, 1380]
+    assert day.overlap(30, 90) == [0, 60, "a"]
+    assert day.overlap(60, 600) is None
+    assert day.between(50, 620) == [[0, 60, "a"], [600, 660, "b"]]
+    assert list(day.gaps(0, 1440)) == [(60, 600), (660, 1380)]
+    assert list(day.gaps(620, 700)) == [(660, 700)]
+    day.rename(600, "b", "d")
+    day.remove(0, "a")
+    assert list(day) == [[600, 660, "d"], [1380, 1440, "c"]]
+    assert day.find(0, "a") == -1
+
+
+def test_empty_entries_of_old_snapshots_are_dropped(midnight, tmp_path):
+    # snapshots which are saved before empty parts were skipped have them after entries which start at 00:00
+    midnight.reserved[3].insert(0, 0, "B")
+    path = str(tmp_path / "week.snapshot")
+    midnight.save(path)
+    loaded = Interpreter()
+    loaded.load(path)
+    assert list(loaded.reserved[3]) == [[0, 60, "C"]]
+    assert sorted_index(loaded)
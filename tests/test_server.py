@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from server import Server
+
+
+def request(server: Server, session: str, code: str) -> dict:
+    return server.handle(json.dumps({"session": session, "code": code}).encode("utf-8"))
+
+
+@pytest.mark.parametrize(
+    "code",
+    ['save "/tmp/x.snapshot"', 'load "x.snapshot"', 'export to "x.csv"', 'import "x.csv"', 'draw to "x.png"', "draw"],
+)
+def test_file_statements_are_rejected_without_files_directory(code):
+    response = request(Server(), "alice", code)
+    assert not response["ok"]
+
+
+@pytest.mark.parametrize("path", ["/etc/passwd.csv", "../bob/week.csv", "a/../../week.csv", "..\\week.csv"])
+def test_paths_out_of_session_directory_are_rejected(tmp_path, path):
+    response = request(Server(str(tmp_path)), "alice", f'export to "{path}"')
+    assert not response["ok"]
+    assert "not allowed" in response["error"]
+
+
+def test_session_name_which_is_not_a_directory_name_cant_use_files(tmp_path):
+    response = request(Server(str(tmp_path)), "../bob", 'export to "week.csv"')
+    assert not response["ok"]
+
+
+def test_files_are_in_directory_of_session(tmp_path):
+    server = Server(str(tmp_path))
+    assert request(server, "alice", 'task "A" from 08:00 to 09:00 in monday save "week.snapshot"')["ok"]
+    assert (tmp_path / "alice" / "week.snapshot").exists()
+    # other sessions can't load it
+    assert not request(server, "bob", 'load "week.snapshot"')["ok"]
+    assert request(server, "alice", 'load "week.snapshot" print task "A"')["output"].startswith("Task > A")
+
+
+def test_rejected_request_change_nothing(tmp_path):
+    server = Server()
+    response = request(server, "alice", 'task "A" from 08:00 to 09:00 in monday save "week.snapshot"')
+    assert not response["ok"]
+    assert "alice" not in server.sessions or not server.sessions["alice"].tasks
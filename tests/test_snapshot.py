@@ -0,0 +1,93 @@
+import os
+import struct
+
+import pytest
+
+from conftest import run
+from interpreter import Interpreter
+from snapshot import HEADER, SNAPSHOT_VERSION
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+# Snapshots of each version are saved by version of code which made that version, from this script
+# (version 3 also has task "D", a dated task)
+SCRIPT = """
+task "A" from 08:00 to 09:00 in monday and friday
+task "B" from 22:00 to 01:00 in sunday
+task "C" duration 01:00 after "A"
+"""
+DATED = 'task "D" from 10:00 to 11:00 every other monday from 2026-01-05 until 2026-03-30 except 2026-02-02'
+
+
+def state_of(interpreter: Interpreter) -> tuple:
+    """return everything of state which snapshot keep, without ids of occupancy grid (they can be different)"""
+    tasks = {n: (t.start_minute, t.end_minute, t.day_mask, t.after, t.recurrence) for n, t in interpreter.tasks.items()}
+    reserved = [list(day) for day in interpreter.reserved]
+    busy = [[interpreter.occupancy.owner(d, m) != 0 for m in range(0, 1440, 15)] for d in range(7)]
+    return tasks, reserved, busy, interpreter.dependents, sorted(interpreter.dated)
+
+
+def loaded(path: str) -> Interpreter:
+    interpreter = Interpreter()
+    interpreter.load(path)
+    return interpreter
+
+
+@pytest.mark.parametrize("version", [1, 2, 3])
+def test_old_versions_are_loaded(version):
+    interpreter = loaded(os.path.join(DATA, f"snapshot_v{version}.snapshot"))
+    expected = Interpreter()
+    run(expected, SCRIPT + (DATED if version >= 3 else ""))
+    if version == 1:
+        # version 1 didn't have dependencies, task after another one is loaded as a fixed time task
+        expected.dependents = {}
+        expected.tasks["C"].after = None
+    assert state_of(interpreter) == state_of(expected)
+
+
+@pytest.mark.parametrize("version", [1, 2, 3])
+def test_old_versions_are_saved_as_current_version(version, tmp_path):
+    interpreter = loaded(os.path.join(DATA, f"snapshot_v{version}.snapshot"))
+    path = str(tmp_path / "week.snapshot")
+    interpreter.save(path)
+    with open(path, "rb") as f:
+        assert HEADER.unpack(f.read(HEADER.size))[1] == SNAPSHOT_VERSION
+    assert state_of(loaded(path)) == state_of(interpreter)
+
+
+def test_loaded_state_is_used_for_next_changes(interpreter, tmp_path):
+    run(interpreter, SCRIPT + DATED)
+    path = str(tmp_path / "week.snapshot")
+    interpreter.save(path)
+    restored = loaded(path)
+    with pytest.raises(RuntimeError, match="have conflict"):
+        run(restored, 'task "X" from 08:30 to 09:30 in friday')
+    with pytest.raises(RuntimeError, match="have conflict"):
+        run(restored, 'task "X" from 10:30 to 11:30 every monday from 2026-01-05')
+    # dependents move with their task
+    run(restored, 'update task "A" from 12:00 to 13:00')
+    assert restored.tasks["C"].start == "13:00"
+    run(restored, 'rename task "B" to "E"')
+    assert restored.booked_at("sunday", "23:00").name == "E"
+
+
+def test_newer_version_is_not_loaded(interpreter, tmp_path):
+    path = tmp_path / "week.snapshot"
+    interpreter.save(str(path))
+    data = bytearray(path.read_bytes())
+    struct.pack_into("<H", data, 8, SNAPSHOT_VERSION + 1)
+    path.write_bytes(bytes(data))
+    with pytest.raises(RuntimeError, match="newer"):
+        loaded(str(path))
+
+
+@pytest.mark.parametrize("content", [b"", b"not a snapshot", None])
+def test_broken_file_is_not_loaded(interpreter, tmp_path, content):
+    path = tmp_path / "week.snapshot"
+    if content is None:
+        # whole header, but cut after it
+        run(interpreter, SCRIPT)
+        interpreter.save(str(path))
+        content = path.read_bytes()[: HEADER.size + 10]
+    path.write_bytes(content)
+    with pytest.raises(RuntimeError):
+        loaded(str(path))
@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def test_interpreter_does_not_import_plot():
+    # a new process, modules which are imported by other tests are not in it
+    code = f"import sys; sys.path.insert(0, {SRC!r}); import interpreter; print(sorted({{'plot', 'matplotlib'}} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    assert out.stdout.strip() == "[]"